@@ -0,0 +1,420 @@
+import asyncio
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple, Type, Union, cast, overload
+
+import aiohttp
+
+from arcor2.rest import (
+    CHUNK_SIZE,
+    DataClass,
+    HashingWriter,
+    Method,
+    OptBody,
+    OptFiles,
+    OptParams,
+    OptTimeout,
+    PoolSettings,
+    Primitive,
+    RestException,
+    RestHttpException,
+    ReturnType,
+    ReturnValue,
+    SkippingWriter,
+    Timeout,
+    Validators,
+    debug,
+    download_finish,
+    download_start,
+    dumps,
+    headers,
+    http_exception,
+    logger,
+    open_part,
+    parse_content,
+    prepare_data,
+    prepare_params,
+    validators_from_headers,
+)
+
+"""
+Asynchronous counterpart of the rest module. Instead of a thread from the default executor, each pending call only
+holds a connection from the (per-host limited) pool.
+"""
+
+_settings = PoolSettings()
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+async def _close_sessions_of_closed_loops() -> None:
+    """Closing a session of an already closed loop only marks its connector
+    closed (transports are gone with the loop), so it can be done from any
+    loop."""
+
+    for loop in [loop for loop in _sessions if loop.is_closed()]:
+        await _sessions.pop(loop).close()
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Session has to be created within a running loop (and can't be shared
+    between loops), so there is one per loop."""
+
+    await _close_sessions_of_closed_loops()
+
+    loop = asyncio.get_event_loop()
+    session = _sessions.get(loop)
+
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=_settings.connections * _settings.maxsize, limit_per_host=_settings.maxsize
+        )
+        session = _sessions[loop] = aiohttp.ClientSession(connector=connector)
+
+    return session
+
+
+async def configure_pool(settings: PoolSettings) -> None:
+    """Sets the pool settings (existing connections are closed).
+
+    :param settings: New settings.
+    :return:
+    """
+
+    global _settings
+
+    _settings = settings
+    await close()
+
+
+async def close() -> None:
+    """Closes all connections of the current loop.
+
+    Should be called before the loop is closed.
+    """
+
+    await _close_sessions_of_closed_loops()
+
+    session = _sessions.pop(asyncio.get_event_loop(), None)
+
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _client_timeout(timeout: OptTimeout) -> aiohttp.ClientTimeout:
+
+    if timeout is None:
+        timeout = Timeout()
+
+    return aiohttp.ClientTimeout(sock_connect=timeout.connect, sock_read=timeout.read)
+
+
+def _query_params(params: OptParams) -> Dict[str, str]:
+    return {k: v if isinstance(v, str) else str(v) for k, v in prepare_params(params).items()}
+
+
+async def _request(
+    method: Method,
+    url: str,
+    *,
+    data: Union[None, str, bytes, aiohttp.FormData],
+    params: OptParams,
+    timeout: OptTimeout,
+    req_headers: Optional[Dict[str, str]],
+) -> aiohttp.ClientResponse:
+    """Sends the request, failed connection attempts are retried.
+
+    Response has to be released by the caller.
+    """
+
+    sess = await _get_session()
+    query = _query_params(params)
+    client_timeout = _client_timeout(timeout)
+
+    attempt = 0
+
+    while True:
+        try:
+            resp = await sess.request(
+                method.value, url, data=data, params=query, headers=req_headers, timeout=client_timeout
+            )
+            break
+        except aiohttp.ClientConnectorError as e:
+            if attempt >= _settings.retries:
+                logger.debug("Request failed.", exc_info=True)
+                raise RestException("Catastrophic system error.") from e
+            if attempt:
+                await asyncio.sleep(_settings.backoff_factor * (2 ** (attempt - 1)))
+            attempt += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug("Request failed.", exc_info=True)
+            raise RestException("Catastrophic system error.") from e
+
+    logger.debug(resp.url)  # to see if query parameters are ok
+
+    if resp.status >= 400:
+        try:
+            content = await resp.read()
+        finally:
+            resp.release()
+        raise http_exception(content, resp.status)
+
+    return resp
+
+
+async def _read(resp: aiohttp.ClientResponse) -> bytes:
+
+    try:
+        return await resp.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.debug("Failed to read the response.", exc_info=True)
+        raise RestException("Catastrophic system error.") from e
+    finally:
+        resp.release()
+
+
+# overload for no return
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> None:
+    ...
+
+
+# single value-returning overloads
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    return_type: Type[Primitive],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> Primitive:
+    ...
+
+
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    return_type: Type[DataClass],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> DataClass:
+    ...
+
+
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    return_type: Type[BytesIO],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> BytesIO:
+    ...
+
+
+# list-returning overloads
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    list_return_type: Type[Primitive],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> List[Primitive]:
+    ...
+
+
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    list_return_type: Type[DataClass],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> List[DataClass]:
+    ...
+
+
+@overload
+async def call(
+    method: Method,
+    url: str,
+    *,
+    list_return_type: Type[BytesIO],
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> List[BytesIO]:
+    ...
+
+
+async def call(
+    method: Method,
+    url: str,
+    *,
+    return_type: ReturnType = None,
+    list_return_type: ReturnType = None,
+    body: OptBody = None,
+    params: OptParams = None,
+    files: OptFiles = None,
+    timeout: OptTimeout = None,
+) -> ReturnValue:
+    """Universal coroutine for calling REST APIs, see rest.call.
+
+    :param method: HTTP method.
+    :param url: Resource address.
+    :param return_type: If set, function will try to return one value of a given type.
+    :param list_return_type: If set, function will try to return list of a given type.
+    :param body: Data to be send in the request body.
+    :param params: Path parameters.
+    :param files: Instead of body, it is possible to send files.
+    :param timeout: Specific timeout for a call.
+    :return: Return value/type is given by return_type/list_return_type. If both are None, nothing will be returned.
+    """
+    if debug:
+        logger.debug(f"{method} {url}, body: {body}, params: {params}, files: {files is not None}, timeout: {timeout}")
+
+    if body and files:
+        raise RestException("Can't send data and files at the same time.")
+
+    if return_type and list_return_type:
+        raise RestException("Only one argument from 'return_type' and 'list_return_type' can be used.")
+
+    if return_type is None:
+        return_type = list_return_type
+
+    if files:
+        form = aiohttp.FormData()
+        for name, content in files.items():
+            form.add_field(name, content, filename=name)
+        resp = await _request(method, url, data=form, params=params, timeout=timeout, req_headers=None)
+    else:
+        resp = await _request(
+            method, url, data=dumps(prepare_data(body)), params=params, timeout=timeout, req_headers=headers
+        )
+
+    content = await _read(resp)
+
+    if return_type is None:
+        return None
+
+    if issubclass(return_type, BytesIO):
+
+        if list_return_type:
+            raise NotImplementedError
+
+        return BytesIO(content)
+
+    return parse_content(url, content, return_type, list_return_type)
+
+
+async def get_if_modified(
+    url: str,
+    return_type: Type[DataClass],
+    validators: Optional[Validators] = None,
+    *,
+    params: OptParams = None,
+    timeout: OptTimeout = None,
+) -> Tuple[Optional[DataClass], Validators]:
+    """Conditional GET, see rest.get_if_modified.
+
+    :param url: Resource address.
+    :param return_type: Type of the resource.
+    :param validators: Validators from the previous response. If not set, the resource is always transferred.
+    :param params: Path parameters.
+    :param timeout: Specific timeout for a call.
+    :return: Tuple of the resource (None if not modified) and up-to-date validators.
+    """
+
+    if validators is None:
+        validators = Validators()
+
+    resp = await _request(
+        Method.GET,
+        url,
+        data=None,
+        params=params,
+        timeout=timeout,
+        req_headers={"accept": "application/json", **validators.headers()},
+    )
+
+    content = await _read(resp)
+
+    if resp.status == 304:
+        return None, validators_from_headers(resp.headers, validators)
+
+    return cast(DataClass, parse_content(url, content, return_type)), validators_from_headers(resp.headers)
+
+
+async def download(
+    url: str,
+    path: str,
+    params: OptParams = None,
+    *,
+    checksum: Optional[str] = None,
+    algorithm: str = "sha256",
+    resume: bool = False,
+) -> str:
+    """Shortcut for saving a file to disk, see rest.download.
+
+    :param url: Resource address.
+    :param path: Where to save the file.
+    :param params: Path parameters.
+    :param checksum: If set, the hex digest of the file is compared to it and exception is raised on mismatch.
+    :param algorithm: Hashing algorithm (any supported by hashlib).
+    :param resume: Continue the previously interrupted download (using HTTP Range).
+    :return: Hex digest of the downloaded file.
+    """
+
+    digest, offset = download_start(path, algorithm, resume)
+
+    try:
+        resp = await _request(
+            Method.GET,
+            url,
+            data=None,
+            params=params,
+            timeout=None,
+            req_headers={"Range": f"bytes={offset}-"} if offset else None,
+        )
+    except RestHttpException as e:
+        if offset and e.error_code == 416:  # range not satisfiable - there is nothing more to download
+            return download_finish(path, digest, checksum)
+        raise
+
+    try:
+        with open_part(path, offset) as file:
+            writer = SkippingWriter(HashingWriter(file, digest), offset if resp.status != 206 else 0)
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                writer.write(chunk)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.debug("Failed to read the response.", exc_info=True)
+        raise RestException("Catastrophic system error.") from e
+    finally:
+        resp.release()
+
+    return download_finish(path, digest, checksum)
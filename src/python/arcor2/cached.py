@@ -1,24 +1,147 @@
 import copy
+import weakref
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, Iterator, List, Optional, Set, Tuple, ValuesView
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    ValuesView,
+)
 
 from arcor2.data import common as cmn
+from arcor2.data.storage import ProjectPatch, ScenePatch
 from arcor2.exceptions import Arcor2Exception
 
 if __debug__:
     import random
 
+if TYPE_CHECKING:
+    from arcor2.transformations import TransformTree
+
 # TODO cached ProjectFunction (actions from functions are totally ignored at the moment)
 
 
+# version of tracked changes, time of the last save and of the last change
+Revision = Tuple[int, Optional[datetime], Optional[datetime]]
+
+
 class CachedSceneException(Arcor2Exception):
     pass
 
 
-class CachedScene:
+class ChangeTracker:
+    """Changes (added/updated or removed items) made since the last save.
+
+    Each change gets a version, so changes made while a save is in
+    progress are kept for the next one.
+    """
+
+    def __init__(self) -> None:
+
+        self.version = 0
+        self._everything = 0  # version of the last change of unknown scope (0 = there is none)
+        self._items: Dict[str, Dict[str, Tuple[bool, int]]] = {}  # kind -> item ID -> (removed, version)
+
+    def _next_version(self) -> int:
+
+        self.version += 1
+        return self.version
+
+    @property
+    def everything(self) -> bool:
+        """Whole thing has to be saved."""
+        return self._everything > 0
+
+    def everything_changed(self) -> None:
+        self._everything = self._next_version()
+
+    def upsert(self, kind: str, item_id: str) -> None:
+        self._items.setdefault(kind, {})[item_id] = False, self._next_version()
+
+    def remove(self, kind: str, item_id: str) -> None:
+        self._items.setdefault(kind, {})[item_id] = True, self._next_version()
+
+    def upserted(self, kind: str) -> List[str]:
+        return [item_id for item_id, (removed, _) in self._items.get(kind, {}).items() if not removed]
+
+    def removed(self, kind: str) -> List[str]:
+        return [item_id for item_id, (removed, _) in self._items.get(kind, {}).items() if removed]
+
+    def saved(self, version: int) -> None:
+        """Forgets changes up to the (saved) version."""
+
+        if self._everything <= version:
+            self._everything = 0
+
+        self._items = {
+            kind: {item_id: change for item_id, change in items.items() if change[1] > version}
+            for kind, items in self._items.items()
+        }
+
+    def merge(self, other: "ChangeTracker") -> None:
+        """Adds changes tracked by another tracker (as new ones)."""
+
+        if other.everything:
+            self.everything_changed()
+
+        for kind, items in other._items.items():
+            for item_id, (removed, _) in items.items():
+                self._items.setdefault(kind, {})[item_id] = removed, self._next_version()
+
+
+class PoseSubscribers:
+    """Notifies subscribers (e.g. TransformTree) about changes of poses or
+    parents of objects/APs.
+
+    Subscribers are referenced weakly.
+    """
+
+    def __init__(self) -> None:
+
+        self._pose_subscribers: List[weakref.WeakMethod] = []
+        self.transform_tree: Optional["TransformTree"] = None  # see transformations.transform_tree
+
+    def subscribe_poses(self, callback: Callable[[Optional[str]], None]) -> None:
+        """The callback gets ID of the changed object/AP (None if the scope of
+        the change is unknown).
+
+        Changes of orientations are reported as changes of their AP.
+        """
+        self._pose_subscribers.append(weakref.WeakMethod(callback))
+
+    def unsubscribe_poses(self, callback: Callable[[Optional[str]], None]) -> None:
+        self._pose_subscribers = [ref for ref in self._pose_subscribers if ref() not in (None, callback)]
+
+    def poses_changed(self, item_id: Optional[str] = None) -> None:
+        """To be called when pose or parent of an object/AP was modified in
+        place."""
+
+        alive: List[weakref.WeakMethod] = []
+
+        for ref in self._pose_subscribers:
+            callback = ref()
+            if callback is not None:
+                callback(item_id)
+                alive.append(ref)
+
+        self._pose_subscribers = alive
+
+
+class CachedScene(PoseSubscribers):
     def __init__(self, scene: cmn.Scene):
 
+        super().__init__()
+
         self.id: str = scene.id
         self.name: str = scene.name
         self.desc: str = scene.desc
@@ -82,12 +205,72 @@ class CachedScene:
 
 
 class UpdateableCachedScene(CachedScene):
+
+    _OBJECT = "object"
+
     def __init__(self, scene: cmn.Scene):
         super(UpdateableCachedScene, self).__init__(copy.deepcopy(scene))
+        self._changes = ChangeTracker()
 
-    def update_modified(self) -> None:
+    def _touch(self) -> None:
         self.int_modified = datetime.now(tz=timezone.utc)
 
+    def update_modified(self) -> None:
+        """To be called when the scene was modified in place (outside of
+        methods of the class).
+
+        As the scope of the change is unknown, the whole scene is going
+        to be saved.
+        """
+
+        self._changes.everything_changed()
+        self._touch()
+        self.poses_changed()
+
+    def update_object_modified(self, obj_id: str) -> None:
+        """To be called when the object was modified in place."""
+
+        self._changes.upsert(self._OBJECT, obj_id)
+        self._touch()
+        self.poses_changed(obj_id)
+
+    def update_attributes_modified(self) -> None:
+        """To be called when name or description was modified."""
+        self._touch()
+
+    @property
+    def version(self) -> int:
+        return self._changes.version
+
+    @property
+    def revision(self) -> Revision:
+        """Changes whenever the scene changes (including saving), e.g. to
+        invalidate data derived from it."""
+
+        return self.version, self.modified, self.int_modified
+
+    def patch(self) -> Optional[ScenePatch]:
+        """Changes made since the scene was loaded or saved.
+
+        :return: None if the whole scene has to be saved.
+        """
+
+        if self.modified is None or self._changes.everything:
+            return None
+
+        return ScenePatch(
+            cmn.Scene.from_bare(self.bare),
+            [self._objects[obj_id] for obj_id in self._changes.upserted(self._OBJECT)],
+            self._changes.removed(self._OBJECT),
+        )
+
+    def saved(self, modified: datetime, version: int) -> None:
+        """To be called when the scene (its state at the given version) was
+        saved."""
+
+        self.modified = modified
+        self._changes.saved(version)
+
     def has_changes(self) -> bool:
 
         if self.int_modified is None:
@@ -101,7 +284,7 @@ class UpdateableCachedScene(CachedScene):
     def upsert_object(self, obj: cmn.SceneObject) -> None:
 
         self._objects[obj.id] = obj
-        self.update_modified()
+        self.update_object_modified(obj.id)
 
     def delete_object(self, obj_id: str) -> None:
 
@@ -110,37 +293,159 @@ class UpdateableCachedScene(CachedScene):
         except KeyError as e:
             raise Arcor2Exception("Object id not found.") from e
 
-        self.update_modified()
+        self._changes.remove(self._OBJECT, obj_id)
+        self._touch()
+        self.poses_changed(obj_id)
 
 
 class CachedProjectException(Arcor2Exception):
     pass
 
 
-@dataclass
-class Actions:
+V = TypeVar("V")
 
-    data: Dict[str, cmn.Action] = field(default_factory=dict)
-    parent: Dict[str, cmn.BareActionPoint] = field(default_factory=dict)
 
+class Overlay(MutableMapping[str, V]):
+    """Changes staged over a mapping, which is not modified until apply() is
+    called."""
 
-@dataclass
-class Joints:
+    def __init__(self, base: MutableMapping[str, V]) -> None:
+
+        self.base = base
+        self.changes: Dict[str, V] = {}
+        self.removed: Set[str] = set()
+
+    def __getitem__(self, key: str) -> V:
+
+        try:
+            return self.changes[key]
+        except KeyError:
+            pass
+
+        if key in self.removed:
+            raise KeyError(key)
+
+        return self.base[key]
+
+    def __setitem__(self, key: str, value: V) -> None:
+
+        self.changes[key] = value
+        self.removed.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+
+        if key not in self:
+            raise KeyError(key)
+
+        self.changes.pop(key, None)
+
+        if key in self.base:
+            self.removed.add(key)
+
+    def __iter__(self) -> Iterator[str]:
+
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+
+        for key in self.changes:
+            if key not in self.base:
+                yield key
 
-    data: Dict[str, cmn.ProjectRobotJoints] = field(default_factory=dict)
-    parent: Dict[str, cmn.BareActionPoint] = field(default_factory=dict)
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+
+        self.changes.clear()
+        self.removed = set(self.base)
+
+    def apply(self) -> None:
+
+        for key in self.removed:
+            del self.base[key]
+
+        self.base.update(self.changes)
+        self.discard()
+
+    def discard(self) -> None:
+
+        self.changes.clear()
+        self.removed.clear()
+
+
+D = TypeVar("D", cmn.Action, cmn.ProjectRobotJoints, cmn.NamedOrientation)
 
 
 @dataclass
-class Orientations:
+class ApItems(Generic[D]):
+    """Items of action points (actions, joints or orientations).
+
+    :param data: Items by their ID.
+    :param parent: Parent AP of each item.
+    :param children: IDs of items belonging to each AP (in order of insertion).
+    """
+
+    data: MutableMapping[str, D] = field(default_factory=dict)
+    parent: MutableMapping[str, cmn.BareActionPoint] = field(default_factory=dict)
+    children: MutableMapping[str, List[str]] = field(default_factory=dict)
+
+    def upsert(self, ap: cmn.BareActionPoint, item: D) -> None:
+
+        if item.id in self.data:
+            assert self.parent[item.id] == ap
+        else:
+            self.parent[item.id] = ap
+            self.children[ap.id] = self.children.get(ap.id, []) + [item.id]
+
+        self.data[item.id] = item
+
+    def remove(self, item_id: str) -> D:
+        """Removes the item.
+
+        :raises KeyError: When there is no such item.
+        """
+
+        item = self.data.pop(item_id)
+        ap = self.parent.pop(item_id)
+
+        _remove_from_index(self.children, ap.id, item_id)
+
+        return item
+
+    def of(self, ap_id: str) -> List[D]:
+        return [self.data[item_id] for item_id in self.children.get(ap_id, ())]
+
+
+def _remove_from_index(index: MutableMapping[str, List[str]], key: str, item_id: str) -> None:
+    """Lists in indexes are never modified in place, so they can be shared
+    with an Overlay."""
+
+    item_ids = [iid for iid in index[key] if iid != item_id]
+
+    if item_ids:
+        index[key] = item_ids
+    else:
+        del index[key]
 
-    data: Dict[str, cmn.NamedOrientation] = field(default_factory=dict)
-    parent: Dict[str, cmn.BareActionPoint] = field(default_factory=dict)
 
+class Actions(ApItems[cmn.Action]):
+    pass
+
+
+class Joints(ApItems[cmn.ProjectRobotJoints]):
+    pass
+
+
+class Orientations(ApItems[cmn.NamedOrientation]):
+    pass
 
-class CachedProject:
+
+class CachedProject(PoseSubscribers):
     def __init__(self, project: cmn.Project):
 
+        super().__init__()
+
         self.id: str = project.id
         self.name: str = project.name
         self.scene_id: str = project.scene_id
@@ -149,17 +454,22 @@ class CachedProject:
         self.modified: Optional[datetime] = project.modified
         self._int_modified: Optional[datetime] = project.int_modified
 
-        self._action_points: Dict[str, cmn.BareActionPoint] = {}
+        self._action_points: MutableMapping[str, cmn.BareActionPoint] = {}
 
         self._actions = Actions()
         self._joints = Joints()
         self._orientations = Orientations()
 
-        self._constants: Dict[str, cmn.ProjectConstant] = {}
-        self._logic_items: Dict[str, cmn.LogicItem] = {}
-        self._functions: Dict[str, cmn.ProjectFunction] = {}
+        self._constants: MutableMapping[str, cmn.ProjectConstant] = {}
+        self._logic_items: MutableMapping[str, cmn.LogicItem] = {}
+
+        # indexes of logic items, kept up to date by _index_logic_item / _unindex_logic_item
+        self._logic_ends: MutableMapping[str, Tuple[str, str]] = {}  # logic item ID -> (start action ID, end)
+        self._logic_outputs: MutableMapping[str, List[str]] = {}  # start action ID (or START) -> logic item IDs
+        self._logic_inputs: MutableMapping[str, List[str]] = {}  # end action ID (or END) -> logic item IDs
+        self._functions: MutableMapping[str, cmn.ProjectFunction] = {}
 
-        self.overrides: Dict[str, List[cmn.Parameter]] = {}
+        self.overrides: MutableMapping[str, List[cmn.Parameter]] = {}
 
         for ap in project.action_points:
 
@@ -174,24 +484,21 @@ class CachedProject:
                 if ac.id in self._actions.data:
                     raise CachedProjectException(f"Duplicate action id: {ac.id}.")
 
-                self._actions.data[ac.id] = ac
-                self._actions.parent[ac.id] = bare_ap
+                self._actions.upsert(bare_ap, ac)
 
             for joints in ap.robot_joints:
 
                 if joints.id in self._joints.data:
                     raise CachedProjectException(f"Duplicate joints id: {joints.id}.")
 
-                self._joints.data[joints.id] = joints
-                self._joints.parent[joints.id] = bare_ap
+                self._joints.upsert(bare_ap, joints)
 
             for orientation in ap.orientations:
 
                 if orientation.id in self._orientations.data:
                     raise CachedProjectException(f"Duplicate orientation id: {orientation.id}.")
 
-                self._orientations.data[orientation.id] = orientation
-                self._orientations.parent[orientation.id] = bare_ap
+                self._orientations.upsert(bare_ap, orientation)
 
         for override in project.object_overrides:
             self.overrides[override.id] = override.parameters
@@ -201,10 +508,31 @@ class CachedProject:
 
         for logic_item in project.logic:
             self._logic_items[logic_item.id] = logic_item
+            self._index_logic_item(logic_item)
 
         for function in project.functions:
             self._functions[function.id] = function
 
+    def _index_logic_item(self, logic_item: cmn.LogicItem) -> None:
+
+        start_action_id = logic_item.parse_start().start_action_id
+
+        self._logic_ends[logic_item.id] = start_action_id, logic_item.end
+        self._logic_outputs[start_action_id] = self._logic_outputs.get(start_action_id, []) + [logic_item.id]
+        self._logic_inputs[logic_item.end] = self._logic_inputs.get(logic_item.end, []) + [logic_item.id]
+
+    def _unindex_logic_item(self, logic_item_id: str) -> None:
+        """Uses the stored ends, so it works even when the logic item was
+        modified in place."""
+
+        try:
+            start_action_id, end = self._logic_ends.pop(logic_item_id)
+        except KeyError:
+            return
+
+        _remove_from_index(self._logic_outputs, start_action_id, logic_item_id)
+        _remove_from_index(self._logic_inputs, end, logic_item_id)
+
     @property
     def logic(self) -> ValuesView[cmn.LogicItem]:
         return self._logic_items.values()
@@ -227,12 +555,7 @@ class CachedProject:
         proj = cmn.Project.from_bare(self.bare)
 
         for bare_ap in self._action_points.values():
-
-            ap = cmn.ActionPoint.from_bare(bare_ap)
-            ap.actions = self.ap_actions(ap.id)
-            ap.robot_joints = self.ap_joints(ap.id)
-            ap.orientations = self.ap_orientations(ap.id)
-            proj.action_points.append(ap)
+            proj.action_points.append(self._action_point_with_items(bare_ap))
 
         proj.object_overrides = [cmn.SceneObjectOverride(k, v) for k, v in self.overrides.items()]
         proj.constants = list(self.constants)
@@ -240,6 +563,14 @@ class CachedProject:
         proj.logic = list(self.logic)
         return proj
 
+    def _action_point_with_items(self, bare_ap: cmn.BareActionPoint) -> cmn.ActionPoint:
+
+        ap = cmn.ActionPoint.from_bare(bare_ap)
+        ap.actions = self.ap_actions(ap.id)
+        ap.robot_joints = self.ap_joints(ap.id)
+        ap.orientations = self.ap_orientations(ap.id)
+        return ap
+
     @property
     def bare(self) -> cmn.BareProject:
         return cmn.BareProject(self.id, self.name, self.scene_id, self.desc, self.has_logic)
@@ -296,34 +627,16 @@ class CachedProject:
         return cmn.Pose(ap.position, ori.orientation)
 
     def ap_orientations(self, ap_id: str) -> List[cmn.NamedOrientation]:
-
-        # TODO come up with something more efficient
-        return [
-            self._orientations.data[ori_id]
-            for ori_id, parent_ap in self._orientations.parent.items()
-            if ap_id == parent_ap.id
-        ]
+        return self._orientations.of(ap_id)
 
     def ap_joints(self, ap_id: str) -> List[cmn.ProjectRobotJoints]:
-
-        # TODO come up with something more efficient
-        return [
-            self._joints.data[joints_id]
-            for joints_id, parent_ap in self._joints.parent.items()
-            if ap_id == parent_ap.id
-        ]
+        return self._joints.of(ap_id)
 
     def ap_actions(self, ap_id: str) -> List[cmn.Action]:
-
-        # TODO come up with something more efficient
-        return [
-            self._actions.data[action_id]
-            for action_id, parent_ap in self._actions.parent.items()
-            if ap_id == parent_ap.id
-        ]
+        return self._actions.of(ap_id)
 
     def ap_action_ids(self, ap_id: str) -> Set[str]:
-        return {ac.id for ac in self.ap_actions(ap_id)}
+        return set(self._actions.children.get(ap_id, ()))
 
     def ap_orientation_names(self, ap_id: str) -> Set[str]:
         return {ori.name for ori in self.ap_orientations(ap_id)}
@@ -356,15 +669,8 @@ class CachedProject:
         :return:
         """
 
-        inputs: List[cmn.LogicItem] = []
-        outputs: List[cmn.LogicItem] = []
-
-        for item in self._logic_items.values():
-            parsed_start = item.parse_start()
-            if parsed_start.start_action_id == action_id:
-                outputs.append(item)
-            if item.end == action_id:
-                inputs.append(item)
+        inputs = [self._logic_items[item_id] for item_id in self._logic_inputs.get(action_id, ())]
+        outputs = [self._logic_items[item_id] for item_id in self._logic_outputs.get(action_id, ())]
 
         if __debug__:  # make it a bit harder for tests to succeed
             random.shuffle(inputs)
@@ -374,18 +680,15 @@ class CachedProject:
 
     def first_action_id(self) -> str:
 
-        first_action: Optional[str] = None
+        starts = self._logic_outputs.get(cmn.LogicItem.START, [])
 
-        for item in self._logic_items.values():
-            if item.start == item.START:
-                if first_action:
-                    raise CachedProjectException("Duplicate start.")
-                first_action = self.action(item.end).id
-
-        if first_action is None:
+        if not starts:
             raise CachedProjectException("Start action not found.")
 
-        return first_action
+        if len(starts) > 1:
+            raise CachedProjectException("Duplicate start.")
+
+        return self.action(self._logic_items[starts[0]].end).id
 
     def action_point_and_action(self, action_id: str) -> Tuple[cmn.BareActionPoint, cmn.Action]:
 
@@ -431,12 +734,97 @@ class CachedProject:
 
 
 class UpdateableCachedProject(CachedProject):
+
+    _AP = "action_point"
+    _LOGIC = "logic"
+
     def __init__(self, project: cmn.Project):
         super(UpdateableCachedProject, self).__init__(copy.deepcopy(project))
+        self._changes = ChangeTracker()
 
-    def update_modified(self) -> None:
+    def _touch(self) -> None:
         self._int_modified = datetime.now(tz=timezone.utc)
 
+    def _ap_changed(self, ap_id: str) -> None:
+
+        self._changes.upsert(self._AP, ap_id)
+        self._touch()
+
+    def update_modified(self) -> None:
+        """To be called when the project was modified in place (outside of
+        methods of the class).
+
+        As the scope of the change is unknown, the whole project is
+        going to be saved.
+        """
+
+        self._changes.everything_changed()
+        self._touch()
+        self.poses_changed()
+
+    def update_ap_modified(self, ap_id: str) -> None:
+        """To be called when the action point (or any of its actions,
+        orientations or joints) was modified in place."""
+        self._ap_changed(ap_id)
+        self.poses_changed(ap_id)
+
+    def update_attributes_modified(self) -> None:
+        """To be called when name, description, has_logic or overrides were
+        modified."""
+        self._touch()
+
+    @property
+    def version(self) -> int:
+        return self._changes.version
+
+    @property
+    def revision(self) -> Revision:
+        """Changes whenever the project changes (including saving), e.g. to
+        invalidate data derived from it."""
+
+        return self.version, self.modified, self._int_modified
+
+    def patch(self) -> Optional[ProjectPatch]:
+        """Changes made since the project was loaded or saved.
+
+        :return: None if the whole project has to be saved.
+        """
+
+        if self.modified is None or self._changes.everything:
+            return None
+
+        proj = cmn.Project.from_bare(self.bare)
+        proj.modified = self.modified
+        proj.object_overrides = [cmn.SceneObjectOverride(k, v) for k, v in self.overrides.items()]
+        proj.constants = list(self.constants)
+        proj.functions = list(self.functions)
+
+        return ProjectPatch(
+            proj,
+            [self._action_point_with_items(self._action_points[ap_id]) for ap_id in self._changes.upserted(self._AP)],
+            self._changes.removed(self._AP),
+            [self._logic_items[item_id] for item_id in self._changes.upserted(self._LOGIC)],
+            self._changes.removed(self._LOGIC),
+        )
+
+    def saved(self, modified: datetime, version: int) -> None:
+        """To be called when the project (its state at the given version) was
+        saved."""
+
+        self.modified = modified
+        self._changes.saved(version)
+
+    def transaction(self) -> "ProjectTransaction":
+        return ProjectTransaction(self)
+
+    def _ap_for_update(self, ap_id: str) -> cmn.BareActionPoint:
+        """Returns the action point which is going to be modified in place."""
+        return self.bare_action_point(ap_id)
+
+    def _item_for_update(self, items: ApItems[D], item_id: str) -> D:
+        """Returns the item which is going to be modified in place."""
+        return items.data[item_id]
+
     @property
     def has_changes(self) -> bool:
 
@@ -450,80 +838,63 @@ class UpdateableCachedProject(CachedProject):
 
     def upsert_action(self, ap_id: str, action: cmn.Action) -> None:
 
-        ap = self.bare_action_point(ap_id)
-
-        if action.id in self._actions.data:
-            assert self._actions.parent[action.id] == ap
-            self._actions.data[action.id] = action
-        else:
-            self._actions.data[action.id] = action
-            self._actions.parent[action.id] = ap
-        self.update_modified()
+        self._actions.upsert(self.bare_action_point(ap_id), action)
+        self._ap_changed(ap_id)
 
     def remove_action(self, action_id: str) -> cmn.Action:
 
         try:
-            action = self._actions.data.pop(action_id)
-            del self._actions.parent[action_id]  # TODO KeyError here might be probably ignored? (it should not happen)
+            ap = self._actions.parent[action_id]
+            action = self._actions.remove(action_id)
         except KeyError as e:
             raise CachedProjectException("Action not found.") from e
-        self.update_modified()
+        self._ap_changed(ap.id)
         return action
 
     def invalidate_joints(self, ap_id: str) -> None:
 
         for joints in self.ap_joints(ap_id):
-            joints.is_valid = False
+            self._item_for_update(self._joints, joints.id).is_valid = False
+            self._changes.upsert(self._AP, ap_id)
 
     def update_ap_position(self, ap_id: str, position: cmn.Position) -> None:
 
-        ap = self.bare_action_point(ap_id)
+        ap = self._ap_for_update(ap_id)
         ap.position = position
         self.invalidate_joints(ap_id)
-        self.update_modified()
+        self._ap_changed(ap_id)
+        self.poses_changed(ap_id)
 
     def upsert_orientation(self, ap_id: str, orientation: cmn.NamedOrientation) -> None:
 
-        ap = self.bare_action_point(ap_id)
-
-        if orientation.id in self._orientations.data:
-            assert self._orientations.parent[orientation.id] == ap
-            self._orientations.data[orientation.id] = orientation
-        else:
-            self._orientations.data[orientation.id] = orientation
-            self._orientations.parent[orientation.id] = ap
-        self.update_modified()
+        self._orientations.upsert(self.bare_action_point(ap_id), orientation)
+        self._ap_changed(ap_id)
+        self.poses_changed(ap_id)
 
     def remove_orientation(self, orientation_id: str) -> cmn.NamedOrientation:
 
         try:
-            ori = self._orientations.data.pop(orientation_id)
-            del self._orientations.parent[orientation_id]
+            ap = self._orientations.parent[orientation_id]
+            ori = self._orientations.remove(orientation_id)
         except KeyError as e:
             raise CachedProjectException("Orientation not found.") from e
-        self.update_modified()
+        self._ap_changed(ap.id)
+        self.poses_changed(ap.id)
         return ori
 
     def upsert_joints(self, ap_id: str, joints: cmn.ProjectRobotJoints) -> None:
 
-        ap = self.bare_action_point(ap_id)
-
-        if joints.id in self._joints.data:
-            assert self._joints.parent[joints.id] == ap
-            self._joints.data[joints.id] = joints
-        else:
-            self._joints.data[joints.id] = joints
-            self._joints.parent[joints.id] = ap
-        self.update_modified()
+        self._joints.upsert(self.bare_action_point(ap_id), joints)
+        self._ap_changed(ap_id)
 
     def remove_joints(self, joints_id: str) -> cmn.ProjectRobotJoints:
 
         try:
-            joints = self._joints.data.pop(joints_id)
-            del self._joints.parent[joints_id]
+            ap = self._joints.parent[joints_id]
+            joints = self._joints.remove(joints_id)
         except KeyError as e:
             raise CachedProjectException("Joints not found.") from e
-        self.update_modified()
+        self._ap_changed(ap.id)
         return joints
 
     def upsert_action_point(
@@ -531,7 +902,7 @@ class UpdateableCachedProject(CachedProject):
     ) -> cmn.BareActionPoint:
 
         try:
-            ap = self.bare_action_point(ap_id)
+            ap = self._ap_for_update(ap_id)
             ap.name = name
             if position != ap.position:
                 self.invalidate_joints(ap_id)
@@ -540,7 +911,8 @@ class UpdateableCachedProject(CachedProject):
         except CachedProjectException:
             ap = cmn.BareActionPoint(ap_id, name, position, parent)
             self._action_points[ap_id] = ap
-        self.update_modified()
+        self._ap_changed(ap_id)
+        self.poses_changed(ap_id)
         return ap
 
     def remove_action_point(self, ap_id: str) -> cmn.BareActionPoint:
@@ -557,13 +929,18 @@ class UpdateableCachedProject(CachedProject):
             self.remove_orientation(ori.id)
 
         del self._action_points[ap_id]
-        self.update_modified()
+        self._changes.remove(self._AP, ap_id)
+        self._touch()
+        self.poses_changed(ap_id)
         return ap
 
     def upsert_logic_item(self, logic_item: cmn.LogicItem) -> None:
 
+        self._unindex_logic_item(logic_item.id)
         self._logic_items[logic_item.id] = logic_item
-        self.update_modified()
+        self._index_logic_item(logic_item)
+        self._changes.upsert(self._LOGIC, logic_item.id)
+        self._touch()
 
     def remove_logic_item(self, logic_item_id: str) -> cmn.LogicItem:
 
@@ -571,17 +948,25 @@ class UpdateableCachedProject(CachedProject):
             logic_item = self._logic_items.pop(logic_item_id)
         except KeyError as e:
             raise CachedProjectException("Logic item not found.") from e
-        self.update_modified()
+        self._unindex_logic_item(logic_item_id)
+        self._changes.remove(self._LOGIC, logic_item_id)
+        self._touch()
         return logic_item
 
     def clear_logic(self) -> None:
 
+        for logic_item_id in self._logic_items:
+            self._changes.remove(self._LOGIC, logic_item_id)
+
         self._logic_items.clear()
-        self.update_modified()
+        self._logic_ends.clear()
+        self._logic_outputs.clear()
+        self._logic_inputs.clear()
+        self._touch()
 
     def upsert_constant(self, const: cmn.ProjectConstant) -> None:
         self._constants[const.id] = const
-        self.update_modified()
+        self._touch()  # constants are always saved
 
     def remove_constant(self, const_id: str) -> cmn.ProjectConstant:
 
@@ -589,5 +974,99 @@ class UpdateableCachedProject(CachedProject):
             const = self._constants.pop(const_id)
         except KeyError as e:
             raise CachedProjectException("Constant not found.") from e
-        self.update_modified()
+        self._touch()
         return const
+
+
+class ProjectTransaction(UpdateableCachedProject):
+    """Changes staged over a project.
+
+    The transaction reads as the project with the changes applied, the project itself is modified only by commit().
+    Nothing is copied upfront, so the cost is proportional to the changes, not to the size of the project.
+    Action points and items modified using methods of the class are copied, objects passed to it (e.g. to
+    upsert_action) are used as they are and should not be shared with the project.
+    """
+
+    _ATTRIBUTES = ("id", "name", "scene_id", "desc", "has_logic", "modified", "_int_modified")
+
+    def __init__(self, project: UpdateableCachedProject) -> None:  # super().__init__ is not called on purpose
+
+        PoseSubscribers.__init__(self)
+
+        self._project = project
+        self._overlays: List[Overlay[Any]] = []
+        self._changes = ChangeTracker()
+
+        for attr in self._ATTRIBUTES:
+            setattr(self, attr, getattr(project, attr))
+
+        self._action_points = self._overlay(project._action_points)
+
+        self._actions = Actions(*self._item_overlays(project._actions))
+        self._joints = Joints(*self._item_overlays(project._joints))
+        self._orientations = Orientations(*self._item_overlays(project._orientations))
+
+        self._constants = self._overlay(project._constants)
+        self._logic_items = self._overlay(project._logic_items)
+        self._functions = self._overlay(project._functions)
+
+        self._logic_ends = self._overlay(project._logic_ends)
+        self._logic_outputs = self._overlay(project._logic_outputs)
+        self._logic_inputs = self._overlay(project._logic_inputs)
+
+        self.overrides = self._overlay(project.overrides)
+
+    def _overlay(self, base: MutableMapping[str, V]) -> Overlay[V]:
+
+        overlay = Overlay(base)
+        self._overlays.append(overlay)
+        return overlay
+
+    def _item_overlays(self, items: ApItems[D]) -> Tuple[Overlay[D], Overlay[cmn.BareActionPoint], Overlay[List[str]]]:
+        return self._overlay(items.data), self._overlay(items.parent), self._overlay(items.children)
+
+    def _ap_for_update(self, ap_id: str) -> cmn.BareActionPoint:
+
+        ap = copy.copy(self.bare_action_point(ap_id))
+        self._action_points[ap_id] = ap
+
+        for items in (self._actions, self._joints, self._orientations):
+            for item_id in items.children.get(ap_id, ()):
+                items.parent[item_id] = ap
+
+        return ap
+
+    def _item_for_update(self, items: ApItems[D], item_id: str) -> D:
+
+        item = copy.copy(items.data[item_id])
+        items.data[item_id] = item
+        return item
+
+    def commit(self) -> None:
+        """Applies the changes to the project."""
+
+        for overlay in self._overlays:
+            overlay.apply()
+
+        for attr in self._ATTRIBUTES:
+            setattr(self._project, attr, getattr(self, attr))
+
+        if self._changes.everything:
+            self._project.poses_changed()
+        else:
+            for ap_id in self._changes.upserted(self._AP) + self._changes.removed(self._AP):
+                self._project.poses_changed(ap_id)
+
+        self._project._changes.merge(self._changes)
+        self._changes = ChangeTracker()
+
+    def rollback(self) -> None:
+        """Discards the changes."""
+
+        for overlay in self._overlays:
+            overlay.discard()
+
+        for attr in self._ATTRIBUTES:
+            setattr(self, attr, getattr(self._project, attr))
+
+        self._changes = ChangeTracker()
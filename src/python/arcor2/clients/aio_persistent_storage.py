@@ -1,89 +1,273 @@
+from collections import defaultdict
 from datetime import datetime
+from typing import DefaultDict, Dict, Iterable, List, Optional, Tuple, Union
 
+from arcor2 import aio_rest, rest
 from arcor2.clients import persistent_storage
-from arcor2.clients.persistent_storage import ProjectServiceException  # noqa
+from arcor2.clients.persistent_storage import ProjectServiceException
 from arcor2.data.common import IdDescList, Project, ProjectSources, Scene
-from arcor2.data.object_type import Mesh, MeshList, Model, Model3dType, ObjectType
-from arcor2.helpers import run_in_executor
+from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, MetaModel3d, Model, Model3dType, ObjectType
+from arcor2.data.storage import Changes, ProjectPatch, ScenePatch
+from arcor2.exceptions.helpers import handle
 
+"""
+Asynchronous version of the persistent_storage module.
+Endpoints are shared with persistent_storage (its URL is read in the time of a call).
+"""
 
+
+@handle(ProjectServiceException, message="Failed to get changes.")
+async def get_changes(since: Optional[int] = None, timeout: float = 10.0) -> Changes:
+    """Waits for changes of projects, scenes or object types (long-poll), see
+    persistent_storage.get_changes."""
+
+    params: Dict[str, Union[int, float]] = {"timeout": timeout}
+
+    if since is not None:
+        params["since"] = since
+
+    return await aio_rest.call(
+        rest.Method.GET,
+        persistent_storage.changes_url(),
+        return_type=Changes,
+        params=params,
+        timeout=rest.Timeout(read=timeout + rest.Timeout().read),
+    )
+
+
+@handle(ProjectServiceException, message="Failed to get the mesh.")
 async def get_mesh(mesh_id: str) -> Mesh:
-    return await run_in_executor(persistent_storage.get_mesh, mesh_id)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.mesh_url(mesh_id), return_type=Mesh)
 
 
+@handle(ProjectServiceException, message="Failed to get list of meshes.")
 async def get_meshes() -> MeshList:
-    return await run_in_executor(persistent_storage.get_meshes)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.meshes_url(), list_return_type=Mesh)
 
 
+@handle(ProjectServiceException, message="Failed to get the model type.")
 async def get_model(model_id: str, model_type: Model3dType) -> Model:
-    return await run_in_executor(persistent_storage.get_model, model_id, model_type)
+    return await aio_rest.call(
+        rest.Method.GET,
+        persistent_storage.model_url(model_id, model_type),
+        return_type=MODEL_MAPPING[model_type],
+    )
+
+
+@handle(ProjectServiceException, message="Failed to get the models.")
+async def get_models_bulk(models: Iterable[MetaModel3d]) -> List[Model]:
+    """Gets models in one request per model type."""
+
+    by_type: DefaultDict[Model3dType, List[str]] = defaultdict(list)
+
+    for meta in models:
+        by_type[meta.type].append(meta.id)
+
+    ret: List[Model] = []
+
+    for model_type, ids in by_type.items():
+        ret.extend(
+            await aio_rest.call(
+                rest.Method.POST,
+                persistent_storage.models_bulk_url(model_type),
+                list_return_type=MODEL_MAPPING[model_type],
+                body=ids,
+            )
+        )
+
+    return ret
 
 
+@handle(ProjectServiceException, message="Failed to add or update the model.")
 async def put_model(model: Model) -> None:
-    await run_in_executor(persistent_storage.put_model, model)
+    await aio_rest.call(rest.Method.PUT, persistent_storage.models_url(model.type()), body=model)
 
 
+@handle(ProjectServiceException, message="Failed to delete the model.")
 async def delete_model(model_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_model, model_id)
+    await aio_rest.call(rest.Method.DELETE, persistent_storage.model_url(model_id))
 
 
+@handle(ProjectServiceException, message="Failed to list projects.")
 async def get_projects() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_projects)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.projects_url(), return_type=IdDescList)
 
 
+@handle(ProjectServiceException, message="Failed to list scenes.")
 async def get_scenes() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_scenes)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.scenes_url(), return_type=IdDescList)
 
 
+@handle(ProjectServiceException, message="Failed to get the project.")
 async def get_project(project_id: str) -> Project:
-    return await run_in_executor(persistent_storage.get_project, project_id)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.project_url(project_id), return_type=Project)
 
 
+@handle(ProjectServiceException, message="Failed to get the project.")
+async def get_project_if_modified(
+    project_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[Project], rest.Validators]:
+    """Returns None instead of the project if it was not modified since the validators were obtained."""
+
+    return await aio_rest.get_if_modified(persistent_storage.project_url(project_id), Project, validators)
+
+
+@handle(ProjectServiceException, message="Failed to get the projects.")
+async def get_projects_bulk(project_ids: Iterable[str]) -> List[Project]:
+    """Gets projects (in the order of ids) in one request."""
+
+    ids = list(project_ids)
+
+    if not ids:
+        return []
+
+    return await aio_rest.call(
+        rest.Method.POST, persistent_storage.projects_bulk_url(), list_return_type=Project, body=ids
+    )
+
+
+@handle(ProjectServiceException, message="Failed to get the project sources.")
 async def get_project_sources(project_id: str) -> ProjectSources:
-    return await run_in_executor(persistent_storage.get_project_sources, project_id)
+    return await aio_rest.call(
+        rest.Method.GET, persistent_storage.project_sources_url(project_id), return_type=ProjectSources
+    )
 
 
+@handle(ProjectServiceException, message="Failed to get the scene.")
 async def get_scene(scene_id: str) -> Scene:
-    return await run_in_executor(persistent_storage.get_scene, scene_id)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.scene_url(scene_id), return_type=Scene)
+
+
+@handle(ProjectServiceException, message="Failed to get the scene.")
+async def get_scene_if_modified(
+    scene_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[Scene], rest.Validators]:
+    """Returns None instead of the scene if it was not modified since the validators were obtained."""
+
+    return await aio_rest.get_if_modified(persistent_storage.scene_url(scene_id), Scene, validators)
+
 
+@handle(ProjectServiceException, message="Failed to get the scenes.")
+async def get_scenes_bulk(scene_ids: Iterable[str]) -> List[Scene]:
+    """Gets scenes (in the order of ids) in one request."""
 
+    ids = list(scene_ids)
+
+    if not ids:
+        return []
+
+    return await aio_rest.call(rest.Method.POST, persistent_storage.scenes_bulk_url(), list_return_type=Scene, body=ids)
+
+
+@handle(ProjectServiceException, message="Failed to get the object type.")
 async def get_object_type(object_type_id: str) -> ObjectType:
-    return await run_in_executor(persistent_storage.get_object_type, object_type_id)
+    return await aio_rest.call(
+        rest.Method.GET, persistent_storage.object_types_url(object_type_id), return_type=ObjectType
+    )
+
+
+@handle(ProjectServiceException, message="Failed to get the object type.")
+async def get_object_type_if_modified(
+    object_type_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[ObjectType], rest.Validators]:
+    """Returns None instead of the object type if it was not modified since the validators were obtained."""
+
+    return await aio_rest.get_if_modified(persistent_storage.object_types_url(object_type_id), ObjectType, validators)
 
 
+@handle(ProjectServiceException, message="Failed to get the object types.")
+async def get_object_types_bulk(object_type_ids: Iterable[str]) -> List[ObjectType]:
+    """Gets object types (in the order of ids) in one request."""
+
+    ids = list(object_type_ids)
+
+    if not ids:
+        return []
+
+    return await aio_rest.call(
+        rest.Method.POST, persistent_storage.object_types_bulk_url(), list_return_type=ObjectType, body=ids
+    )
+
+
+@handle(ProjectServiceException, message="Failed to list object types.")
 async def get_object_type_ids() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_object_type_ids)
+    return await aio_rest.call(rest.Method.GET, persistent_storage.object_types_url(), return_type=IdDescList)
 
 
+@handle(ProjectServiceException, message="Failed to add or update the project.")
 async def update_project(project: Project) -> datetime:
-    return await run_in_executor(persistent_storage.update_project, project)
+
+    assert project.id
+    return datetime.fromisoformat(
+        await aio_rest.call(rest.Method.PUT, persistent_storage.project_url(), return_type=str, body=project)
+    )
 
 
+@handle(ProjectServiceException, message="Failed to add or update the scene.")
 async def update_scene(scene: Scene) -> datetime:
-    return await run_in_executor(persistent_storage.update_scene, scene)
 
+    assert scene.id
+    return datetime.fromisoformat(
+        await aio_rest.call(rest.Method.PUT, persistent_storage.scene_url(), return_type=str, body=scene)
+    )
 
+
+@handle(ProjectServiceException, message="Failed to patch the project.")
+async def patch_project(patch: ProjectPatch) -> datetime:
+
+    assert patch.project.modified
+    return datetime.fromisoformat(
+        await aio_rest.call(rest.Method.PATCH, persistent_storage.project_url(), return_type=str, body=patch)
+    )
+
+
+@handle(ProjectServiceException, message="Failed to patch the scene.")
+async def patch_scene(patch: ScenePatch) -> datetime:
+
+    assert patch.scene.modified
+    return datetime.fromisoformat(
+        await aio_rest.call(rest.Method.PATCH, persistent_storage.scene_url(), return_type=str, body=patch)
+    )
+
+
+@handle(ProjectServiceException, message="Failed to add or update the project sources.")
 async def update_project_sources(project_sources: ProjectSources) -> None:
-    await run_in_executor(persistent_storage.update_project_sources, project_sources)
+
+    assert project_sources.id
+    await aio_rest.call(rest.Method.PUT, persistent_storage.project_sources_url(), body=project_sources)
 
 
+@handle(ProjectServiceException, message="Failed to add or update the object type.")
 async def update_object_type(object_type: ObjectType) -> None:
-    await run_in_executor(persistent_storage.update_object_type, object_type)
+
+    assert object_type.id
+    await aio_rest.call(rest.Method.PUT, persistent_storage.object_type_url(), body=object_type)
 
 
+@handle(ProjectServiceException, message="Failed to delete the object type.")
 async def delete_object_type(object_type_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_object_type, object_type_id)
+    await aio_rest.call(rest.Method.DELETE, persistent_storage.object_type_url(object_type_id))
 
 
+@handle(ProjectServiceException, message="Failed to delete the scene.")
 async def delete_scene(scene_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_scene, scene_id)
+    await aio_rest.call(rest.Method.DELETE, persistent_storage.scene_url(scene_id))
 
 
+@handle(ProjectServiceException, message="Failed to delete the project.")
 async def delete_project(project_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_project, project_id)
+    await aio_rest.call(rest.Method.DELETE, persistent_storage.project_url(project_id))
 
 
+@handle(ProjectServiceException, message="Failed to get the mesh.")
 async def save_mesh_file(mesh_id: str, path: str) -> None:
     """Saves mesh file to a given path."""
 
-    await run_in_executor(persistent_storage.save_mesh_file, mesh_id, path)
+    await aio_rest.download(persistent_storage.mesh_file_url(mesh_id), path)
+
+
+@handle(ProjectServiceException, message="Failed to upload the mesh.")
+async def upload_mesh_file(mesh_id: str, file_content: bytes) -> None:
+    """Upload a mesh file."""
+
+    await aio_rest.call(rest.Method.PUT, persistent_storage.mesh_file_url(mesh_id), files={"file": file_content})
@@ -1,40 +1,75 @@
 import asyncio
-from typing import Set
+from typing import Optional, Set
 
+from arcor2 import aio_rest, rest
 from arcor2.clients import scene_service
-from arcor2.clients.scene_service import SceneServiceException
+from arcor2.clients.scene_service import MeshParameters, SceneServiceException
 from arcor2.data.common import Pose
-from arcor2.data.object_type import Models
+from arcor2.data.object_type import Model3dType, Models
 from arcor2.data.scene import MeshFocusAction
-from arcor2.helpers import run_in_executor
+from arcor2.exceptions.helpers import handle
 
+"""
+Asynchronous version of the scene_service module.
+Endpoints are shared with scene_service (its URL is read in the time of a call).
+"""
 
-async def upsert_collision(model: Models, pose: Pose) -> None:
-    await run_in_executor(scene_service.upsert_collision, model, pose)
 
+@handle(SceneServiceException, message="Failed to add or update the collision model.")
+async def upsert_collision(model: Models, pose: Pose, mesh_parameters: Optional[MeshParameters] = None) -> None:
+    """Adds arbitrary collision model to the collision scene.
 
+    :param model: Box, Sphere, Cylinder, Mesh
+    :param pose: Pose of the collision object.
+    :param mesh_parameters: Some additional parameters might be specified for mesh collision model.
+    :return:
+    """
+
+    model_id = model.id
+    params = model.to_dict()
+    del params["id"]
+    params[model.__class__.__name__.lower() + "Id"] = model_id
+
+    if model.type() == Model3dType.MESH and mesh_parameters:
+        params.update(mesh_parameters.to_dict())
+
+    await aio_rest.call(rest.Method.PUT, scene_service.collision_url(model.type()), body=pose, params=params)
+
+
+@handle(SceneServiceException, message="Failed to delete the collision.")
 async def delete_collision_id(collision_id: str) -> None:
-    await run_in_executor(scene_service.delete_collision_id, collision_id)
+    await aio_rest.call(rest.Method.DELETE, scene_service.collisions_url(collision_id))
 
 
+@handle(SceneServiceException, message="Failed to list collisions.")
 async def collision_ids() -> Set[str]:
-    return await run_in_executor(scene_service.collision_ids)
+    return set(await aio_rest.call(rest.Method.GET, scene_service.collisions_url(), list_return_type=str))
 
 
+@handle(SceneServiceException, message="Failed to focus the object.")
 async def focus(mfa: MeshFocusAction) -> Pose:
-    return await run_in_executor(scene_service.focus, mfa)
+    return await aio_rest.call(rest.Method.PUT, scene_service.focus_url(), body=mfa, return_type=Pose)
 
 
+@handle(SceneServiceException, message="Failed to start the scene.")
 async def start() -> None:
-    await run_in_executor(scene_service.start)
+    """To be called after all objects are created."""
+
+    await aio_rest.call(rest.Method.PUT, scene_service.system_url("start"))
 
 
+@handle(SceneServiceException, message="Failed to stop the scene.")
 async def stop() -> None:
-    await run_in_executor(scene_service.stop)
+    """To be called when project is closed or when main script ends."""
 
+    await aio_rest.call(rest.Method.PUT, scene_service.system_url("stop"))
 
+
+@handle(SceneServiceException, message="Failed to get scene state.")
 async def started() -> bool:
-    return await run_in_executor(scene_service.started)
+    """Checks whether the scene is running."""
+
+    return await aio_rest.call(rest.Method.GET, scene_service.system_url("running"), return_type=bool)
 
 
 async def delete_all_collisions() -> None:
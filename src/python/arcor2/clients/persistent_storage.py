@@ -1,135 +1,340 @@
 import os
+from collections import defaultdict
 from datetime import datetime
+from typing import DefaultDict, Dict, Iterable, List, Optional, Tuple, Union
 
 from arcor2 import rest
 from arcor2.data.common import IdDescList, Project, ProjectSources, Scene
-from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, Model, Model3dType, ObjectType
+from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, MetaModel3d, Model, Model3dType, ObjectType
+from arcor2.data.storage import Changes, ProjectPatch, ScenePatch
 from arcor2.exceptions import Arcor2Exception
 from arcor2.exceptions.helpers import handle
 
 URL = os.getenv("ARCOR2_PERSISTENT_STORAGE_URL", "http://0.0.0.0:11000")
 
-# TODO thread to poll changes? how to "detect" changes?
-
 
 class ProjectServiceException(Arcor2Exception):
     pass
 
 
+# Endpoints are shared with the aio_persistent_storage module (URL is read in the time of a call).
+
+
+def changes_url() -> str:
+    return f"{URL}/changes"
+
+
+def meshes_url() -> str:
+    return f"{URL}/models/meshes"
+
+
+def mesh_url(mesh_id: str) -> str:
+    return f"{URL}/models/{mesh_id}/mesh"
+
+
+def mesh_file_url(mesh_id: str) -> str:
+    return f"{mesh_url(mesh_id)}/file"
+
+
+def model_url(model_id: str, model_type: Optional[Model3dType] = None) -> str:
+
+    if model_type is None:
+        return f"{URL}/models/{model_id}"
+    return f"{URL}/models/{model_id}/{model_type.value.lower()}"
+
+
+def models_url(model_type: Model3dType) -> str:
+    return f"{URL}/models/{model_type.value.lower()}"
+
+
+def models_bulk_url(model_type: Model3dType) -> str:
+    return f"{models_url(model_type)}/bulk"
+
+
+def projects_url() -> str:
+    return f"{URL}/projects"
+
+
+def projects_bulk_url() -> str:
+    return f"{projects_url()}/bulk"
+
+
+def project_url(project_id: Optional[str] = None) -> str:
+    return f"{URL}/project" if project_id is None else f"{URL}/project/{project_id}"
+
+
+def project_sources_url(project_id: Optional[str] = None) -> str:
+    return f"{URL}/sources" if project_id is None else f"{project_url(project_id)}/sources"
+
+
+def scenes_url() -> str:
+    return f"{URL}/scenes"
+
+
+def scenes_bulk_url() -> str:
+    return f"{scenes_url()}/bulk"
+
+
+def scene_url(scene_id: Optional[str] = None) -> str:
+    return f"{URL}/scene" if scene_id is None else f"{URL}/scene/{scene_id}"
+
+
+def object_types_url(object_type_id: Optional[str] = None) -> str:
+    return f"{URL}/object_types" if object_type_id is None else f"{URL}/object_types/{object_type_id}"
+
+
+def object_types_bulk_url() -> str:
+    return f"{object_types_url()}/bulk"
+
+
+def object_type_url(object_type_id: Optional[str] = None) -> str:
+    return f"{URL}/object_type" if object_type_id is None else f"{URL}/object_type/{object_type_id}"
+
+
+@handle(ProjectServiceException, message="Failed to get changes.")
+def get_changes(since: Optional[int] = None, timeout: float = 10.0) -> Changes:
+    """Waits for changes of projects, scenes or object types (long-poll).
+
+    :param since: Last known revision. If not set, the current revision is returned immediately.
+    :param timeout: Maximal time to wait for a change.
+    :return: Changes newer than since (might be empty).
+    """
+
+    params: Dict[str, Union[int, float]] = {"timeout": timeout}
+
+    if since is not None:
+        params["since"] = since
+
+    return rest.call(
+        rest.Method.GET,
+        changes_url(),
+        return_type=Changes,
+        params=params,
+        timeout=rest.Timeout(read=timeout + rest.Timeout().read),
+    )
+
+
 @handle(ProjectServiceException, message="Failed to get the mesh.")
 def get_mesh(mesh_id: str) -> Mesh:
-    return rest.call(rest.Method.GET, f"{URL}/models/{mesh_id}/mesh", return_type=Mesh)
+    return rest.call(rest.Method.GET, mesh_url(mesh_id), return_type=Mesh)
 
 
 @handle(ProjectServiceException, message="Failed to get list of meshes.")
 def get_meshes() -> MeshList:
-    return rest.call(rest.Method.GET, f"{URL}/models/meshes", list_return_type=Mesh)
+    return rest.call(rest.Method.GET, meshes_url(), list_return_type=Mesh)
 
 
 @handle(ProjectServiceException, message="Failed to get the model type.")
 def get_model(model_id: str, model_type: Model3dType) -> Model:
-    return rest.call(
-        rest.Method.GET, f"{URL}/models/{model_id}/{model_type.value.lower()}", return_type=MODEL_MAPPING[model_type]
-    )
+    return rest.call(rest.Method.GET, model_url(model_id, model_type), return_type=MODEL_MAPPING[model_type])
+
+
+@handle(ProjectServiceException, message="Failed to get the models.")
+def get_models_bulk(models: Iterable[MetaModel3d]) -> List[Model]:
+    """Gets models in one request per model type."""
+
+    by_type: DefaultDict[Model3dType, List[str]] = defaultdict(list)
+
+    for meta in models:
+        by_type[meta.type].append(meta.id)
+
+    ret: List[Model] = []
+
+    for model_type, ids in by_type.items():
+        ret.extend(
+            rest.call(
+                rest.Method.POST,
+                models_bulk_url(model_type),
+                list_return_type=MODEL_MAPPING[model_type],
+                body=ids,
+            )
+        )
+
+    return ret
 
 
 @handle(ProjectServiceException, message="Failed to add or update the model.")
 def put_model(model: Model) -> None:
-    rest.call(rest.Method.PUT, f"{URL}/models/{model.__class__.__name__.lower()}", body=model)
+    rest.call(rest.Method.PUT, models_url(model.type()), body=model)
 
 
 @handle(ProjectServiceException, message="Failed to delete the model.")
 def delete_model(model_id: str) -> None:
-    rest.call(rest.Method.DELETE, f"{URL}/models/{model_id}")
+    rest.call(rest.Method.DELETE, model_url(model_id))
 
 
 @handle(ProjectServiceException, message="Failed to list projects.")
 def get_projects() -> IdDescList:
-    return rest.call(rest.Method.GET, f"{URL}/projects", return_type=IdDescList)
+    return rest.call(rest.Method.GET, projects_url(), return_type=IdDescList)
 
 
 @handle(ProjectServiceException, message="Failed to list scenes.")
 def get_scenes() -> IdDescList:
-    return rest.call(rest.Method.GET, f"{URL}/scenes", return_type=IdDescList)
+    return rest.call(rest.Method.GET, scenes_url(), return_type=IdDescList)
 
 
 @handle(ProjectServiceException, message="Failed to get the project.")
 def get_project(project_id: str) -> Project:
-    return rest.call(rest.Method.GET, f"{URL}/project/{project_id}", return_type=Project)
+    return rest.call(rest.Method.GET, project_url(project_id), return_type=Project)
+
+
+@handle(ProjectServiceException, message="Failed to get the project.")
+def get_project_if_modified(
+    project_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[Project], rest.Validators]:
+    """Returns None instead of the project if it was not modified since the validators were obtained."""
+
+    return rest.get_if_modified(project_url(project_id), Project, validators)
+
+
+@handle(ProjectServiceException, message="Failed to get the projects.")
+def get_projects_bulk(project_ids: Iterable[str]) -> List[Project]:
+    """Gets projects (in the order of ids) in one request."""
+
+    ids = list(project_ids)
+
+    if not ids:
+        return []
+
+    return rest.call(rest.Method.POST, projects_bulk_url(), list_return_type=Project, body=ids)
 
 
 @handle(ProjectServiceException, message="Failed to get the project sources.")
 def get_project_sources(project_id: str) -> ProjectSources:
-    return rest.call(rest.Method.GET, f"{URL}/project/{project_id}/sources", return_type=ProjectSources)
+    return rest.call(rest.Method.GET, project_sources_url(project_id), return_type=ProjectSources)
 
 
 @handle(ProjectServiceException, message="Failed to get the scene.")
 def get_scene(scene_id: str) -> Scene:
-    return rest.call(rest.Method.GET, f"{URL}/scene/{scene_id}", return_type=Scene)
+    return rest.call(rest.Method.GET, scene_url(scene_id), return_type=Scene)
+
+
+@handle(ProjectServiceException, message="Failed to get the scene.")
+def get_scene_if_modified(
+    scene_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[Scene], rest.Validators]:
+    """Returns None instead of the scene if it was not modified since the validators were obtained."""
+
+    return rest.get_if_modified(scene_url(scene_id), Scene, validators)
+
+
+@handle(ProjectServiceException, message="Failed to get the scenes.")
+def get_scenes_bulk(scene_ids: Iterable[str]) -> List[Scene]:
+    """Gets scenes (in the order of ids) in one request."""
+
+    ids = list(scene_ids)
+
+    if not ids:
+        return []
+
+    return rest.call(rest.Method.POST, scenes_bulk_url(), list_return_type=Scene, body=ids)
 
 
 @handle(ProjectServiceException, message="Failed to get the object type.")
 def get_object_type(object_type_id: str) -> ObjectType:
-    return rest.call(rest.Method.GET, f"{URL}/object_types/{object_type_id}", return_type=ObjectType)
+    return rest.call(rest.Method.GET, object_types_url(object_type_id), return_type=ObjectType)
+
+
+@handle(ProjectServiceException, message="Failed to get the object type.")
+def get_object_type_if_modified(
+    object_type_id: str, validators: Optional[rest.Validators] = None
+) -> Tuple[Optional[ObjectType], rest.Validators]:
+    """Returns None instead of the object type if it was not modified since the validators were obtained."""
+
+    return rest.get_if_modified(object_types_url(object_type_id), ObjectType, validators)
+
+
+@handle(ProjectServiceException, message="Failed to get the object types.")
+def get_object_types_bulk(object_type_ids: Iterable[str]) -> List[ObjectType]:
+    """Gets object types (in the order of ids) in one request."""
+
+    ids = list(object_type_ids)
+
+    if not ids:
+        return []
+
+    return rest.call(rest.Method.POST, object_types_bulk_url(), list_return_type=ObjectType, body=ids)
 
 
 @handle(ProjectServiceException, message="Failed to list object types.")
 def get_object_type_ids() -> IdDescList:
-    return rest.call(rest.Method.GET, f"{URL}/object_types", return_type=IdDescList)
+    return rest.call(rest.Method.GET, object_types_url(), return_type=IdDescList)
 
 
 @handle(ProjectServiceException, message="Failed to add or update the project.")
 def update_project(project: Project) -> datetime:
 
     assert project.id
-    return datetime.fromisoformat(rest.call(rest.Method.PUT, f"{URL}/project", return_type=str, body=project))
+    return datetime.fromisoformat(rest.call(rest.Method.PUT, project_url(), return_type=str, body=project))
 
 
 @handle(ProjectServiceException, message="Failed to add or update the scene.")
 def update_scene(scene: Scene) -> datetime:
 
     assert scene.id
-    return datetime.fromisoformat(rest.call(rest.Method.PUT, f"{URL}/scene", return_type=str, body=scene))
+    return datetime.fromisoformat(rest.call(rest.Method.PUT, scene_url(), return_type=str, body=scene))
+
+
+@handle(ProjectServiceException, message="Failed to patch the project.")
+def patch_project(patch: ProjectPatch) -> datetime:
+    """Applies changes to the stored project.
+
+    Fails if the project was modified meanwhile (its modified does not match).
+    """
+
+    assert patch.project.modified
+    return datetime.fromisoformat(rest.call(rest.Method.PATCH, project_url(), return_type=str, body=patch))
+
+
+@handle(ProjectServiceException, message="Failed to patch the scene.")
+def patch_scene(patch: ScenePatch) -> datetime:
+    """Applies changes to the stored scene.
+
+    Fails if the scene was modified meanwhile (its modified does not match).
+    """
+
+    assert patch.scene.modified
+    return datetime.fromisoformat(rest.call(rest.Method.PATCH, scene_url(), return_type=str, body=patch))
 
 
 @handle(ProjectServiceException, message="Failed to add or update the project sources.")
 def update_project_sources(project_sources: ProjectSources) -> None:
 
     assert project_sources.id
-    rest.call(rest.Method.PUT, f"{URL}/sources", body=project_sources)
+    rest.call(rest.Method.PUT, project_sources_url(), body=project_sources)
 
 
 @handle(ProjectServiceException, message="Failed to add or update the object type.")
 def update_object_type(object_type: ObjectType) -> None:
 
     assert object_type.id
-    rest.call(rest.Method.PUT, f"{URL}/object_type", body=object_type)
+    rest.call(rest.Method.PUT, object_type_url(), body=object_type)
 
 
 @handle(ProjectServiceException, message="Failed to delete the object type.")
 def delete_object_type(object_type_id: str) -> None:
-    rest.call(rest.Method.DELETE, f"{URL}/object_type/{object_type_id}")
+    rest.call(rest.Method.DELETE, object_type_url(object_type_id))
 
 
 @handle(ProjectServiceException, message="Failed to delete the scene.")
 def delete_scene(scene_id: str) -> None:
-    rest.call(rest.Method.DELETE, f"{URL}/scene/{scene_id}")
+    rest.call(rest.Method.DELETE, scene_url(scene_id))
 
 
 @handle(ProjectServiceException, message="Failed to delete the project.")
 def delete_project(project_id: str) -> None:
-    rest.call(rest.Method.DELETE, f"{URL}/project/{project_id}")
+    rest.call(rest.Method.DELETE, project_url(project_id))
 
 
 @handle(ProjectServiceException, message="Failed to get the mesh.")
 def save_mesh_file(mesh_id: str, path: str) -> None:
     """Saves mesh file to a given path."""
 
-    rest.download(f"{URL}/models/{mesh_id}/mesh/file", path)
+    rest.download(mesh_file_url(mesh_id), path)
 
 
 @handle(ProjectServiceException, message="Failed to upload the mesh.")
 def upload_mesh_file(mesh_id: str, file_content: bytes) -> None:
     """Upload a mesh file."""
 
-    rest.call(rest.Method.PUT, f"{URL}/models/{mesh_id}/mesh/file", files={"file": file_content})
+    rest.call(rest.Method.PUT, mesh_file_url(mesh_id), files={"file": file_content})
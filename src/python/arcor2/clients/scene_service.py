@@ -19,6 +19,31 @@ class SceneServiceException(Arcor2Exception):
     pass
 
 
+# Endpoints are shared with the aio_scene_service module (URL is read in the time of a call).
+
+
+def collisions_url(collision_id: Optional[str] = None) -> str:
+    return f"{URL}/collisions" if collision_id is None else f"{URL}/collisions/{collision_id}"
+
+
+def collision_url(model_type: Model3dType) -> str:
+    return collisions_url(model_type.value.lower())
+
+
+def focus_url() -> str:
+    return f"{URL}/utils/focus"
+
+
+def system_url(command: str) -> str:
+    """E.g. system_url("start")."""
+
+    return f"{URL}/system/{command}"
+
+
+def transforms_url(*path: str) -> str:
+    return "/".join((f"{URL}/transforms", *path))
+
+
 @dataclass
 class MeshParameters(JsonSchemaMixin):
 
@@ -66,22 +91,22 @@ def upsert_collision(model: Models, pose: Pose, mesh_parameters: Optional[MeshPa
     if model.type() == Model3dType.MESH and mesh_parameters:
         params.update(mesh_parameters.to_dict())
 
-    rest.call(rest.Method.PUT, f"{URL}/collisions/{model.type().value.lower()}", body=pose, params=params)
+    rest.call(rest.Method.PUT, collision_url(model.type()), body=pose, params=params)
 
 
 @handle(SceneServiceException, message="Failed to delete the collision.")
 def delete_collision_id(collision_id: str) -> None:
-    rest.call(rest.Method.DELETE, f"{URL}/collisions/{collision_id}")
+    rest.call(rest.Method.DELETE, collisions_url(collision_id))
 
 
 @handle(SceneServiceException, message="Failed to list collisions.")
 def collision_ids() -> Set[str]:
-    return set(rest.call(rest.Method.GET, f"{URL}/collisions", list_return_type=str))
+    return set(rest.call(rest.Method.GET, collisions_url(), list_return_type=str))
 
 
 @handle(SceneServiceException, message="Failed to focus the object.")
 def focus(mfa: MeshFocusAction) -> Pose:
-    return rest.call(rest.Method.PUT, f"{URL}/utils/focus", body=mfa, return_type=Pose)
+    return rest.call(rest.Method.PUT, focus_url(), body=mfa, return_type=Pose)
 
 
 def delete_all_collisions() -> None:
@@ -94,49 +119,49 @@ def delete_all_collisions() -> None:
 def start() -> None:
     """To be called after all objects are created."""
 
-    rest.call(rest.Method.PUT, f"{URL}/system/start")
+    rest.call(rest.Method.PUT, system_url("start"))
 
 
 @handle(SceneServiceException, message="Failed to stop the scene.")
 def stop() -> None:
     """To be called when project is closed or when main script ends."""
 
-    rest.call(rest.Method.PUT, f"{URL}/system/stop")
+    rest.call(rest.Method.PUT, system_url("stop"))
 
 
 @handle(SceneServiceException, message="Failed to get scene state.")
 def started() -> bool:
     """Checks whether the scene is running."""
 
-    return rest.call(rest.Method.GET, f"{URL}/system/running", return_type=bool)
+    return rest.call(rest.Method.GET, system_url("running"), return_type=bool)
 
 
 @handle(SceneServiceException, message="Failed to get transforms.")
 def transforms() -> Set[str]:
     """Gets available transformations."""
 
-    return set(rest.call(rest.Method.GET, f"{URL}/transforms", list_return_type=str))
+    return set(rest.call(rest.Method.GET, transforms_url(), list_return_type=str))
 
 
 @handle(SceneServiceException, message="Failed to add or update the transform.")
 def upsert_transform(transform_id: str, parent: str, pose: Pose) -> None:
     """Add or updates transform."""
 
-    rest.call(rest.Method.PUT, f"{URL}/transforms", body=pose, params={"transformId": transform_id, "parent": parent})
+    rest.call(rest.Method.PUT, transforms_url(), body=pose, params={"transformId": transform_id, "parent": parent})
 
 
 @handle(SceneServiceException, message="Failed to get the local pose.")
 def local_pose(transform_id: str) -> Pose:
     """Gets relative pose to parent."""
 
-    return rest.call(rest.Method.GET, f"{URL}/transforms/{transform_id}/localPose", return_type=Pose)
+    return rest.call(rest.Method.GET, transforms_url(transform_id, "localPose"), return_type=Pose)
 
 
 @handle(SceneServiceException, message="Failed to get the world pose.")
 def world_pose(transform_id: str) -> Pose:
     """Gets absolute pose in world space."""
 
-    return rest.call(rest.Method.GET, f"{URL}/transforms/{transform_id}/worldPose", return_type=Pose)
+    return rest.call(rest.Method.GET, transforms_url(transform_id, "worldPose"), return_type=Pose)
 
 
 __all__ = [
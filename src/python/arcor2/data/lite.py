@@ -0,0 +1,160 @@
+import math
+from typing import List, NamedTuple
+
+from arcor2.data.common import Joint, Orientation, Pose, Position
+from arcor2.exceptions import Arcor2Exception
+
+"""
+Lightweight (tuple-based, without per-instance dicts) counterparts of Position, Orientation, Pose and Joint for hot
+paths, e.g. transformations, telemetry or kinematics.
+
+Unlike Orientation, LiteOrientation is not normalized when created. Math is done in pure Python, which is (for single
+values) much cheaper than going through numpy-quaternion. Conversions to the schema dataclasses skip the
+normalization in Orientation.__post_init__, so they are cheap as well.
+"""
+
+
+class LitePosition(NamedTuple):
+
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+
+    @staticmethod
+    def from_position(position: Position) -> "LitePosition":
+        return LitePosition(position.x, position.y, position.z)
+
+    def to_position(self) -> Position:
+        return Position(self.x, self.y, self.z)
+
+    def __add__(self, other: "LitePosition") -> "LitePosition":  # type: ignore[override]
+        return LitePosition(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other: "LitePosition") -> "LitePosition":
+        return LitePosition(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def rotated(self, rot: "LiteOrientation") -> "LitePosition":
+        """Rotates the vector by quaternion (using rotation matrix, as
+        quaternion.rotate_vectors does)."""
+
+        x, y, z, w = rot
+        n = x * x + y * y + z * z + w * w
+
+        return LitePosition(
+            (1 - 2 * (y * y + z * z) / n) * self.x
+            + 2 * (x * y - z * w) / n * self.y
+            + 2 * (x * z + y * w) / n * self.z,
+            2 * (x * y + z * w) / n * self.x
+            + (1 - 2 * (x * x + z * z) / n) * self.y
+            + 2 * (y * z - x * w) / n * self.z,
+            2 * (x * z - y * w) / n * self.x
+            + 2 * (y * z + x * w) / n * self.y
+            + (1 - 2 * (x * x + y * y) / n) * self.z,
+        )
+
+
+class LiteOrientation(NamedTuple):
+
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+    w: float = 1.0
+
+    @staticmethod
+    def from_orientation(orientation: Orientation) -> "LiteOrientation":
+        return LiteOrientation(orientation.x, orientation.y, orientation.z, orientation.w)
+
+    def to_orientation(self) -> Orientation:
+        """Converts normalized quaternion into Orientation (without the
+        normalization done by its constructor)."""
+
+        ori = Orientation.__new__(Orientation)
+        ori.x, ori.y, ori.z, ori.w = self
+        return ori
+
+    def normalized(self) -> "LiteOrientation":
+
+        norm = math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z + self.w * self.w)
+
+        if not norm or math.isnan(norm):
+            raise Arcor2Exception("Invalid quaternion.")
+
+        return LiteOrientation(self.x / norm, self.y / norm, self.z / norm, self.w / norm)
+
+    def conjugate(self) -> "LiteOrientation":
+        return LiteOrientation(-self.x, -self.y, -self.z, self.w)
+
+    def __mul__(self, other: "LiteOrientation") -> "LiteOrientation":  # type: ignore[override]
+        """Hamilton product."""
+
+        return LiteOrientation(
+            self.w * other.x + self.x * other.w + self.y * other.z - self.z * other.y,
+            self.w * other.y - self.x * other.z + self.y * other.w + self.z * other.x,
+            self.w * other.z + self.x * other.y - self.y * other.x + self.z * other.w,
+            self.w * other.w - self.x * other.x - self.y * other.y - self.z * other.z,
+        )
+
+    @staticmethod
+    def from_euler_angles(alpha: float, beta: float, gamma: float) -> "LiteOrientation":
+        """Same (z-y-z) convention as quaternion.from_euler_angles."""
+
+        za = LiteOrientation(0.0, 0.0, math.sin(alpha / 2), math.cos(alpha / 2))
+        yb = LiteOrientation(0.0, math.sin(beta / 2), 0.0, math.cos(beta / 2))
+        zg = LiteOrientation(0.0, 0.0, math.sin(gamma / 2), math.cos(gamma / 2))
+        return za * yb * zg
+
+    def yaw(self) -> float:
+        """The last (gamma) angle of quaternion.as_euler_angles."""
+        return math.atan2(self.z, self.w) - math.atan2(-self.x, self.y)
+
+
+class LitePose(NamedTuple):
+
+    position: LitePosition = LitePosition()
+    orientation: LiteOrientation = LiteOrientation()
+
+    @staticmethod
+    def from_pose(pose: Pose) -> "LitePose":
+        return LitePose(LitePosition.from_position(pose.position), LiteOrientation.from_orientation(pose.orientation))
+
+    def to_pose(self) -> Pose:
+        return Pose(self.position.to_position(), self.orientation.to_orientation())
+
+
+class LiteJoint(NamedTuple):
+
+    name: str
+    value: float
+
+    @staticmethod
+    def from_joint(joint: Joint) -> "LiteJoint":
+        return LiteJoint(joint.name, joint.value)
+
+    def to_joint(self) -> Joint:
+        return Joint(self.name, self.value)
+
+
+def to_joints(joints: List[LiteJoint]) -> List[Joint]:
+    return [Joint(name, value) for name, value in joints]
+
+
+def make_pose_abs(parent: LitePose, child: LitePose) -> LitePose:
+    """Same as transformations.make_pose_abs."""
+
+    parent_ori = parent.orientation.normalized()
+
+    return LitePose(
+        parent.position + child.position.rotated(parent_ori),
+        (child.orientation.normalized() * parent_ori).normalized(),
+    )
+
+
+def make_pose_rel(parent: LitePose, child: LitePose) -> LitePose:
+    """Same as transformations.make_pose_rel."""
+
+    inverse = parent.orientation.normalized().conjugate()
+
+    return LitePose(
+        (child.position - parent.position).rotated(inverse),
+        (child.orientation.normalized() * inverse).normalized(),
+    )
@@ -1,4 +1,9 @@
-from arcor2.data.common import StrEnum
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2.data.common import Joint, Pose, StrEnum
 
 
 class RobotType(StrEnum):
@@ -6,3 +11,39 @@ class RobotType(StrEnum):
     ARTICULATED = "articulated"  # typically a 6 DoF robot
     CARTESIAN = "cartesian"
     SCARA = "scara"  # ...or scara-like
+
+
+@dataclass
+class RobotState(JsonSchemaMixin):
+    """Joints and poses of end effectors, obtained at once.
+
+    :param joints:
+    :param end_effectors: Poses of end effectors (by their IDs).
+    """
+
+    joints: List[Joint]
+    end_effectors: Dict[str, Pose] = field(default_factory=dict)
+
+
+@dataclass
+class InverseKinematicsResult(JsonSchemaMixin):
+    """IK result for one pose of a batch.
+
+    :param joints: None if IK failed.
+    :param error: Why IK failed.
+    """
+
+    joints: Optional[List[Joint]] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ForwardKinematicsResult(JsonSchemaMixin):
+    """FK result for one set of joints of a batch.
+
+    :param pose: None if FK failed.
+    :param error: Why FK failed.
+    """
+
+    pose: Optional[Pose] = None
+    error: Optional[str] = None
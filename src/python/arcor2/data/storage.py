@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2.data.common import ActionPoint, LogicItem, Project, Scene, SceneObject, StrEnum
+
+"""
+Change feed and partial updates (patches) of the Project service.
+"""
+
+
+@dataclass
+class Change(JsonSchemaMixin):
+    """Something was added, updated or removed."""
+
+    class Kind(StrEnum):
+        PROJECT: str = "project"
+        SCENE: str = "scene"
+        OBJECT_TYPE: str = "object_type"
+
+    class Type(StrEnum):
+        ADD: str = "add"
+        UPDATE: str = "update"
+        REMOVE: str = "remove"
+
+    revision: int
+    kind: Kind
+    type: Type
+    id: str
+
+
+@dataclass
+class Changes(JsonSchemaMixin):
+    """Changes newer than the requested revision.
+
+    :param revision: Current revision (to be used for the next request).
+    :param changes: Changes ordered by revision.
+    :param reset: When set, the requested revision is too old (not available anymore) and all cached data should
+    be considered invalid.
+    """
+
+    revision: int
+    changes: List[Change] = field(default_factory=list)
+    reset: bool = False
+
+
+@dataclass
+class ProjectPatch(JsonSchemaMixin):
+    """Changes of a stored project.
+
+    :param project: Project without action points and logic. Its attributes, constants, functions and overrides
+    replace the stored ones. It has to have the same `modified` as the stored project (the version the changes were
+    made to).
+    :param action_points: Added or updated action points (including all their actions, orientations and joints).
+    :param removed_action_points:
+    :param logic: Added or updated logic items.
+    :param removed_logic:
+    """
+
+    project: Project
+    action_points: List[ActionPoint] = field(default_factory=list)
+    removed_action_points: List[str] = field(default_factory=list)
+    logic: List[LogicItem] = field(default_factory=list)
+    removed_logic: List[str] = field(default_factory=list)
+
+    def apply(self, project: Project) -> None:
+        """Applies changes to the project.
+
+        Lists of the project are replaced, not modified.
+        """
+
+        action_points: Dict[str, ActionPoint] = {ap.id: ap for ap in project.action_points}
+        for ap_id in self.removed_action_points:
+            action_points.pop(ap_id, None)
+        for ap in self.action_points:
+            action_points[ap.id] = ap
+
+        logic: Dict[str, LogicItem] = {item.id: item for item in project.logic}
+        for item_id in self.removed_logic:
+            logic.pop(item_id, None)
+        for item in self.logic:
+            logic[item.id] = item
+
+        project.name = self.project.name
+        project.desc = self.project.desc
+        project.has_logic = self.project.has_logic
+        project.action_points = list(action_points.values())
+        project.logic = list(logic.values())
+        project.constants = list(self.project.constants)
+        project.functions = list(self.project.functions)
+        project.object_overrides = list(self.project.object_overrides)
+
+
+@dataclass
+class ScenePatch(JsonSchemaMixin):
+    """Changes of a stored scene.
+
+    :param scene: Scene without objects. Its attributes replace the stored ones. It has to have the same `modified`
+    as the stored scene (the version the changes were made to).
+    :param objects: Added or updated objects.
+    :param removed_objects:
+    """
+
+    scene: Scene
+    objects: List[SceneObject] = field(default_factory=list)
+    removed_objects: List[str] = field(default_factory=list)
+
+    def apply(self, scene: Scene) -> None:
+        """Applies changes to the scene.
+
+        List of objects is replaced, not modified.
+        """
+
+        objects: Dict[str, SceneObject] = {obj.id: obj for obj in scene.objects}
+        for obj_id in self.removed_objects:
+            objects.pop(obj_id, None)
+        for obj in self.objects:
+            objects[obj.id] = obj
+
+        scene.name = self.scene.name
+        scene.desc = self.scene.desc
+        scene.objects = list(objects.values())
@@ -0,0 +1,61 @@
+import math
+import random
+
+import quaternion
+
+from arcor2.data.common import Joint, Orientation, Pose, Position
+from arcor2.data.lite import LiteJoint, LiteOrientation, LitePose, LitePosition, make_pose_abs, make_pose_rel
+
+
+def _random_pose(rnd: random.Random) -> Pose:
+    return Pose(Position(*(rnd.uniform(-1, 1) for _ in range(3))), Orientation(*(rnd.uniform(-1, 1) for _ in range(4))))
+
+
+def _abs_via_quaternion(parent: Pose, child: Pose) -> Pose:
+
+    position = child.position.rotated(parent.orientation)
+    orientation = Orientation()
+    orientation.set_from_quaternion(child.orientation.as_quaternion() * parent.orientation.as_quaternion())
+    return Pose(Position(*(a + b for a, b in zip(parent.position, position))), orientation)
+
+
+def test_conversions() -> None:
+
+    pose = Pose(Position(1, 2, 3), Orientation(0, 0, 1, 1))
+    lite_pose = LitePose.from_pose(pose)
+
+    assert lite_pose == LitePose(LitePosition(1, 2, 3), LiteOrientation(0, 0, pose.orientation.z, pose.orientation.w))
+    assert lite_pose.to_pose() == pose
+    assert LiteJoint.from_joint(Joint("j1", 1.0)).to_joint() == Joint("j1", 1.0)
+
+
+def test_make_pose_abs_rel() -> None:
+
+    rnd = random.Random(42)
+
+    for _ in range(100):
+
+        parent, child = _random_pose(rnd), _random_pose(rnd)
+        lite_parent, lite_child = LitePose.from_pose(parent), LitePose.from_pose(child)
+
+        abs_pose = make_pose_abs(lite_parent, lite_child).to_pose()
+        assert abs_pose == _abs_via_quaternion(parent, child)
+
+        rel = make_pose_rel(lite_parent, make_pose_abs(lite_parent, lite_child)).to_pose()
+        assert rel == child
+
+
+def test_euler_angles() -> None:
+
+    rnd = random.Random(42)
+
+    for _ in range(100):
+
+        angles = [rnd.uniform(-math.pi, math.pi) for _ in range(3)]
+        q = quaternion.from_euler_angles(*angles)
+        ori = LiteOrientation.from_euler_angles(*angles)
+
+        assert quaternion.isclose(q, quaternion.quaternion(ori.w, ori.x, ori.y, ori.z))[0]
+
+        diff = (quaternion.as_euler_angles(q)[2] - ori.yaw()) % (2 * math.pi)
+        assert min(diff, 2 * math.pi - diff) < 1e-9
@@ -1,3 +1,4 @@
+import asyncio
 import functools
 from typing import Any, Callable, Optional, Type, TypeVar, cast
 
@@ -11,17 +12,36 @@ def handle(
     except_type: Type[Arcor2Exception] = Arcor2Exception,
     message: Optional[str] = None,
 ) -> Callable[[F], F]:
+    """Turns exception of except_type into raise_type (works also for
+    coroutine functions)."""
+
     def _handle_exceptions(func: F) -> F:
+        def _reraise(e: Arcor2Exception) -> None:
+
+            if message is not None:
+                raise raise_type(message) from e
+            else:
+                raise raise_type(str(e)) from e
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+
+                try:
+                    return await func(*args, **kwargs)
+                except except_type as e:
+                    _reraise(e)
+
+            return cast(F, async_wrapper)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
 
             try:
                 return func(*args, **kwargs)
             except except_type as e:
-                if message is not None:
-                    raise raise_type(message) from e
-                else:
-                    raise raise_type(str(e)) from e
+                _reraise(e)
 
         return cast(F, wrapper)
 
@@ -1,7 +1,7 @@
 import json
 import logging
 import os
-from typing import List, Optional, Tuple, Type, Union
+from typing import Any, List, Optional, Tuple, Type, Union
 
 from apispec import APISpec
 from apispec_webframeworks.flask import FlaskPlugin
@@ -22,6 +22,35 @@ class FlaskException(Arcor2Exception):
         self.error_code = error_code
 
 
+class _DataclassesPlugin(DataclassesPlugin):
+    """Resolves short references (e.g. $ref: Pose) at any depth of a schema
+    (e.g. in array of arrays), not only in the schema itself or its items."""
+
+    def resolve_schema_refs(self, data: Any) -> None:
+
+        super().resolve_schema_refs(data)
+
+        if "schema" in data:
+            self._resolve_nested_refs(data["schema"])
+
+    def _resolve_nested_refs(self, data: Any) -> None:
+
+        if isinstance(data, dict):
+
+            ref = data.get("$ref")
+
+            if isinstance(ref, str) and not ref.startswith("#"):
+                prefix = "#/definitions/" if self.spec.openapi_version.major == 2 else "#/components/schemas/"
+                data["$ref"] = prefix + ref
+
+            for value in data.values():
+                self._resolve_nested_refs(value)
+
+        elif isinstance(data, list):
+            for value in data:
+                self._resolve_nested_refs(value)
+
+
 def create_app(import_name: str) -> Flask:
 
     app = Flask(import_name)
@@ -43,7 +72,7 @@ def run_app(
         title=f"{name} ({version})",
         version=api_version,
         openapi_version="3.0.2",
-        plugins=[FlaskPlugin(), DataclassesPlugin()],
+        plugins=[FlaskPlugin(), _DataclassesPlugin()],
     )
 
     if dataclasses is not None:
@@ -1,7 +1,7 @@
-from typing import Optional, Set
+from typing import Dict, Iterator, List, Optional, Set
 
 from arcor2.cached import CachedProject, CachedProjectException
-from arcor2.data.common import Action
+from arcor2.data.common import LogicItem
 from arcor2.exceptions import Arcor2Exception
 
 LogicContainer = CachedProject  # TODO make it Union[CachedProject, CachedProjectFunction]
@@ -9,40 +9,120 @@ LogicContainer = CachedProject  # TODO make it Union[CachedProject, CachedProjec
 # TODO def validate_logic() -> to be called before saving project / building the package
 
 
+class LoopException(Arcor2Exception):
+    """Logic contains a loop.
+
+    :param cycle: IDs of actions forming the loop (the first one is
+        repeated at the end).
+    """
+
+    def __init__(self, cycle: List[str]) -> None:
+        super().__init__(f"Loop detected: {' -> '.join(cycle)}.")
+        self.cycle = cycle
+
+
+def _successors(parent: LogicContainer, action_id: str, ignored_item_id: Optional[str] = None) -> Iterator[str]:
+    """IDs of actions following the given one."""
+
+    _, outputs = parent.action_io(action_id)
+
+    for output in outputs:
+        if output.end != output.END and output.id != ignored_item_id:
+            yield output.end
+
+
 def check_for_loops(parent: LogicContainer, first_action_id: Optional[str] = None) -> None:
     """Finds loops in logic. Can process even unfinished logic, when first
     action id is provided.
 
+    Iterative depth-first search, each action is processed only once.
+
     :param parent:
     :param first_action_id:
     :return:
     """
 
-    def _check_for_loops(action: Action, visited_actions: Set[str]) -> None:
+    if first_action_id is None:
+
+        try:
+            first_action_id = parent.first_action_id()
+        except CachedProjectException as e:
+            raise Arcor2Exception("Can't check unfinished logic.") from e
+
+    parent.action(first_action_id)
+
+    path: List[str] = [first_action_id]  # actions on the current path
+    on_path: Dict[str, int] = {first_action_id: 0}  # action id -> index in path
+    successors: List[Iterator[str]] = [_successors(parent, first_action_id)]
+    finished: Set[str] = set()  # there is no loop reachable from these
+
+    while successors:
+
+        try:
+            action_id = next(successors[-1])
+        except StopIteration:
+            successors.pop()
+            action_id = path.pop()
+            del on_path[action_id]
+            finished.add(action_id)
+            continue
+
+        if action_id in on_path:
+            raise LoopException(path[on_path[action_id] :] + [action_id])
+
+        if action_id in finished:
+            continue
+
+        parent.action(action_id)
+
+        on_path[action_id] = len(path)
+        path.append(action_id)
+        successors.append(_successors(parent, action_id))
+
+
+def check_logic_item_for_loops(parent: LogicContainer, logic_item: LogicItem) -> None:
+    """Checks whether adding the logic item (or updating the existing one with
+    the same ID) would create a loop.
+
+    Only actions reachable from the end of the logic item are visited and the item does not have to be part of
+    the logic yet.
+
+    :param parent:
+    :param logic_item:
+    :return:
+    """
+
+    if logic_item.start == logic_item.START or logic_item.end == logic_item.END:
+        return
+
+    start_action_id = logic_item.parse_start().start_action_id
+
+    if start_action_id == logic_item.end:
+        raise LoopException([start_action_id, start_action_id])
 
-        if action.id in visited_actions:
-            raise Arcor2Exception("Loop detected!")
+    previous: Dict[str, str] = {logic_item.end: start_action_id}
+    stack: List[str] = [logic_item.end]
 
-        visited_actions.add(action.id)
+    while stack:
 
-        _, outputs = parent.action_io(action.id)
+        action_id = stack.pop()
 
-        for output in outputs:
+        for next_id in _successors(parent, action_id, logic_item.id):
 
-            if output.end == output.END:
+            if next_id in previous:
                 continue
 
-            # each possible execution path have its own set of visited actions
-            _check_for_loops(parent.action(output.end), visited_actions.copy())
+            previous[next_id] = action_id
 
-    if first_action_id is None:
+            if next_id == start_action_id:
 
-        try:
-            first_action_id = parent.first_action_id()
-        except CachedProjectException as e:
-            raise Arcor2Exception("Can't check unfinished logic.") from e
+                cycle = [start_action_id]
+                while action_id != start_action_id:
+                    cycle.append(action_id)
+                    action_id = previous[action_id]
+                cycle.append(start_action_id)
+                cycle.reverse()
 
-    first_action = parent.action(first_action_id)
+                raise LoopException(cycle)
 
-    visited_actions: Set[str] = set()
-    _check_for_loops(first_action, visited_actions)
+            stack.append(next_id)
@@ -0,0 +1,246 @@
+import math
+from abc import ABCMeta, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from arcor2.exceptions import Arcor2Exception
+
+"""
+Minimal metrics (counters, gauges and histograms with labels) rendered in the Prometheus text format.
+
+Metrics are registered in REGISTRY when created. Services based on ws_server expose them on /metrics
+(see ws_server.serve).
+"""
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # name suffix, labels, value
+
+
+class MetricsException(Arcor2Exception):
+    pass
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric(metaclass=ABCMeta):
+
+    type = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None
+    ) -> None:
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _label_values(self, labelvalues: Sequence[str]) -> LabelValues:
+
+        if len(labelvalues) != len(self.labelnames):
+            raise MetricsException(f"{self.name} has labels {self.labelnames}.")
+        return tuple(str(val) for val in labelvalues)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        pass
+
+    def render(self) -> List[str]:
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+        for suffix, labels, value in self.samples():
+            if labels:
+                labels_str = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{self.name}{suffix}{{{labels_str}}} {_format_value(value)}")
+            else:
+                lines.append(f"{self.name}{suffix} {_format_value(value)}")
+
+        return lines
+
+
+class _ValueMetric(Metric):
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None
+    ) -> None:
+
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: Dict[LabelValues, float] = {}
+
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(self._label_values(labelvalues), 0.0)
+
+    def _add(self, amount: float, labelvalues: Sequence[str]) -> None:
+
+        key = self._label_values(labelvalues)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+
+        for key, value in self._values.items():
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Counter(_ValueMetric):
+
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+
+        if amount < 0:
+            raise MetricsException("Counter can only be increased.")
+        self._add(amount, labelvalues)
+
+
+class Gauge(_ValueMetric):
+
+    type = "gauge"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._add(amount, labelvalues)
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._add(-amount, labelvalues)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self._values[self._label_values(labelvalues)] = value
+
+
+class CallbackMetric(Metric):
+    """Value of the metric is obtained when rendered (e.g. from already
+    existing counters)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float],
+        metric_type: str = "gauge",
+        registry: Optional["Registry"] = None,
+    ) -> None:
+
+        super().__init__(name, documentation, (), registry)
+        self.type = metric_type
+        self._callback = callback
+
+    def samples(self) -> Iterator[Sample]:
+        yield "", {}, self._callback()
+
+
+class _HistogramValues:
+
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int) -> None:
+
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Optional["Registry"] = None,
+    ) -> None:
+
+        if list(buckets) != sorted(buckets):
+            raise MetricsException("Buckets have to be sorted.")
+
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(float(bound) for bound in buckets if not math.isinf(bound)) + (math.inf,)
+        self._values: Dict[LabelValues, _HistogramValues] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+
+        key = self._label_values(labelvalues)
+
+        try:
+            values = self._values[key]
+        except KeyError:
+            values = self._values[key] = _HistogramValues(len(self.buckets))
+
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                values.buckets[idx] += 1
+                break
+        else:  # NaN, so the +Inf bucket still equals the count
+            values.buckets[-1] += 1
+
+        values.sum += value
+        values.count += 1
+
+    def count(self, *labelvalues: str) -> int:
+
+        try:
+            return self._values[self._label_values(labelvalues)].count
+        except KeyError:
+            return 0
+
+    def samples(self) -> Iterator[Sample]:
+
+        for key, values in self._values.items():
+
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+
+            for bound, bucket in zip(self.buckets, values.buckets):
+                cumulative += bucket
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+
+            yield "_sum", labels, values.sum
+            yield "_count", labels, values.count
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+
+        if metric.name in self._metrics:
+            raise MetricsException(f"Metric {metric.name} already registered.")
+        self._metrics[metric.name] = metric
+
+    def unregister(self, name: str) -> None:
+        self._metrics.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._metrics
+
+    def render(self) -> str:
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
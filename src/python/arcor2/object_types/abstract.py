@@ -12,7 +12,7 @@ from arcor2.clients import scene_service
 from arcor2.data.camera import CameraParameters
 from arcor2.data.common import Joint, Pose, SceneObject
 from arcor2.data.object_type import Models
-from arcor2.data.robot import RobotType
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult, RobotState, RobotType
 from arcor2.docstring import parse_docstring
 from arcor2.exceptions import Arcor2Exception, Arcor2NotImplemented
 from arcor2.helpers import NonBlockingLock
@@ -164,6 +164,22 @@ class Robot(GenericWithPose, metaclass=abc.ABCMeta):
     def robot_joints(self) -> List[Joint]:
         pass
 
+    def robot_state(self, end_effectors: bool = True) -> RobotState:
+        """Gets joints and (optionally) poses of all end effectors at once.
+
+        Robots that can get all of this with a single call (request) should override this.
+
+        :param end_effectors: Whether to get poses of end effectors.
+        :return:
+        """
+
+        state = RobotState(self.robot_joints())
+
+        if end_effectors:
+            state.end_effectors = {eef: self.get_end_effector_pose(eef) for eef in self.get_end_effectors_ids()}
+
+        return state
+
     @abc.abstractmethod
     def grippers(self) -> Set[str]:
         return set()
@@ -226,6 +242,65 @@ class Robot(GenericWithPose, metaclass=abc.ABCMeta):
         """
         raise Arcor2NotImplemented()
 
+    def inverse_kinematics_batch(
+        self,
+        end_effector_id: str,
+        poses: List[Pose],
+        start_joints: Optional[List[Joint]] = None,
+        avoid_collisions: bool = True,
+    ) -> List[InverseKinematicsResult]:
+        """Computes inverse kinematics for many poses at once.
+
+        The default implementation calls inverse_kinematics for each of the poses. Robots able to do better
+        (e.g. using one request to a service) should override it.
+
+        :param end_effector_id: IK target pose end-effector
+        :param poses: IK target poses
+        :param start_joints: IK start joints (used for all poses)
+        :param avoid_collisions: Return non-collision IK result if true
+        :return: Result for each of the poses (joints or error)
+        """
+
+        results: List[InverseKinematicsResult] = []
+
+        for pose in poses:
+            try:
+                results.append(
+                    InverseKinematicsResult(
+                        self.inverse_kinematics(end_effector_id, pose, start_joints, avoid_collisions)
+                    )
+                )
+            except Arcor2NotImplemented:
+                raise
+            except Arcor2Exception as e:
+                results.append(InverseKinematicsResult(error=str(e)))
+
+        return results
+
+    def forward_kinematics_batch(
+        self, end_effector_id: str, joints: List[List[Joint]]
+    ) -> List[ForwardKinematicsResult]:
+        """Computes forward kinematics for many sets of joints at once.
+
+        The default implementation calls forward_kinematics for each of them.
+
+        :param end_effector_id: Target end effector name
+        :param joints: Input joint values
+        :return: Result for each set of joints (pose or error)
+        """
+
+        results: List[ForwardKinematicsResult] = []
+
+        for jnts in joints:
+            try:
+                results.append(ForwardKinematicsResult(self.forward_kinematics(end_effector_id, jnts)))
+            except Arcor2NotImplemented:
+                raise
+            except Arcor2Exception as e:
+                results.append(ForwardKinematicsResult(error=str(e)))
+
+        return results
+
     def get_hand_teaching_mode(self) -> bool:
         """
         This is expected to be implemented if the robot supports set_hand_teaching_mode
@@ -1,8 +1,39 @@
+from typing import List, Set
+
+from arcor2.data.common import Joint, Pose
 from arcor2.object_types.abstract import Robot
 from arcor2.object_types.utils import check_object_type
 
 
+class MyRobot(Robot):
+    def get_end_effectors_ids(self) -> Set[str]:
+        return {"eef1", "eef2"}
+
+    def get_end_effector_pose(self, end_effector: str) -> Pose:
+        return Pose()
+
+    def robot_joints(self) -> List[Joint]:
+        return [Joint("j1", 1.0)]
+
+    def grippers(self) -> Set[str]:
+        return set()
+
+    def suctions(self) -> Set[str]:
+        return set()
+
+
 def test_object_type() -> None:
 
     check_object_type(Robot)
     assert Robot.abstract()
+
+
+def test_robot_state() -> None:
+
+    robot = MyRobot("id", "name", Pose())
+
+    state = robot.robot_state()
+    assert state.joints == [Joint("j1", 1.0)]
+    assert state.end_effectors.keys() == {"eef1", "eef2"}
+
+    assert not robot.robot_state(end_effectors=False).end_effectors
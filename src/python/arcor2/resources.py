@@ -109,9 +109,8 @@ class IntResources:
         print_event(package_info_event)
 
         # make all poses absolute
-        for aps in self.project.action_points_with_parent:
-            # Action point pose is relative to its parent object/AP pose in scene but is absolute during runtime.
-            tr.make_relative_ap_global(self.scene, self.project, aps)
+        # Action point pose is relative to its parent object/AP pose in scene but is absolute during runtime.
+        tr.make_relative_aps_global(self.scene, self.project)
 
     def __enter__(self: R) -> R:
         return self
@@ -1,15 +1,45 @@
+import hashlib
 import json
 import logging
 import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from enum import Enum
-from functools import partial
+from functools import lru_cache, partial
 from io import BytesIO
-from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Type, TypeVar, Union, overload
+from threading import Lock
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
 
 import humps
 import requests
 from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
 from PIL import Image, UnidentifiedImageError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # orjson is optional, it just makes (de)serialization faster
+    HAS_ORJSON = False
 
 from arcor2.exceptions import Arcor2Exception
 from arcor2.logging import get_logger
@@ -20,7 +50,9 @@ Primitive = TypeVar("Primitive", str, int, float, bool)
 ReturnValue = Union[None, Primitive, DataClass, BytesIO]
 ReturnType = Union[None, Type[Primitive], Type[DataClass], Type[BytesIO]]
 
-OptBody = Optional[Union[JsonSchemaMixin, Sequence[JsonSchemaMixin], Sequence[Primitive]]]
+OptBody = Optional[
+    Union[JsonSchemaMixin, Sequence[JsonSchemaMixin], Sequence[Sequence[JsonSchemaMixin]], Sequence[Primitive]]
+]
 OptParams = Optional[Dict[str, Primitive]]
 OptFiles = Optional[Dict[str, Union[bytes, str]]]
 
@@ -42,11 +74,11 @@ class RestHttpException(RestException):
 class Method(Enum):
     """Enumeration of supported HTTP methods."""
 
-    GET = partial(requests.get)
-    POST = partial(requests.post)
-    PUT = partial(requests.put)
-    DELETE = partial(requests.delete)
-    PATCH = partial(requests.patch)
+    GET = "GET"
+    POST = "POST"
+    PUT = "PUT"
+    DELETE = "DELETE"
+    PATCH = "PATCH"
 
 
 class Timeout(NamedTuple):
@@ -72,19 +104,201 @@ class Timeout(NamedTuple):
 OptTimeout = Optional[Timeout]
 
 
+class PoolSettings(NamedTuple):
+    """Settings of the HTTP connection pool shared by all calls.
+
+    :param connections: Number of per-host pools to be kept.
+    :param maxsize: Maximal number of keep-alive connections per host.
+    :param retries: How many times to retry a request that failed to connect (or a GET with 502/503/504 response).
+    :param backoff_factor: Sleep between retries is backoff_factor * (2 ** (retry - 1)) seconds.
+    """
+
+    connections: int = int(os.getenv("ARCOR2_REST_POOL_CONNECTIONS", 10))
+    maxsize: int = int(os.getenv("ARCOR2_REST_POOL_MAXSIZE", 10))
+    retries: int = int(os.getenv("ARCOR2_REST_RETRIES", 3))
+    backoff_factor: float = float(os.getenv("ARCOR2_REST_BACKOFF_FACTOR", 0.1))
+
+
+class PoolStats(NamedTuple):
+    """Usage of a connection pool for one host."""
+
+    connections: int  # how many connections were opened so far
+    requests: int  # how many requests were sent so far
+
+
+class Validators(NamedTuple):
+    """Cache validators of a resource, used for conditional requests.
+
+    :param etag: Value of the ETag header (as sent by the server).
+    :param last_modified: HTTP-date (second resolution) of the last modification.
+    """
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def headers(self) -> Dict[str, str]:
+
+        ret: Dict[str, str] = {}
+
+        if self.etag:
+            ret["If-None-Match"] = self.etag
+        if self.last_modified:
+            ret["If-Modified-Since"] = self.last_modified
+
+        return ret
+
+
 # module-level variables
+CHUNK_SIZE = 64 * 1024
+PART_SUFFIX = ".part"  # partially downloaded files
 debug: bool = bool(os.getenv("ARCOR2_REST_DEBUG", False))
+# responses from these URLs (prefixes), e.g. of internal services, are not validated against JSON schema
+trusted_urls: Set[str] = {url for url in os.getenv("ARCOR2_REST_TRUSTED_URLS", "").split(",") if url}
 headers = {"accept": "application/json", "content-type": "application/json"}
-session = requests.session()
 logger = get_logger(__name__, logging.DEBUG if debug else logging.INFO)
 
+_session_lock = Lock()
+
+
+def _create_session(settings: PoolSettings) -> requests.Session:
+
+    # failed connect is safe to retry for any method as nothing was sent
+    # read errors are not retried - there is no way to find out whether the server already processed the request
+    retry = Retry(
+        total=settings.retries,
+        read=0,
+        backoff_factor=settings.backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),  # only for status_forcelist
+        raise_on_status=False,
+    )
+
+    adapter = HTTPAdapter(pool_connections=settings.connections, pool_maxsize=settings.maxsize, max_retries=retry)
+
+    sess = requests.Session()
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+
+session = _create_session(PoolSettings())
+
+
+def configure_pool(settings: PoolSettings) -> None:
+    """Replaces the connection pool used by call (existing connections are
+    closed).
+
+    :param settings: New settings.
+    :return:
+    """
+
+    global session
+
+    with _session_lock:
+        old_session = session
+        session = _create_session(settings)
+        old_session.close()
+
+
+def pool_stats() -> Dict[str, PoolStats]:
+    """Returns statistics of connection pools, per host.
+
+    :return: Dictionary where key is 'scheme://host:port'.
+    """
+
+    ret: Dict[str, PoolStats] = {}
+
+    with _session_lock:
+        adapters = set(session.adapters.values())
+
+    for adapter in adapters:
+
+        assert isinstance(adapter, HTTPAdapter)
+        pools = adapter.poolmanager.pools
+
+        for key in pools.keys():
+
+            pool = pools.get(key)
+
+            if pool is None:  # might be evicted meanwhile
+                continue
+
+            ret[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = PoolStats(
+                pool.num_connections, pool.num_requests
+            )
+
+    return ret
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _camelize_key(key: Any) -> Any:
+    return humps.camelize(key)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _decamelize_key(key: Any) -> Any:
+    return humps.decamelize(key)
+
+
+def camelize(data: Any) -> Any:
+    """Same as humps.camelize (converts keys of all nested dictionaries) but
+    conversion of each distinct key is done only once."""
+
+    if isinstance(data, dict):
+        return {_camelize_key(k): camelize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [camelize(v) for v in data]
+    return data
+
+
+def decamelize(data: Any) -> Any:
+    """Same as humps.decamelize (converts keys of all nested dictionaries) but
+    conversion of each distinct key is done only once."""
+
+    if isinstance(data, dict):
+        return {_decamelize_key(k): decamelize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [decamelize(v) for v in data]
+    return data
+
+
+def dumps(data: Any) -> Union[str, bytes]:
+    """Serializes data to JSON, using orjson if available."""
+
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(data)
+        except TypeError:  # e.g. non-str keys, which json supports
+            pass
+
+    return json.dumps(data)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parses JSON, using orjson if available.
+
+    Raises ValueError for invalid JSON.
+    """
+
+    if HAS_ORJSON:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+def is_trusted(url: str) -> bool:
+    """Responses from trusted (internal) services are not validated."""
+
+    return any(url.startswith(prefix) for prefix in trusted_urls)
+
 
-def dataclass_from_json(resp_json: Dict[str, Any], return_type: Type[DataClass]) -> DataClass:
+def dataclass_from_json(resp_json: Dict[str, Any], return_type: Type[DataClass], validate: bool = True) -> DataClass:
 
     try:
-        return return_type.from_dict(resp_json)
+        return return_type.from_dict(resp_json, validate=validate)
     except ValidationError as e:
-        logger.debug(f'{return_type.__name__}: validation error "{e}" while parsing "{resp_json}".')
+        if debug:
+            logger.debug(f'{return_type.__name__}: validation error "{e}" while parsing "{resp_json}".')
         raise RestException("Invalid data.", str(e)) from e
 
 
@@ -93,10 +307,159 @@ def primitive_from_json(resp_json: Primitive, return_type: Type[Primitive]) -> P
     try:
         return return_type(resp_json)
     except ValueError as e:
-        logger.debug(f'{return_type.__name__}: error  "{e}" while parsing "{resp_json}".')
+        if debug:
+            logger.debug(f'{return_type.__name__}: error  "{e}" while parsing "{resp_json}".')
         raise RestException(e) from e
 
 
+def prepare_data(body: OptBody) -> Union[Dict[str, Any], List[Any]]:
+    """Turns body of the request into JSON-serializable (camelized) data."""
+
+    if isinstance(body, JsonSchemaMixin):
+        return camelize(body.to_dict())
+    elif isinstance(body, list):
+        d: List[Any] = []
+        for dd in body:
+            if isinstance(dd, JsonSchemaMixin):
+                d.append(camelize(dd.to_dict()))
+            elif isinstance(dd, list):
+                d.append(prepare_data(dd))
+            else:
+                d.append(dd)
+        return d
+    elif body is not None:
+        raise RestException("Unsupported type of data.")
+
+    return {}
+
+
+def prepare_params(params: OptParams) -> Dict[str, Primitive]:
+    """Camelizes parameters and converts booleans into strings."""
+
+    if not params:
+        return {}
+
+    params = camelize(params)
+    assert params is not None
+
+    # requests just simply stringifies parameters, which does not work for booleans
+    for param_name, param_value in params.items():
+        if isinstance(param_value, bool):
+            params[param_name] = "true" if param_value else "false"
+
+    return params
+
+
+def parse_json(
+    resp_json: Any, return_type: ReturnType, list_return_type: ReturnType, validate: bool = True
+) -> ReturnValue:
+    """Turns JSON from the response into instance(s) of the given type.
+
+    :param resp_json: Parsed JSON.
+    :param return_type: Type of the single value (or of list items if list_return_type is set).
+    :param list_return_type: If set, the list of values is expected.
+    :param validate: Whether to validate dataclasses against their JSON schema.
+    :return:
+    """
+
+    assert return_type is not None
+
+    if debug:
+        logger.debug(f"Response json: {resp_json}")
+    if isinstance(resp_json, (dict, list)):
+        resp_json = decamelize(resp_json)
+    if debug:
+        logger.debug(f"Decamelized json: {resp_json}")
+
+    if list_return_type and not isinstance(resp_json, list):
+        if debug:
+            logger.debug(f"Expected list of type {return_type}, but got {resp_json}.")
+        raise RestException("Response is not a list.")
+
+    if issubclass(return_type, JsonSchemaMixin):
+
+        if list_return_type:
+            return [dataclass_from_json(item, return_type, validate) for item in resp_json]
+
+        else:
+            assert not isinstance(resp_json, list)
+
+            # TODO temporary workaround for bug in humps (https://github.com/nficano/humps/issues/127)
+            from arcor2.data.object_type import Box
+
+            if return_type is Box:
+                resp_json["size_x"] = resp_json["sizex"]
+                resp_json["size_y"] = resp_json["sizey"]
+                resp_json["size_z"] = resp_json["sizez"]
+
+            return dataclass_from_json(resp_json, return_type, validate)
+
+    else:  # probably a primitive
+
+        if list_return_type:
+            return [primitive_from_json(item, return_type) for item in resp_json]
+        else:
+            assert not isinstance(resp_json, list)
+            return primitive_from_json(resp_json, return_type)
+
+
+def http_exception(content: bytes, status_code: int) -> RestHttpException:
+    """Creates exception based on the content of an error response."""
+
+    # here we try to handle different cases
+    try:
+        resp_body = json.loads(content)
+    except json.JSONDecodeError:
+        # response contains invalid JSON
+        return RestHttpException(content.decode("utf-8"), error_code=status_code)
+
+    try:
+        # this should be standard (body containing "message").
+        return RestHttpException(resp_body["message"], error_code=status_code)
+    except (KeyError, TypeError):  # TypeError is for case when resp_body is just string
+        return RestHttpException(str(resp_body), error_code=status_code)
+
+
+def http_date(dt: datetime) -> str:
+    """Formats (timezone-aware) datetime as HTTP-date."""
+
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def validators_from_headers(resp_headers: Mapping[str, str], fallback: Optional[Validators] = None) -> Validators:
+    """Gets cache validators from the response headers.
+
+    :param resp_headers: Headers of the response.
+    :param fallback: Validators to be used for those missing in the response (e.g. for 304).
+    :return:
+    """
+
+    if fallback is None:
+        fallback = Validators()
+
+    return Validators(
+        resp_headers.get("ETag", fallback.etag), resp_headers.get("Last-Modified", fallback.last_modified)
+    )
+
+
+def parse_content(
+    url: str, content: bytes, return_type: ReturnType, list_return_type: ReturnType = None
+) -> ReturnValue:
+    """Parses the response content (JSON) into instance(s) of the given type."""
+
+    if debug:
+        logger.debug(f"Response text: {content!r}")
+
+    try:
+        resp_json = loads(content)
+    except ValueError as e:
+        if debug:
+            logger.debug(f"Got invalid JSON in the response: {content!r}")
+        raise RestException("Invalid JSON.") from e
+
+    return parse_json(resp_json, return_type, list_return_type, not is_trusted(url))
+
+
 # overload for no return
 @overload
 def call(
@@ -220,7 +583,8 @@ def call(
     :param timeout: Specific timeout for a call.
     :return: Return value/type is given by return_type/list_return_type. If both are None, nothing will be returned.
     """
-    logger.debug(f"{method} {url}, body: {body}, params: {params}, files: {files is not None}, timeout: {timeout}")
+    if debug:
+        logger.debug(f"{method} {url}, body: {body}, params: {params}, files: {files is not None}, timeout: {timeout}")
 
     if body and files:
         raise RestException("Can't send data and files at the same time.")
@@ -231,41 +595,17 @@ def call(
     if return_type is None:
         return_type = list_return_type
 
-    # prepare data into dict
-    if isinstance(body, JsonSchemaMixin):
-        d = humps.camelize(body.to_dict())
-    elif isinstance(body, list):
-        d = []
-        for dd in body:
-            if isinstance(dd, JsonSchemaMixin):
-                d.append(humps.camelize(dd.to_dict()))
-            else:
-                d.append(dd)
-    elif body is not None:
-        raise RestException("Unsupported type of data.")
-    else:
-        d = {}
-
-    if params:
-        params = humps.camelize(params)
-    else:
-        params = {}
-
-    assert params is not None
-
-    # requests just simply stringifies parameters, which does not work for booleans
-    for param_name, param_value in params.items():
-        if isinstance(param_value, bool):
-            params[param_name] = "true" if param_value else "false"
+    d = prepare_data(body)
+    params = prepare_params(params)
 
     if timeout is None:
         timeout = Timeout()
 
     try:
         if files:
-            resp = method.value(url, files=files, timeout=timeout, params=params)
+            resp = session.request(method.value, url, files=files, timeout=timeout, params=params)
         else:
-            resp = method.value(url, data=json.dumps(d), timeout=timeout, headers=headers, params=params)
+            resp = session.request(method.value, url, data=dumps(d), timeout=timeout, headers=headers, params=params)
     except requests.exceptions.RequestException as e:
         logger.debug("Request failed.", exc_info=True)
         # TODO would be good to provide more meaningful message but the original one could be very very long
@@ -285,48 +625,51 @@ def call(
 
         return BytesIO(resp.content)
 
-    logger.debug(f"Response text: {resp.text}")
+    return parse_content(url, resp.content, return_type, list_return_type)
 
-    try:
-        resp_json = resp.json()
-    except ValueError as e:
-        logger.debug(f"Got invalid JSON in the response: {resp.text}")
-        raise RestException("Invalid JSON.") from e
 
-    logger.debug(f"Response json: {resp_json}")
-    if isinstance(resp_json, (dict, list)):
-        resp_json = humps.decamelize(resp_json)
-    logger.debug(f"Decamelized json: {resp_json}")
-
-    if list_return_type and not isinstance(resp_json, list):
-        logger.debug(f"Expected list of type {return_type}, but got {resp_json}.")
-        raise RestException("Response is not a list.")
-
-    if issubclass(return_type, JsonSchemaMixin):
+def get_if_modified(
+    url: str,
+    return_type: Type[DataClass],
+    validators: Optional[Validators] = None,
+    *,
+    params: OptParams = None,
+    timeout: OptTimeout = None,
+) -> Tuple[Optional[DataClass], Validators]:
+    """Conditional GET - the resource is only transferred (and parsed) when it
+    was modified since the validators were obtained.
 
-        if list_return_type:
-            return [dataclass_from_json(item, return_type) for item in resp_json]
+    :param url: Resource address.
+    :param return_type: Type of the resource.
+    :param validators: Validators from the previous response. If not set, the resource is always transferred.
+    :param params: Path parameters.
+    :param timeout: Specific timeout for a call.
+    :return: Tuple of the resource (None if not modified) and up-to-date validators.
+    """
 
-        else:
-            assert not isinstance(resp_json, list)
+    if validators is None:
+        validators = Validators()
 
-            # TODO temporary workaround for bug in humps (https://github.com/nficano/humps/issues/127)
-            from arcor2.data.object_type import Box
+    if timeout is None:
+        timeout = Timeout()
 
-            if return_type is Box:
-                resp_json["size_x"] = resp_json["sizex"]
-                resp_json["size_y"] = resp_json["sizey"]
-                resp_json["size_z"] = resp_json["sizez"]
+    try:
+        resp = session.get(
+            url,
+            params=prepare_params(params),
+            headers={"accept": "application/json", **validators.headers()},
+            timeout=timeout,
+        )
+    except requests.exceptions.RequestException as e:
+        logger.debug("Request failed.", exc_info=True)
+        raise RestException("Catastrophic system error.") from e
 
-            return dataclass_from_json(resp_json, return_type)
+    _handle_response(resp)
 
-    else:  # probably a primitive
+    if resp.status_code == 304:
+        return None, validators_from_headers(resp.headers, validators)
 
-        if list_return_type:
-            return [primitive_from_json(item, return_type) for item in resp_json]
-        else:
-            assert not isinstance(resp_json, list)
-            return primitive_from_json(resp_json, return_type)
+    return cast(DataClass, parse_content(url, resp.content, return_type)), validators_from_headers(resp.headers)
 
 
 def _handle_response(resp: requests.Response) -> None:
@@ -339,19 +682,7 @@ def _handle_response(resp: requests.Response) -> None:
     try:
         resp.raise_for_status()
     except requests.exceptions.HTTPError as e:
-
-        # here we try to handle different cases
-        try:
-            resp_body = json.loads(resp.content)
-        except json.JSONDecodeError:
-            # response contains invalid JSON
-            raise RestHttpException(resp.content.decode("utf-8"), error_code=e.response.status_code) from e
-
-        try:
-            # this should be standard (body containing "message").
-            raise RestHttpException(resp_body["message"], error_code=e.response.status_code) from e
-        except (KeyError, TypeError):  # TypeError is for case when resp_body is just string
-            raise RestHttpException(str(resp_body), error_code=e.response.status_code) from e
+        raise http_exception(resp.content, e.response.status_code) from e
 
 
 def get_image(url: str) -> Image.Image:
@@ -364,9 +695,162 @@ def get_image(url: str) -> Image.Image:
         raise RestException("Invalid image.") from e
 
 
-def download(url: str, path: str, params: OptParams = None) -> None:
-    """Shortcut for saving a file to disk."""
+class Writable(Protocol):
+    def write(self, data: bytes) -> Any:
+        ...
+
+
+class HashingWriter:
+    """Writes data into the file and updates the digest."""
+
+    def __init__(self, file: BinaryIO, digest: "hashlib._Hash") -> None:
+        self._file = file
+        self._digest = digest
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._digest.update(data)
+
+
+class SkippingWriter:
+    """Drops first 'skip' bytes written, the rest goes to the buffer.
+
+    Used when the server does not support ranges and sends the whole
+    resource.
+    """
+
+    def __init__(self, buffer: Writable, skip: int) -> None:
+        self._buffer = buffer
+        self._skip = skip
+
+    def write(self, data: bytes) -> None:
+
+        if self._skip:
+            if len(data) <= self._skip:
+                self._skip -= len(data)
+                return
+            data = data[self._skip :]
+            self._skip = 0
+
+        self._buffer.write(data)
+
+
+def stream(
+    url: str,
+    buffer: Writable,
+    params: OptParams = None,
+    *,
+    offset: int = 0,
+    timeout: OptTimeout = None,
+) -> None:
+    """Writes response body into the buffer, chunk by chunk (the whole
+    response is never held in the memory).
+
+    :param url: Resource address.
+    :param buffer: Anything with write method (file opened in binary mode, socket, BytesIO...).
+    :param params: Path parameters.
+    :param offset: If set, only part of the resource from the offset is requested (HTTP Range).
+    :param timeout: Specific timeout for a call.
+    :return:
+    """
+
+    req_headers: Dict[str, str] = {}
+
+    if offset:
+        req_headers["Range"] = f"bytes={offset}-"
+
+    if timeout is None:
+        timeout = Timeout()
+
+    try:
+        with session.get(url, params=prepare_params(params), headers=req_headers, timeout=timeout, stream=True) as resp:
+
+            if offset and resp.status_code == 416:  # range not satisfiable - there is nothing more to download
+                return
+
+            _handle_response(resp)
+
+            writer = SkippingWriter(buffer, offset if resp.status_code != 206 else 0)
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                writer.write(chunk)
+
+    except requests.exceptions.RequestException as e:
+        logger.debug("Request failed.", exc_info=True)
+        raise RestException("Catastrophic system error.") from e
+
+
+def download(
+    url: str,
+    path: str,
+    params: OptParams = None,
+    *,
+    checksum: Optional[str] = None,
+    algorithm: str = "sha256",
+    resume: bool = False,
+) -> str:
+    """Shortcut for saving a file to disk.
+
+    The file is downloaded next to the destination (see part_path) and moved there once it is complete (and
+    verified), so an existing file is not touched when the download fails.
+
+    :param url: Resource address.
+    :param path: Where to save the file.
+    :param params: Path parameters.
+    :param checksum: If set, the hex digest of the file is compared to it and exception is raised on mismatch.
+    :param algorithm: Hashing algorithm (any supported by hashlib).
+    :param resume: Continue the previously interrupted download (using HTTP Range).
+    :return: Hex digest of the downloaded file.
+    """
+
+    digest, offset = download_start(path, algorithm, resume)
+
+    with open_part(path, offset) as file:
+        stream(url, HashingWriter(file, digest), params, offset=offset)
+
+    return download_finish(path, digest, checksum)
+
+
+def part_path(path: str) -> str:
+    """Where the file is being downloaded to."""
+    return path + PART_SUFFIX
+
+
+def download_start(path: str, algorithm: str, resume: bool) -> Tuple["hashlib._Hash", int]:
+    """Prepares digest (covering already downloaded part) and offset for
+    download."""
+
+    try:
+        digest = hashlib.new(algorithm)
+    except ValueError as e:
+        raise RestException(f"Unsupported hashing algorithm: {algorithm}.") from e
+
+    part = part_path(path)
+    offset = os.path.getsize(part) if resume and os.path.exists(part) else 0
+
+    if offset:  # the already downloaded part has to be hashed as well
+        with open(part, "rb") as existing:
+            for chunk in iter(partial(existing.read, CHUNK_SIZE), b""):
+                digest.update(chunk)
+
+    return digest, offset
+
+
+def open_part(path: str, offset: int) -> BinaryIO:
+    """Opens the partially downloaded file for writing (truncated unless
+    resuming)."""
+    return open(part_path(path), "ab" if offset else "wb")
+
+
+def download_finish(path: str, digest: "hashlib._Hash", checksum: Optional[str]) -> str:
+    """Verifies checksum of the downloaded file and moves it to the
+    destination (on mismatch, it is removed instead)."""
+
+    hex_digest = digest.hexdigest()
+    part = part_path(path)
+
+    if checksum is not None and hex_digest != checksum.lower():
+        os.remove(part)
+        raise RestException(f"Checksum mismatch, expected {checksum}, got {hex_digest}.")
 
-    with call(Method.GET, url, return_type=BytesIO, params=params) as buff:
-        with open(path, "wb") as file:
-            file.write(buff.getvalue())
+    os.replace(part, path)
+    return hex_digest
@@ -0,0 +1,155 @@
+import copy
+from datetime import datetime, timezone
+
+from arcor2.cached import UpdateableCachedProject
+from arcor2.data.common import (
+    Action,
+    ActionPoint,
+    Flow,
+    LogicItem,
+    NamedOrientation,
+    Orientation,
+    Position,
+    Project,
+    ProjectRobotJoints,
+)
+
+
+def test_indexes() -> None:
+
+    project = Project("p1", "p1", "s1")
+    ap1 = ActionPoint("ap1", "ap1", Position())
+    ap1.actions.append(Action("ac1", "ac1", "Test/test", flows=[Flow()]))
+    ap1.actions.append(Action("ac2", "ac2", "Test/test", flows=[Flow()]))
+    ap1.orientations.append(NamedOrientation("o1", "ori1", Orientation()))
+    ap1.robot_joints.append(ProjectRobotJoints("j1", "j1", "robot", []))
+    project.action_points.append(ap1)
+    project.logic.append(LogicItem("l1", LogicItem.START, "ac1"))
+    project.logic.append(LogicItem("l2", "ac1", "ac2"))
+
+    cached = UpdateableCachedProject(project)
+
+    assert cached.ap_action_ids("ap1") == {"ac1", "ac2"}
+    assert [ori.id for ori in cached.ap_orientations("ap1")] == ["o1"]
+    assert [joints.id for joints in cached.ap_joints("ap1")] == ["j1"]
+    assert cached.first_action_id() == "ac1"
+
+    inputs, outputs = cached.action_io("ac1")
+    assert [item.id for item in inputs] == ["l1"]
+    assert [item.id for item in outputs] == ["l2"]
+
+    cached.upsert_action_point("ap2", "ap2", Position())
+    cached.upsert_action("ap2", Action("ac3", "ac3", "Test/test", flows=[Flow()]))
+    assert cached.ap_action_ids("ap2") == {"ac3"}
+
+    # logic item modified in place (as ARServer does on a copy of the project) and then upserted
+    l2 = cached.logic_item("l2")
+    l2.end = "ac3"
+    cached.upsert_logic_item(l2)
+    assert not cached.action_io("ac2")[0]
+    assert [item.id for item in cached.action_io("ac3")[0]] == ["l2"]
+
+    cached.remove_logic_item("l2")
+    assert not cached.action_io("ac1")[1]
+    assert not cached.action_io("ac3")[0]
+
+    cached.remove_action_point("ap1")
+    assert not cached.ap_actions("ap1")
+    assert not cached.ap_orientations("ap1")
+    assert not cached.ap_joints("ap1")
+    assert {action.id for action in cached.actions} == {"ac3"}
+
+    cached.clear_logic()
+    assert not cached.action_io("ac1")[1]
+
+
+def test_transaction() -> None:
+
+    project = Project("p1", "p1", "s1")
+    ap1 = ActionPoint("ap1", "ap1", Position())
+    ap1.actions.append(Action("ac1", "ac1", "Test/test", flows=[Flow()]))
+    ap1.robot_joints.append(ProjectRobotJoints("j1", "j1", "robot", [], is_valid=True))
+    project.action_points.append(ap1)
+    project.logic.append(LogicItem("l1", LogicItem.START, "ac1"))
+
+    cached = UpdateableCachedProject(project)
+    before = cached.project
+
+    tx = cached.transaction()
+    tx.upsert_action("ap1", Action("ac2", "ac2", "Test/test", flows=[Flow()]))
+    tx.upsert_logic_item(LogicItem("l2", "ac1", "ac2"))
+    tx.remove_logic_item("l1")
+    tx.update_ap_position("ap1", Position(1, 0, 0))
+    tx.name = "p2"
+
+    assert tx.ap_action_ids("ap1") == {"ac1", "ac2"}
+    assert [item.id for item in tx.action_io("ac2")[0]] == ["l2"]
+    assert not tx.joints("j1").is_valid
+    assert tx.bare_action_point("ap1").position == Position(1, 0, 0)
+    assert tx.action_point_and_action("ac1")[0] is tx.bare_action_point("ap1")
+
+    # the project is not affected
+    assert cached.project == before
+    assert cached.joints("j1").is_valid
+
+    tx.rollback()
+    assert tx.project == before
+
+    tx.upsert_action("ap1", Action("ac2", "ac2", "Test/test", flows=[Flow()]))
+    tx.update_ap_position("ap1", Position(1, 0, 0))
+    tx.clear_logic()
+    tx.commit()
+
+    assert cached.ap_action_ids("ap1") == {"ac1", "ac2"}
+    assert not cached.logic
+    assert not cached.joints("j1").is_valid
+    assert cached.action_point_and_action("ac2")[0] is cached.bare_action_point("ap1")
+    assert cached.bare_action_point("ap1").position == Position(1, 0, 0)
+    assert cached.has_changes
+
+
+def test_patch() -> None:
+
+    project = Project("p1", "p1", "s1", modified=datetime.now(tz=timezone.utc))
+    for ap_id in ("ap1", "ap2", "ap3"):
+        project.action_points.append(ActionPoint(ap_id, ap_id, Position()))
+    project.logic.append(LogicItem("l1", LogicItem.START, LogicItem.END))
+
+    cached = UpdateableCachedProject(project)
+    patch = cached.patch()
+    assert patch and not patch.action_points and not patch.removed_action_points
+
+    cached.upsert_action("ap1", Action("ac1", "ac1", "Test/test", flows=[Flow()]))
+    cached.remove_action_point("ap2")
+    cached.remove_logic_item("l1")
+    cached.name = "new name"
+    cached.update_attributes_modified()
+
+    version = cached.version
+    patch = cached.patch()
+    assert patch
+    assert patch.project.name == "new name"
+    assert patch.project.modified == project.modified
+    assert [ap.id for ap in patch.action_points] == ["ap1"]
+    assert [act.id for act in patch.action_points[0].actions] == ["ac1"]
+    assert patch.removed_action_points == ["ap2"]
+    assert patch.removed_logic == ["l1"]
+
+    patched = copy.deepcopy(project)
+    patch.apply(patched)
+    assert cached.project == UpdateableCachedProject(patched).project
+
+    cached.update_ap_modified("ap3")  # modified while saving
+    modified = datetime.now(tz=timezone.utc)
+    cached.saved(modified, version)
+
+    patch = cached.patch()
+    assert patch
+    assert patch.project.modified == modified
+    assert [ap.id for ap in patch.action_points] == ["ap3"]
+    assert not patch.removed_action_points
+
+    cached.update_modified()  # scope of the change is unknown
+    assert cached.patch() is None
+
+    assert UpdateableCachedProject(Project("p2", "p2", "s1")).patch() is None  # never saved
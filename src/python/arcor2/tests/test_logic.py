@@ -15,7 +15,7 @@ from arcor2.data.common import (
     SceneObject,
 )
 from arcor2.exceptions import Arcor2Exception
-from arcor2.logic import check_for_loops
+from arcor2.logic import LoopException, check_for_loops, check_logic_item_for_loops
 
 
 @pytest.fixture()
@@ -71,9 +71,11 @@ def test_project_with_loop(scene: Scene, project: UpdateableCachedProject) -> No
     project.upsert_logic_item(LogicItem("l4", "ac3", "ac4"))
     project.upsert_logic_item(LogicItem("l5", "ac4", "ac1"))
 
-    with pytest.raises(Arcor2Exception):
+    with pytest.raises(LoopException) as exc_info:
         check_for_loops(project)
 
+    assert exc_info.value.cycle == ["ac1", "ac2", "ac3", "ac4", "ac1"]
+
 
 def test_project_unfinished_logic_wo_loop(scene: Scene, project: UpdateableCachedProject) -> None:
 
@@ -88,3 +90,55 @@ def test_project_unfinished_logic_with_loop(scene: Scene, project: UpdateableCac
 
     with pytest.raises(Arcor2Exception):
         check_for_loops(project, "ac1")
+
+
+def test_project_diamonds_wo_loop(scene: Scene) -> None:
+
+    # many branches merging again - each action should be processed only once
+    project = Project("p1", "p1", "s1")
+    ap1 = ActionPoint("ap1", "ap1", Position())
+    project.action_points.append(ap1)
+
+    layers = 30
+
+    for idx in range(layers * 2 + 1):
+        ap1.actions.append(Action(f"ac{idx}", f"ac{idx}", "Test/test", flows=[Flow(outputs=["bool_res"])]))
+
+    cached = UpdateableCachedProject(project)
+    cached.upsert_logic_item(LogicItem("start", LogicItem.START, "ac0"))
+
+    for layer in range(layers):
+        start = f"ac{layer * 2}"
+        merge = f"ac{layer * 2 + 2}"
+        cached.upsert_logic_item(
+            LogicItem(f"l{layer}a", start, f"ac{layer * 2 + 1}", ProjectLogicIf(f"{start}/default/0", json.dumps(True)))
+        )
+        cached.upsert_logic_item(
+            LogicItem(f"l{layer}b", start, merge, ProjectLogicIf(f"{start}/default/0", json.dumps(False)))
+        )
+        cached.upsert_logic_item(LogicItem(f"l{layer}c", f"ac{layer * 2 + 1}", merge))
+
+    cached.upsert_logic_item(LogicItem("end", f"ac{layers * 2}", LogicItem.END))
+
+    check_for_loops(cached)
+
+
+def test_logic_item_for_loops(scene: Scene, project: UpdateableCachedProject) -> None:
+
+    project.upsert_logic_item(LogicItem("l1", LogicItem.START, "ac1"))
+    project.upsert_logic_item(LogicItem("l2", "ac1", "ac2"))
+    project.upsert_logic_item(LogicItem("l3", "ac2", "ac3"))
+
+    check_logic_item_for_loops(project, LogicItem("l4", "ac3", "ac4"))
+    check_logic_item_for_loops(project, LogicItem("l4", "ac3", LogicItem.END))
+
+    with pytest.raises(LoopException) as exc_info:
+        check_logic_item_for_loops(project, LogicItem("l4", "ac3", "ac1"))
+
+    assert exc_info.value.cycle == ["ac3", "ac1", "ac2", "ac3"]
+
+    # update of the existing item - its original connection is not taken into account
+    check_logic_item_for_loops(project, LogicItem("l3", "ac2", "ac4"))
+
+    with pytest.raises(LoopException):
+        check_logic_item_for_loops(project, LogicItem("l3", "ac2", "ac1"))
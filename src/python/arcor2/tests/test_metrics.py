@@ -0,0 +1,75 @@
+import pytest
+
+from arcor2 import metrics
+
+
+def test_render() -> None:
+
+    registry = metrics.Registry()
+
+    counter = metrics.Counter("requests_total", "Requests.", ["rpc"], registry=registry)
+    counter.inc("A")
+    counter.inc("A", amount=2)
+    counter.inc('B"')
+    assert counter.value("A") == 3
+
+    with pytest.raises(metrics.MetricsException):
+        counter.inc()
+
+    with pytest.raises(metrics.MetricsException):
+        counter.inc("A", amount=-1)
+
+    gauge = metrics.Gauge("clients", "Clients.", registry=registry)
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    hist = metrics.Histogram("duration_seconds", "Duration.", ["rpc"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 0.7, 5):
+        hist.observe(value, "A")
+    assert hist.count("A") == 4
+    assert hist.count("B") == 0
+
+    metrics.CallbackMetric("answer", "Answer.", lambda: 42, registry=registry)
+
+    with pytest.raises(metrics.MetricsException):
+        metrics.Gauge("clients", "Duplicate.", registry=registry)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{rpc="A"} 3.0',
+        'requests_total{rpc="B\\""} 1.0',
+        "# HELP clients Clients.",
+        "# TYPE clients gauge",
+        "clients 1.0",
+        "# HELP duration_seconds Duration.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{rpc="A",le="0.1"} 1.0',
+        'duration_seconds_bucket{rpc="A",le="1.0"} 3.0',
+        'duration_seconds_bucket{rpc="A",le="+Inf"} 4.0',
+        'duration_seconds_sum{rpc="A"} 6.25',
+        'duration_seconds_count{rpc="A"} 4.0',
+        "# HELP answer Answer.",
+        "# TYPE answer gauge",
+        "answer 42.0",
+    ]
+
+
+def test_histogram_nan() -> None:
+
+    registry = metrics.Registry()
+
+    hist = metrics.Histogram("duration_seconds", "Duration.", buckets=(0.1,), registry=registry)
+    hist.observe(0.05)
+    hist.observe(float("nan"))
+
+    samples = {(suffix, labels.get("le")): value for suffix, labels, value in hist.samples()}
+    assert samples[("_bucket", "+Inf")] == samples[("_count", None)] == 2
+    assert samples[("_bucket", "0.1")] == 1
+
+
+def test_abstract_metric() -> None:
+
+    with pytest.raises(TypeError):
+        metrics.Metric("abstract", "Abstract.", registry=metrics.Registry())  # type: ignore[abstract]
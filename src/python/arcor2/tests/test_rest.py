@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import http.server
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterator
+
+import aiohttp
+import humps
+import pytest
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2 import aio_rest, rest
+
+FILE_CONTENT = bytes(range(256)) * 1000
+ETAG = '"v1"'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if self.path.startswith("/file"):
+            body = FILE_CONTENT
+            range_header = self.headers.get("Range")
+            if range_header and self.path == "/file_with_ranges":
+                body = body[int(range_header[len("bytes=") : -1]) :]
+                self.send_response(206)
+            else:
+                self.send_response(200)
+        elif self.path.startswith("/versioned"):
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.send_header("ETag", ETAG)
+                self.end_headers()
+                return
+            body = json.dumps({"someValue": self.path}).encode()
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+        elif self.path.startswith("/error"):
+            body = json.dumps({"message": "Not found."}).encode()
+            self.send_response(404)
+        else:
+            body = json.dumps({"someValue": self.path}).encode()
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url() -> Iterator[str]:
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}"
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_connection_reuse(server_url: str) -> None:
+
+    rest.configure_pool(rest.PoolSettings())
+
+    for _ in range(10):
+        rest.call(rest.Method.GET, f"{server_url}/test")
+
+    stats = rest.pool_stats()[server_url]
+    assert stats.requests == 10
+    assert stats.connections == 1
+
+
+def test_connection_error() -> None:
+
+    rest.configure_pool(rest.PoolSettings(retries=0))
+
+    try:
+        with pytest.raises(rest.RestException):
+            rest.call(rest.Method.GET, "http://127.0.0.1:1")
+    finally:
+        rest.configure_pool(rest.PoolSettings())
+
+
+@dataclass
+class Value(JsonSchemaMixin):
+
+    some_value: str
+
+
+def test_aio_call(server_url: str) -> None:
+    async def run() -> None:
+
+        try:
+            values = await asyncio.gather(
+                *[aio_rest.call(rest.Method.GET, f"{server_url}/{idx}", return_type=Value) for idx in range(10)]
+            )
+            assert [v.some_value for v in values] == [f"/{idx}" for idx in range(10)]
+
+            with pytest.raises(rest.RestHttpException) as e:
+                await aio_rest.call(rest.Method.GET, f"{server_url}/error")
+
+            assert e.value.error_code == 404
+            assert str(e.value) == "Not found."
+        finally:
+            await aio_rest.close()
+
+    asyncio.run(run())
+
+
+def test_aio_session_per_loop(server_url: str) -> None:
+    async def call() -> aiohttp.ClientSession:
+
+        await aio_rest.call(rest.Method.GET, f"{server_url}/0", return_type=Value)
+        return await aio_rest._get_session()
+
+    first = asyncio.run(call())  # not closed by the caller
+    assert not first.closed
+
+    async def run() -> None:
+
+        try:
+            assert await call() is not first
+            assert first.closed
+            assert list(aio_rest._sessions) == [asyncio.get_event_loop()]
+        finally:
+            await aio_rest.close()
+
+        assert not aio_rest._sessions
+
+    asyncio.run(run())
+
+
+def test_get_if_modified(server_url: str) -> None:
+
+    value, validators = rest.get_if_modified(f"{server_url}/versioned", Value)
+    assert value == Value("/versioned")
+    assert validators == rest.Validators(ETAG)
+
+    value, validators = rest.get_if_modified(f"{server_url}/versioned", Value, validators)
+    assert value is None
+    assert validators == rest.Validators(ETAG)
+
+    async def run() -> None:
+
+        try:
+            assert await aio_rest.get_if_modified(f"{server_url}/versioned", Value, validators) == (None, validators)
+            assert await aio_rest.get_if_modified(f"{server_url}/versioned", Value) == (Value("/versioned"), validators)
+        finally:
+            await aio_rest.close()
+
+    asyncio.run(run())
+
+
+def aio_download(*args, **kwargs) -> str:
+    async def run() -> str:
+        try:
+            return await aio_rest.download(*args, **kwargs)
+        finally:
+            await aio_rest.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("download", [rest.download, aio_download])
+@pytest.mark.parametrize("resource", ["file", "file_with_ranges"])
+def test_download(server_url: str, resource: str, download, tmp_path) -> None:
+
+    checksum = hashlib.sha256(FILE_CONTENT).hexdigest()
+    path = str(tmp_path / "file.bin")
+
+    assert download(f"{server_url}/{resource}", path, checksum=checksum) == checksum
+
+    with open(path, "rb") as file:
+        assert file.read() == FILE_CONTENT
+
+    # simulate interrupted download
+    with open(rest.part_path(path), "wb") as file:
+        file.write(FILE_CONTENT[:1234])
+
+    assert download(f"{server_url}/{resource}", path, resume=True) == checksum
+    assert not os.path.exists(rest.part_path(path))
+
+    with open(path, "rb") as file:
+        assert file.read() == FILE_CONTENT
+
+    # the existing file is kept when the download fails
+    with pytest.raises(rest.RestException):
+        download(f"{server_url}/{resource}", path, checksum="abc")
+
+    with pytest.raises(rest.RestException):
+        download(f"{server_url}/error", path)
+
+    with open(path, "rb") as file:
+        assert file.read() == FILE_CONTENT
+
+    assert not os.path.exists(rest.part_path(path)) or not os.path.getsize(rest.part_path(path))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"some_key": [{"nested_key": 1, "id": "some_id"}, 1, "str_value"], "1": 2, "ABC": None, "sizeX": 1.0},
+        [{"some_key": {}}, []],
+    ],
+)
+def test_camelize(data) -> None:
+
+    camelized = rest.camelize(data)
+    assert camelized == humps.camelize(data)
+    assert rest.decamelize(camelized) == humps.decamelize(camelized)
+    assert rest.loads(rest.dumps(camelized)) == camelized
@@ -1,20 +1,33 @@
 # -*- coding: utf-8 -*-
 
 import copy
+from typing import List
 
+import numpy as np
 import pytest
 import quaternion
 
-from arcor2.cached import CachedProject, CachedScene
-from arcor2.data.common import ActionPoint, Orientation, Pose, Position, Project, Scene, SceneObject
+from arcor2.cached import CachedProject, CachedScene, UpdateableCachedProject, UpdateableCachedScene
+from arcor2.data.common import ActionPoint, NamedOrientation, Orientation, Pose, Position, Project, Scene, SceneObject
 from arcor2.exceptions import Arcor2Exception
 from arcor2.transformations import (
+    abs_pose_from_ap_orientation,
+    action_point_roots,
+    array_to_poses,
     make_global_ap_relative,
     make_orientation_abs,
     make_orientation_rel,
     make_pose_abs,
     make_pose_rel,
+    make_pose_rel_to_parent,
+    make_poses_abs,
+    make_poses_rel,
     make_relative_ap_global,
+    make_relative_aps_global,
+    matrices_to_pose_array,
+    pose_array_to_matrices,
+    poses_to_array,
+    transform_tree,
 )
 
 
@@ -140,3 +153,163 @@ def test_make_relative_ap_global_and_relative_again() -> None:
 
     with pytest.raises(Arcor2Exception):
         make_relative_ap_global(cached_scene, cached_project, ap3)
+
+
+def _random_poses(rng: np.random.Generator, count: int) -> List[Pose]:
+    return [Pose(Position(*rng.uniform(-1, 1, 3)), Orientation(*rng.uniform(-1, 1, 4))) for _ in range(count)]
+
+
+def _assert_poses_equal(poses: List[Pose], arr: np.ndarray) -> None:
+
+    for pose, res in zip(poses, array_to_poses(arr)):
+        assert np.allclose(list(pose.position), list(res.position))
+        # q and -q represent the same rotation
+        assert np.isclose(abs(np.dot(list(pose.orientation), list(res.orientation))), 1.0)
+
+
+def test_make_poses_abs_and_rel() -> None:
+
+    rng = np.random.default_rng(42)
+    parents = _random_poses(rng, 20)
+    children = _random_poses(rng, 20)
+
+    parents_arr = poses_to_array(parents)
+    children_arr = poses_to_array(children)
+
+    abs_arr = make_poses_abs(parents_arr, children_arr)
+    _assert_poses_equal([make_pose_abs(parent, child) for parent, child in zip(parents, children)], abs_arr)
+
+    rel_arr = make_poses_rel(parents_arr, children_arr)
+    _assert_poses_equal([make_pose_rel(parent, child) for parent, child in zip(parents, children)], rel_arr)
+
+    _assert_poses_equal(children, make_poses_rel(parents_arr, abs_arr))
+
+    # a single parent for all children
+    _assert_poses_equal(
+        [make_pose_abs(parents[0], child) for child in children], make_poses_abs(parents_arr[0], children_arr)
+    )
+
+    # transformation matrices
+    abs_mat = make_poses_abs(pose_array_to_matrices(parents_arr), pose_array_to_matrices(children_arr))
+    assert abs_mat.shape == (20, 4, 4)
+    _assert_poses_equal(array_to_poses(abs_arr), matrices_to_pose_array(abs_mat))
+
+    with pytest.raises(Arcor2Exception):
+        make_poses_abs(np.zeros(7), children_arr)
+
+
+def test_make_relative_aps_global() -> None:
+
+    scene = Scene("s1", "s1")
+    scene.objects.append(
+        SceneObject("so1", "so1", "WhatEver", Pose(Position(3, 1, 0), Orientation(0, 0, 0.7071068, 0.7071068)))
+    )
+    cached_scene = CachedScene(scene)
+
+    project = Project("p1", "p1", "s1")
+    project.action_points.append(ActionPoint("ap1", "ap1", Position(-1, 0, 0), parent="so1"))
+    project.action_points.append(
+        ActionPoint(
+            "ap2", "ap2", Position(-1, 0.5, 0), parent="ap1", orientations=[NamedOrientation("o1", "o1", Orientation())]
+        )
+    )
+    project.action_points.append(ActionPoint("ap3", "ap3", Position(0, 0, 1), parent="ap2"))
+    project.action_points.append(ActionPoint("ap4", "ap4", Position(1, 2, 3)))
+
+    # each AP converted separately, with all the parents still being relative
+    expected = {}
+    for ap in project.action_points:
+        expected_project = CachedProject(copy.deepcopy(project))
+        make_relative_ap_global(cached_scene, expected_project, expected_project.bare_action_point(ap.id))
+        expected[ap.id] = expected_project
+
+    cached_project = CachedProject(project)
+    make_relative_aps_global(cached_scene, cached_project)
+
+    for ap in cached_project.action_points:
+        assert ap.parent is None
+        assert np.allclose(list(ap.position), list(expected[ap.id].bare_action_point(ap.id).position))
+
+    assert np.allclose(list(cached_project.bare_action_point("ap2").position), [2.5, -1, 0])
+    assert np.allclose(
+        list(cached_project.ap_orientations("ap2")[0].orientation),
+        list(expected["ap2"].ap_orientations("ap2")[0].orientation),
+    )
+
+
+def test_action_point_roots() -> None:
+
+    cached_scene = CachedScene(Scene("s1", "s1"))
+
+    project = Project("p1", "p1", "s1")
+    project.action_points.append(ActionPoint("ap1", "ap1", Position(), parent="ap2"))
+    project.action_points.append(ActionPoint("ap2", "ap2", Position(), parent="ap1"))
+
+    with pytest.raises(Arcor2Exception, match="loop"):
+        action_point_roots(cached_scene, CachedProject(project))
+
+    project.action_points[1].parent = "something_unknown"
+
+    with pytest.raises(Arcor2Exception, match="parent not available"):
+        action_point_roots(cached_scene, CachedProject(project))
+
+    project.action_points[1].parent = None
+    roots = action_point_roots(cached_scene, CachedProject(project))
+    assert roots["ap1"][0] is None
+
+
+def test_transform_tree() -> None:
+
+    scene = UpdateableCachedScene(Scene("s1", "s1"))
+    scene.upsert_object(
+        SceneObject("so1", "so1", "WhatEver", Pose(Position(3, 1, 0), Orientation(0, 0, 0.7071068, 0.7071068)))
+    )
+
+    project = UpdateableCachedProject(Project("p1", "p1", "s1"))
+    project.upsert_action_point("ap1", "ap1", Position(-1, 0, 0), "so1")
+    project.upsert_action_point("ap2", "ap2", Position(-1, 0.5, 0), "ap1")
+    project.upsert_orientation("ap2", NamedOrientation("o1", "o1", Orientation()))
+
+    tree = transform_tree(scene, project)
+    assert transform_tree(scene, project) is tree
+
+    assert np.allclose(list(tree.world_pose("ap1").position), [3, 0, 0])
+    assert np.allclose(list(tree.world_pose("ap2").position), [2.5, -1, 0])
+
+    pose = abs_pose_from_ap_orientation(scene, project, "o1")
+    assert np.allclose(list(pose.position), [2.5, -1, 0])
+    assert np.allclose(list(pose.orientation), [0, 0, 0.7071068, 0.7071068])
+
+    rel = make_pose_rel_to_parent(scene, project, pose, "ap1")
+    assert np.allclose(list(rel.position), [-1, 0.5, 0])
+    assert np.allclose(list(rel.orientation), [0, 0, 0, 1])
+
+    # only the subtree is invalidated
+    world_ap1 = tree.world_pose("ap1")
+    project.update_ap_position("ap2", Position(0, 0, 1))
+    assert tree.world_pose("ap1") is world_ap1
+    assert np.allclose(list(tree.world_pose("ap2").position), [3, 0, 1])
+
+    so1 = scene.object("so1")
+    assert so1.pose
+    so1.pose.position.x = 100  # cached poses are copies, the change is not visible until invalidated
+    assert np.allclose(list(tree.world_pose("ap2").position), [3, 0, 1])
+
+    so1.pose = Pose(Position(), Orientation())
+    scene.update_object_modified(so1.id)
+    assert np.allclose(list(tree.world_pose("ap2").position), [-1, 0, 1])
+
+    # changed parent
+    project.upsert_action_point("ap2", "ap2", Position(0, 0, 1), "so1")
+    assert np.allclose(list(tree.world_pose("ap2").position), [0, 0, 1])
+
+    project.upsert_action_point("ap1", "ap1", Position(-1, 0, 0), "ap2")
+    project.upsert_action_point("ap2", "ap2", Position(0, 0, 1), "ap1")
+
+    with pytest.raises(Arcor2Exception, match="loop"):
+        tree.world_pose("ap1")
+
+    project.remove_action_point("ap1")
+
+    with pytest.raises(Arcor2Exception):
+        tree.world_pose("ap2")
@@ -0,0 +1,240 @@
+import asyncio
+import functools
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import aiohttp
+import pytest
+import websockets
+
+from arcor2 import ws_server
+from arcor2.data.rpc.common import RPC, IdArgs, Version
+from arcor2.exceptions import Arcor2Exception
+from arcor2.helpers import find_free_port
+from arcor2.logging import get_aiologger
+
+
+async def version_cb(req: Version.Request, client) -> Version.Response:
+    return Version.Response(data=Version.Response.Data("1.0.0"))
+
+
+async def nothing(client) -> None:
+    pass
+
+
+class Sleep(RPC):
+    @dataclass
+    class Request(RPC.Request):
+        args: IdArgs
+
+
+class Invalid(RPC):
+    @dataclass
+    class Request(RPC.Request):
+        def __post_init__(self) -> None:
+            raise Arcor2Exception("Invalid request.")
+
+
+FINISHED: List[str] = []
+
+
+@ws_server.rpc_resources(lambda req: req.args.id)
+async def sleep_cb(req: Sleep.Request, client) -> None:
+    await asyncio.sleep(0.2)
+    FINISHED.append(req.args.id)
+
+
+def run(test, **kwargs) -> None:
+    async def wrapper() -> None:
+
+        port = find_free_port()
+        server = await ws_server.serve(
+            functools.partial(
+                ws_server.server,
+                logger=get_aiologger("test"),
+                register=nothing,
+                unregister=nothing,
+                rpc_dict={
+                    Version.__name__: (Version, version_cb),
+                    Sleep.__name__: (Sleep, sleep_cb),
+                    Invalid.__name__: (Invalid, version_cb),
+                },
+                **kwargs,
+            ),
+            "127.0.0.1",
+            port,
+        )
+
+        try:
+            await test(f"ws://127.0.0.1:{port}")
+        finally:
+            # let the server finish connections (e.g. plain HTTP requests) first
+            for _ in range(100):
+                if not server.websockets:
+                    break
+                await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(wrapper())
+
+
+def test_json() -> None:
+    async def test(uri: str) -> None:
+
+        # a client not aware of subprotocols gets JSON
+        async with websockets.connect(uri, compression=None) as client:
+
+            assert client.subprotocol is None
+            assert not client.extensions
+
+            await client.send(Version.Request(1).to_json())
+            resp = Version.Response.from_dict(json.loads(await client.recv()))
+            assert resp.id == 1
+            assert resp.result
+            assert resp.data and resp.data.version == "1.0.0"
+
+        async with ws_server.connect(uri, use_binary=False) as client:
+
+            assert client.subprotocol == ws_server.JSON_SUBPROTOCOL
+            assert [ext.name for ext in client.extensions] == ["permessage-deflate"]
+
+            await client.send(ws_server.Payload(Version.Request(2)).for_client(client))
+            assert isinstance(await client.recv(), str)
+
+    run(test)
+
+
+def test_binary() -> None:
+
+    pytest.importorskip("msgpack")
+
+    async def test(uri: str) -> None:
+
+        async with ws_server.connect(uri) as client:
+
+            assert client.subprotocol == ws_server.MSGPACK_SUBPROTOCOL
+
+            await client.send(ws_server.Payload(Version.Request(1)).for_client(client))
+            message = await client.recv()
+            assert isinstance(message, bytes)
+            assert Version.Response.from_dict(ws_server.decode(message)).id == 1
+
+    run(test)
+
+
+def test_payload() -> None:
+
+    req = Version.Request(1)
+    payload = ws_server.Payload(req)
+    assert payload.json is payload.json
+    assert ws_server.decode(payload.json) == req.to_dict()
+    assert ws_server.Payload(payload.json).json is payload.json
+
+    with pytest.raises(ws_server.WsServerException):
+        ws_server.decode("{")
+
+
+def test_payload_fallback() -> None:
+
+    pytest.importorskip("msgpack")
+
+    # too big for MessagePack
+    payload = ws_server.Payload(Version.Request(2**100))
+    assert payload.encode(binary=True) is payload.json
+    assert isinstance(ws_server.Payload(Version.Request(1)).encode(binary=True), bytes)
+
+
+def test_concurrency() -> None:
+
+    FINISHED.clear()
+
+    async def test(uri: str) -> None:
+
+        async with ws_server.connect(uri) as client:
+
+            for idx, res in enumerate(("robot/1", "robot/2", "robot/1")):
+                await client.send(ws_server.Payload(Sleep.Request(idx, IdArgs(res))).for_client(client))
+            await client.send(ws_server.Payload(Version.Request(3)).for_client(client))
+
+            # the fast RPC is not blocked by the slow ones, RPCs using the same resource are serialized
+            ids = [ws_server.decode(await client.recv())["id"] for _ in range(4)]
+            assert ids[0] == 3
+            assert set(ids[1:3]) == {0, 1}
+            assert ids[3] == 2
+
+        assert FINISHED in (["robot/1", "robot/2", "robot/1"], ["robot/2", "robot/1", "robot/1"])
+        assert "robot/1" not in ws_server.RESOURCE_LOCKS  # unused locks are removed
+
+    run(test, concurrency=4)
+
+
+def test_resource_locks() -> None:
+
+    locks = ws_server.ResourceLocks()
+    order: List[str] = []
+
+    async def worker(name: str, resources: List[str]) -> None:
+        async with locks.acquire(resources):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def run_workers() -> None:
+        # resources are locked in the same order, so there is no deadlock
+        await asyncio.gather(worker("a", ["scene", "project"]), worker("b", ["project", "scene"]))
+
+    asyncio.run(run_workers())
+
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert "scene" not in locks
+
+
+def test_metrics() -> None:
+    async def test(uri: str) -> None:
+
+        requests = ws_server.RPC_REQUESTS.value(Version.__name__)
+
+        async with ws_server.connect(uri, use_binary=False) as client:
+            await client.send(ws_server.Payload(Version.Request(1)).for_client(client))
+            await client.recv()
+
+        assert ws_server.RPC_REQUESTS.value(Version.__name__) == requests + 1
+        assert ws_server.RPC_DURATION.count(Version.__name__) >= 1
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(uri.replace("ws://", "http://") + ws_server.METRICS_PATH) as resp:
+                assert resp.status == 200
+                body = await resp.text()
+
+        assert f'arcor2_rpc_requests_total{{rpc="Version"}} {requests + 1}' in body
+        assert "# TYPE arcor2_rpc_duration_seconds histogram" in body
+
+    run(test)
+
+
+def test_send_callback() -> None:
+
+    sent: List[Dict[str, Any]] = []
+
+    async def send(client, payload: ws_server.Payload) -> None:
+
+        sent.append(json.loads(payload.for_client(client)))
+        await ws_server.send_to_client(client, payload)
+
+    async def test(uri: str) -> None:
+
+        async with ws_server.connect(uri, use_binary=False) as client:
+
+            for req_id, request in enumerate((Version.__name__, Invalid.__name__)):
+                await client.send(json.dumps({"request": request, "id": req_id}))
+                await client.recv()
+
+    run(test, send=send)
+
+    # also the response to a request failing validation goes through the callback
+    assert [(resp["id"], resp["result"], resp.get("messages")) for resp in sent] == [
+        (0, True, None),
+        (1, False, ["Invalid request."]),
+    ]
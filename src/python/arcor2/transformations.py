@@ -1,5 +1,11 @@
+import copy
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
 from arcor2.cached import CachedProject as CProject
 from arcor2.cached import CachedScene as CScene
+from arcor2.data import lite
 from arcor2.data.common import BareActionPoint, Orientation, Pose, Position
 from arcor2.exceptions import Arcor2Exception
 
@@ -16,9 +22,14 @@ def make_position_rel(parent: Position, child: Position) -> Position:
 
 def make_orientation_rel(parent: Orientation, child: Orientation) -> Orientation:
 
-    p = Orientation()
-    p.set_from_quaternion(child.as_quaternion() / parent.as_quaternion())
-    return p
+    return (
+        (
+            lite.LiteOrientation.from_orientation(child).normalized()
+            * lite.LiteOrientation.from_orientation(parent).normalized().conjugate()
+        )
+        .normalized()
+        .to_orientation()
+    )
 
 
 def make_pose_rel(parent: Pose, child: Pose) -> Pose:
@@ -28,10 +39,7 @@ def make_pose_rel(parent: Pose, child: Pose) -> Pose:
     :return: relative pose
     """
 
-    p = Pose()
-    p.position = make_position_rel(parent.position, child.position).rotated(parent.orientation, True)
-    p.orientation = make_orientation_rel(parent.orientation, child.orientation)
-    return p
+    return lite.make_pose_rel(lite.LitePose.from_pose(parent), lite.LitePose.from_pose(child)).to_pose()
 
 
 def make_position_abs(parent: Position, child: Position) -> Position:
@@ -45,9 +53,14 @@ def make_position_abs(parent: Position, child: Position) -> Position:
 
 def make_orientation_abs(parent: Orientation, child: Orientation) -> Orientation:
 
-    p = Orientation()
-    p.set_from_quaternion(child.as_quaternion() * parent.as_quaternion().conjugate().inverse())
-    return p
+    return (
+        (
+            lite.LiteOrientation.from_orientation(child).normalized()
+            * lite.LiteOrientation.from_orientation(parent).normalized()
+        )
+        .normalized()
+        .to_orientation()
+    )
 
 
 def make_pose_abs(parent: Pose, child: Pose) -> Pose:
@@ -57,11 +70,163 @@ def make_pose_abs(parent: Pose, child: Pose) -> Pose:
     :return: absolute pose
     """
 
-    p = Pose()
-    p.position = child.position.rotated(parent.orientation)
-    p.position = make_position_abs(parent.position, p.position)
-    p.orientation = make_orientation_abs(parent.orientation, child.orientation)
-    return p
+    return lite.make_pose_abs(lite.LitePose.from_pose(parent), lite.LitePose.from_pose(child)).to_pose()
+
+
+class TransformTree:
+    """Scene objects and action points (APs) as a tree, with world poses
+    cached.
+
+    Scene objects are roots of the tree, as objects can't have a parent (yet). When pose or parent of an
+    object/AP changes (see PoseSubscribers), only the cached poses of its subtree are dropped. Poses are cached as
+    copies, so in-place changes take effect only after the invalidation. Returned poses must not be modified.
+    """
+
+    def __init__(self, scene: CScene, project: CProject) -> None:
+
+        self.scene = scene
+        self.project = project
+
+        self._world: Dict[str, Pose] = {}
+        self._parents: Dict[str, Optional[str]] = {}  # AP ID -> parent ID
+        self._children: Dict[str, Set[str]] = {}  # parent ID -> AP IDs
+
+        self._index_all()
+
+        scene.subscribe_poses(self.invalidate)
+        project.subscribe_poses(self.invalidate)
+
+    def detach(self) -> None:
+
+        self.scene.unsubscribe_poses(self.invalidate)
+        self.project.unsubscribe_poses(self.invalidate)
+
+    def _index_all(self) -> None:
+
+        self._world.clear()
+        self._parents.clear()
+        self._children.clear()
+
+        for ap in self.project.action_points:
+            self._index(ap.id, ap.parent)
+
+    def _index(self, ap_id: str, parent_id: Optional[str]) -> None:
+
+        self._unindex(ap_id)
+        self._parents[ap_id] = parent_id
+
+        if parent_id:
+            self._children.setdefault(parent_id, set()).add(ap_id)
+
+    def _unindex(self, ap_id: str) -> None:
+
+        parent_id = self._parents.pop(ap_id, None)
+
+        if parent_id:
+            children = self._children[parent_id]
+            children.discard(ap_id)
+            if not children:
+                del self._children[parent_id]
+
+    def invalidate(self, item_id: Optional[str] = None) -> None:
+        """Drops cached poses of the object/AP and of all its descendants.
+
+        :param item_id: None to drop everything.
+        :return:
+        """
+
+        if item_id is None:
+            self._index_all()
+            return
+
+        try:
+            parent_id = self.project.bare_action_point(item_id).parent
+        except Arcor2Exception:
+            self._unindex(item_id)  # not an AP (anymore)
+        else:
+            if item_id not in self._parents or self._parents[item_id] != parent_id:
+                self._index(item_id, parent_id)
+
+        visited: Set[str] = set()  # parents might form a loop
+        stack = [item_id]
+
+        while stack:
+            node_id = stack.pop()
+            if node_id not in visited:
+                visited.add(node_id)
+                self._world.pop(node_id, None)
+                stack.extend(self._children.get(node_id, ()))
+
+    def world_pose(self, item_id: str) -> Pose:
+        """Pose of the object/AP in the world (scene) frame.
+
+        As APs don't have orientation, it is the orientation of the
+        object at the root.
+        """
+
+        chain: List[BareActionPoint] = []
+        chain_ids: Set[str] = set()
+        current = item_id
+
+        while current not in self._world:
+
+            try:
+                ap = self.project.bare_action_point(current)
+            except Arcor2Exception:
+                try:
+                    obj = self.scene.object(current)
+                except Arcor2Exception:
+                    raise Arcor2Exception("Unknown parent_id.")
+
+                if not obj.pose:
+                    raise Arcor2Exception("Parent object does not have pose!")
+
+                self._world[current] = copy.deepcopy(obj.pose)
+                break
+
+            if current in chain_ids:
+                raise Arcor2Exception(f"Parents of action point {ap.name} form a loop.")
+
+            chain.append(ap)
+            chain_ids.add(current)
+
+            if not ap.parent:
+                self._world[current] = Pose(copy.copy(ap.position), Orientation())
+                chain.pop()
+                break
+
+            current = ap.parent
+
+        for ap in reversed(chain):
+            assert ap.parent
+            self._world[ap.id] = make_pose_abs(self._world[ap.parent], Pose(ap.position, Orientation()))
+
+        return self._world[item_id]
+
+    def orientation_pose(self, orientation_id: str) -> Pose:
+        """Absolute pose of the AP orientation."""
+
+        ap, ori = self.project.bare_ap_and_orientation(orientation_id)
+        return make_pose_abs(self.world_pose(ap.id), Pose(Position(), ori.orientation))
+
+    def pose_rel_to(self, pose: Pose, parent_id: str) -> Pose:
+        """Transforms global pose into pose relative to the object/AP."""
+        return make_pose_rel(self.world_pose(parent_id), pose)
+
+
+def transform_tree(scene: CScene, project: CProject) -> TransformTree:
+    """Returns tree of the project (created when needed)."""
+
+    tree = project.transform_tree
+
+    if tree is None or tree.scene is not scene:
+
+        if tree is not None:
+            tree.detach()
+
+        tree = project.transform_tree = TransformTree(scene, project)
+
+    return tree
 
 
 def make_relative_ap_global(scene: CScene, project: CProject, ap: BareActionPoint) -> None:
@@ -76,27 +241,14 @@ def make_relative_ap_global(scene: CScene, project: CProject, ap: BareActionPoin
     if not ap.parent:
         return
 
-    if ap.parent in scene.object_ids:
-        parent_obj = scene.object(ap.parent)
-        if not parent_obj.pose:
-            raise Arcor2Exception("Parent object does not have pose!")
-        old_parent_pose = parent_obj.pose
-    elif ap.parent in project.action_points_ids:
-        old_parent_pose = Pose(project.bare_action_point(ap.parent).position, Orientation())
-    else:
-        raise Arcor2Exception("AP has unknown parent_id.")
+    parent_pose = transform_tree(scene, project).world_pose(ap.parent)
 
-    ap.position = make_pose_abs(old_parent_pose, Pose(ap.position, Orientation())).position
+    ap.position = make_pose_abs(parent_pose, Pose(ap.position, Orientation())).position
     for ori in project.ap_orientations(ap.id):
-        ori.orientation = make_orientation_abs(old_parent_pose.orientation, ori.orientation)
-
-    if ap.parent in project.action_points_ids:
-        parent_ap = project.bare_action_point(ap.parent)
-        if parent_ap.parent:
-            ap.parent = parent_ap.parent
-            make_relative_ap_global(scene, project, ap)
+        ori.orientation = make_orientation_abs(parent_pose.orientation, ori.orientation)
 
     ap.parent = None
+    project.poses_changed(ap.id)
 
 
 def make_global_ap_relative(scene: CScene, project: CProject, ap: BareActionPoint, parent_id: str) -> None:
@@ -112,28 +264,14 @@ def make_global_ap_relative(scene: CScene, project: CProject, ap: BareActionPoin
 
     assert project.scene_id == scene.id
 
-    if parent_id in scene.object_ids:
-        parent_obj = scene.object(parent_id)
-        if not parent_obj.pose:
-            raise Arcor2Exception("Parent object does not have pose!")
-        new_parent_pose = parent_obj.pose
-    elif parent_id in project.action_points_ids:
-
-        parent_ap = project.bare_action_point(parent_id)
-
-        if parent_ap.parent:
-            make_global_ap_relative(scene, project, ap, parent_ap.parent)
-
-        new_parent_pose = Pose(parent_ap.position, Orientation())
-
-    else:
-        raise Arcor2Exception("Unknown parent_id.")
+    parent_pose = transform_tree(scene, project).world_pose(parent_id)
 
-    ap.position = make_pose_rel(new_parent_pose, Pose(ap.position, Orientation())).position
+    ap.position = make_pose_rel(parent_pose, Pose(ap.position, Orientation())).position
     for ori in project.ap_orientations(ap.id):
-        ori.orientation = make_orientation_rel(new_parent_pose.orientation, ori.orientation)
+        ori.orientation = make_orientation_rel(parent_pose.orientation, ori.orientation)
 
     ap.parent = parent_id
+    project.poses_changed(ap.id)
 
 
 def make_pose_rel_to_parent(scene: CScene, project: CProject, pose: Pose, parent_id: str) -> Pose:
@@ -147,60 +285,334 @@ def make_pose_rel_to_parent(scene: CScene, project: CProject, pose: Pose, parent
     :return:
     """
 
-    if parent_id in scene.object_ids:
-        parent_obj = scene.object(parent_id)
-        if not parent_obj.pose:
-            raise Arcor2Exception("Parent object does not have pose!")
-        parent_pose = parent_obj.pose
-    elif parent_id in project.action_points_ids:
+    return transform_tree(scene, project).pose_rel_to(pose, parent_id)
 
-        parent_ap = project.bare_action_point(parent_id)
 
-        if parent_ap.parent:
-            pose = make_pose_rel_to_parent(scene, project, pose, parent_ap.parent)
+def abs_pose_from_ap_orientation(scene: CScene, project: CProject, orientation_id: str) -> Pose:
+    """Returns absolute Pose without modifying anything within the project.
+
+    :param orientation_id:
+    :return:
+    """
 
-        parent_pose = Pose(parent_ap.position, Orientation())
+    return transform_tree(scene, project).orientation_pose(orientation_id)
+
+
+# Batch API - N poses as Nx7 (x, y, z, qx, qy, qz, qw) or Nx4x4 (transformation matrices) arrays.
+# Conventions are the same as for make_pose_abs / make_pose_rel.
+
+
+def poses_to_array(poses: Iterable[Pose]) -> np.ndarray:
+    """Returns Nx7 array (x, y, z, qx, qy, qz, qw)."""
+
+    return np.array(
+        [
+            (
+                p.position.x,
+                p.position.y,
+                p.position.z,
+                p.orientation.x,
+                p.orientation.y,
+                p.orientation.z,
+                p.orientation.w,
+            )
+            for p in poses
+        ],
+        dtype=float,
+    ).reshape(-1, 7)
+
+
+def array_to_poses(arr: np.ndarray) -> List[Pose]:
+    """Converts Nx7 or Nx4x4 array into poses."""
+
+    return [
+        Pose(Position(row[0], row[1], row[2]), Orientation(row[3], row[4], row[5], row[6]))
+        for row in _as_pose_array(arr).tolist()
+    ]
+
+
+def _normalized(q: np.ndarray) -> np.ndarray:
+
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+
+    if not np.all(norm > 0) or not np.all(np.isfinite(norm)):
+        raise Arcor2Exception("Invalid quaternion.")
+
+    return q / norm
+
+
+def _conjugate(q: np.ndarray) -> np.ndarray:
+    return q * np.array([-1.0, -1.0, -1.0, 1.0])
+
+
+def _multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Hamilton product of (x, y, z, w) quaternions."""
+
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+
+    return np.stack(
+        (
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw,
+            aw * bw - ax * bx - ay * by - az * bz,
+        ),
+        axis=-1,
+    )
+
+
+def _rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Rotates vectors by unit quaternions."""
+
+    u = q[..., :3]
+    t = 2.0 * np.cross(u, v)
+    return v + q[..., 3:] * t + np.cross(u, t)
 
-    else:
-        raise Arcor2Exception("Unknown parent_id.")
 
-    return make_pose_rel(parent_pose, pose)
+def pose_array_to_matrices(arr: np.ndarray) -> np.ndarray:
+    """Converts Nx7 array into Nx4x4 transformation matrices."""
 
+    arr = np.asarray(arr, dtype=float)
+    x, y, z, w = np.moveaxis(_normalized(arr[..., 3:]), -1, 0)
 
-# TODO mostly duplicate of make_pose_rel_to_parent
-def _abs_pose_from_ap_orientation(scene: CScene, project: CProject, pose: Pose, parent_id: str) -> Pose:
+    mat = np.zeros(arr.shape[:-1] + (4, 4))
 
-    if parent_id in scene.object_ids:
-        parent_obj = scene.object(parent_id)
-        if not parent_obj.pose:
-            raise Arcor2Exception("Parent object does not have pose!")
-        parent_pose = parent_obj.pose
-    elif parent_id in project.action_points_ids:
+    mat[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    mat[..., 0, 1] = 2 * (x * y - z * w)
+    mat[..., 0, 2] = 2 * (x * z + y * w)
+    mat[..., 1, 0] = 2 * (x * y + z * w)
+    mat[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    mat[..., 1, 2] = 2 * (y * z - x * w)
+    mat[..., 2, 0] = 2 * (x * z - y * w)
+    mat[..., 2, 1] = 2 * (y * z + x * w)
+    mat[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    mat[..., :3, 3] = arr[..., :3]
+    mat[..., 3, 3] = 1
 
-        parent_ap = project.bare_action_point(parent_id)
+    return mat
 
-        if parent_ap.parent:
-            pose = _abs_pose_from_ap_orientation(scene, project, pose, parent_ap.parent)
 
-        parent_pose = Pose(parent_ap.position, Orientation())
+def matrices_to_pose_array(mat: np.ndarray) -> np.ndarray:
+    """Converts Nx4x4 transformation matrices into Nx7 array."""
 
+    mat = np.asarray(mat, dtype=float)
+    r = mat[..., :3, :3]
+
+    # quaternion from each of the four possible (numerically stable) branches, the one with the largest
+    # denominator is used
+    m00, m11, m22 = r[..., 0, 0], r[..., 1, 1], r[..., 2, 2]
+    candidates = np.stack(
+        (
+            np.stack(
+                (
+                    1 + m00 - m11 - m22,
+                    r[..., 1, 0] + r[..., 0, 1],
+                    r[..., 0, 2] + r[..., 2, 0],
+                    r[..., 2, 1] - r[..., 1, 2],
+                ),
+                axis=-1,
+            ),
+            np.stack(
+                (
+                    r[..., 1, 0] + r[..., 0, 1],
+                    1 - m00 + m11 - m22,
+                    r[..., 2, 1] + r[..., 1, 2],
+                    r[..., 0, 2] - r[..., 2, 0],
+                ),
+                axis=-1,
+            ),
+            np.stack(
+                (
+                    r[..., 0, 2] + r[..., 2, 0],
+                    r[..., 2, 1] + r[..., 1, 2],
+                    1 - m00 - m11 + m22,
+                    r[..., 1, 0] - r[..., 0, 1],
+                ),
+                axis=-1,
+            ),
+            np.stack(
+                (
+                    r[..., 2, 1] - r[..., 1, 2],
+                    r[..., 0, 2] - r[..., 2, 0],
+                    r[..., 1, 0] - r[..., 0, 1],
+                    1 + m00 + m11 + m22,
+                ),
+                axis=-1,
+            ),
+        ),
+        axis=-2,
+    )
+
+    diagonal = np.stack(
+        (candidates[..., 0, 0], candidates[..., 1, 1], candidates[..., 2, 2], candidates[..., 3, 3]), -1
+    )
+    best = np.take_along_axis(candidates, np.argmax(diagonal, axis=-1)[..., None, None], axis=-2)[..., 0, :]
+
+    return np.concatenate((mat[..., :3, 3], _normalized(best)), axis=-1)
+
+
+def _as_pose_array(arr: np.ndarray) -> np.ndarray:
+
+    arr = np.asarray(arr, dtype=float)
+
+    if arr.shape[-2:] == (4, 4):
+        return matrices_to_pose_array(arr)
+
+    if arr.shape[-1] != 7:
+        raise Arcor2Exception("Poses have to be given as Nx7 or Nx4x4 array.")
+
+    return arr
+
+
+def _batch(parents: np.ndarray, children: np.ndarray, absolute: bool) -> np.ndarray:
+
+    children = np.asarray(children, dtype=float)
+    matrices = children.shape[-2:] == (4, 4)
+
+    parent_arr = _as_pose_array(parents)
+    child_arr = _as_pose_array(children)
+
+    parent_q = _normalized(parent_arr[..., 3:])
+    child_q = _normalized(child_arr[..., 3:])
+
+    if absolute:
+        position = parent_arr[..., :3] + _rotate(parent_q, child_arr[..., :3])
+        orientation = _multiply(child_q, parent_q)
     else:
-        raise Arcor2Exception("Unknown parent_id.")
+        position = _rotate(_conjugate(parent_q), child_arr[..., :3] - parent_arr[..., :3])
+        orientation = _multiply(child_q, _conjugate(parent_q))
 
-    return make_pose_abs(parent_pose, pose)
+    orientation = _normalized(orientation)
+    shape = np.broadcast(position[..., 0], orientation[..., 0]).shape
+    res = np.concatenate((np.broadcast_to(position, shape + (3,)), np.broadcast_to(orientation, shape + (4,))), axis=-1)
 
+    return pose_array_to_matrices(res) if matrices else res
 
-def abs_pose_from_ap_orientation(scene: CScene, project: CProject, orientation_id: str) -> Pose:
-    """Returns absolute Pose without modifying anything within the project.
 
-    :param orientation_id:
+def make_poses_abs(parents: np.ndarray, children: np.ndarray) -> np.ndarray:
+    """Batch version of make_pose_abs.
+
+    :param parents: Nx7 or Nx4x4 array, a single pose (7 or 4x4) is used for all children.
+    :param children: Nx7 or Nx4x4 array.
+    :return: Absolute poses in the same form as children.
+    """
+
+    return _batch(parents, children, True)
+
+
+def make_poses_rel(parents: np.ndarray, children: np.ndarray) -> np.ndarray:
+    """Batch version of make_pose_rel.
+
+    :param parents: Nx7 or Nx4x4 array, a single pose (7 or 4x4) is used for all children.
+    :param children: Nx7 or Nx4x4 array.
+    :return: Relative poses in the same form as children.
+    """
+
+    return _batch(parents, children, False)
+
+
+def action_point_roots(
+    scene: CScene, project: CProject, aps: Optional[Iterable[BareActionPoint]] = None
+) -> Dict[str, Tuple[Optional[str], np.ndarray]]:
+    """For each AP, finds the scene object at the root of its parents (None if
+    there is no such object) and position of the AP relative to the object.
+
+    As APs don't have orientation, the position is just a sum of positions along the way.
+
+    :param aps: All APs of the project by default.
+    :return: AP id -> (object id, position).
+    """
+
+    resolved: Dict[str, Tuple[Optional[str], np.ndarray]] = {}
+
+    for ap in project.action_points if aps is None else aps:
+
+        chain: List[BareActionPoint] = []
+        current = ap
+
+        while True:
+
+            if current.id in resolved:
+                root, offset = resolved[current.id]
+                break
+
+            chain.append(current)
+
+            if not current.parent:
+                root, offset = None, np.zeros(3)
+                break
+
+            if current.parent in scene.object_ids:
+                root, offset = current.parent, np.zeros(3)
+                break
+
+            if current.parent not in project.action_points_ids:
+                raise Arcor2Exception(f"Action point's {current.name} parent not available.")
+
+            if any(item.id == current.parent for item in chain):
+                raise Arcor2Exception(f"Parents of action point {current.name} form a loop.")
+
+            current = project.bare_action_point(current.parent)
+
+        for item in reversed(chain):
+            offset = offset + (item.position.x, item.position.y, item.position.z)
+            resolved[item.id] = root, offset
+
+    return resolved
+
+
+def make_relative_aps_global(scene: CScene, project: CProject, aps: Optional[Sequence[BareActionPoint]] = None) -> None:
+    """Transforms (in place) relative APs into global ones, all at once.
+
+    The result is the same as of calling make_relative_ap_global for each of them.
+
+    :param aps: APs with parent by default.
     :return:
     """
 
-    ap, ori = project.bare_ap_and_orientation(orientation_id)
-    pose = Pose(ap.position, ori.orientation)
+    aps = [ap for ap in (project.action_points_with_parent if aps is None else aps) if ap.parent]
 
-    if not ap.parent:
-        return pose
+    if not aps:
+        return
+
+    roots = action_point_roots(scene, project, aps)
+    parent_poses: Dict[Optional[str], Pose] = {None: Pose()}
+
+    for root, _ in roots.values():
+        if root not in parent_poses:
+            pose = scene.object(root).pose
+            if not pose:
+                raise Arcor2Exception("Parent object does not have pose!")
+            parent_poses[root] = pose
+
+    parent_ids = list(parent_poses)
+    parent_arr = poses_to_array(parent_poses.values())
+    parent_idx = {parent_id: idx for idx, parent_id in enumerate(parent_ids)}
+
+    ap_roots = [parent_idx[roots[ap.id][0]] for ap in aps]
+    children = np.zeros((len(aps), 7))
+    children[:, :3] = [roots[ap.id][1] for ap in aps]
+    children[:, 6] = 1
+
+    positions = make_poses_abs(parent_arr[ap_roots], children)[:, :3].tolist()
+
+    orientations = [(ap_idx, ori) for ap_idx, ap in enumerate(aps) for ori in project.ap_orientations(ap.id)]
+
+    if orientations:
+
+        ori_children = np.zeros((len(orientations), 7))
+        ori_children[:, 3:] = [tuple(ori.orientation) for _, ori in orientations]
+        abs_orientations = make_poses_abs(parent_arr[[ap_roots[ap_idx] for ap_idx, _ in orientations]], ori_children)[
+            :, 3:
+        ].tolist()
+
+        for (_, ori), (x, y, z, w) in zip(orientations, abs_orientations):
+            # already normalized, there is no need to create a new (normalizing) instance
+            ori.orientation.x, ori.orientation.y, ori.orientation.z, ori.orientation.w = x, y, z, w
+
+    for ap, (x, y, z) in zip(aps, positions):
+        ap.position = Position(x, y, z)
+        ap.parent = None
 
-    return _abs_pose_from_ap_orientation(scene, project, pose, ap.parent)
+    project.poses_changed()
@@ -3,18 +3,81 @@ import json
 import os
 import time
 from collections import deque
-from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set, Tuple, Type, TypeVar
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import websockets
 from aiologger.levels import LogLevel
-from dataclasses_jsonschema import ValidationError
+from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
+from websockets.http import Headers
+from websockets.typing import Subprotocol
 
+try:
+    import msgpack
+
+    HAS_MSGPACK = True
+except ImportError:  # it is a dependency, but JSON keeps working even without it (e.g. when running from sources)
+    HAS_MSGPACK = False
+
+from arcor2 import metrics
 from arcor2.data.events import Event
 from arcor2.data.rpc.common import RPC
 from arcor2.exceptions import Arcor2Exception
 
+"""
+Messages (RPCs and events) are JSON text frames by default. Clients may ask for a binary encoding (MessagePack)
+using the 'arcor2.msgpack' subprotocol, clients asking for no (or unknown) subprotocol get JSON.
+Frames are compressed (permessage-deflate), when the client supports it.
+
+Metrics (RPC latencies, sent messages, etc.) are available over HTTP on the same port, on METRICS_PATH.
+
+RPCs of one client are processed one by one, unless concurrency > 1 is given to the server. Then, each request gets its
+own task and conflicting requests are serialized using locks of resources declared by the callback (see rpc_resources).
+"""
+
 MAX_RPC_DURATION = float(os.getenv("ARCOR2_MAX_RPC_DURATION", 0.1))
 
+# "deflate" (permessage-deflate, negotiated with the client) or "none"
+COMPRESSION: Optional[str] = None if os.getenv("ARCOR2_WS_COMPRESSION", "deflate") == "none" else "deflate"
+
+JSON_SUBPROTOCOL = Subprotocol("arcor2.json")
+MSGPACK_SUBPROTOCOL = Subprotocol("arcor2.msgpack")
+
+# ordered by preference
+SUBPROTOCOLS: List[Subprotocol] = ([MSGPACK_SUBPROTOCOL] if HAS_MSGPACK else []) + [JSON_SUBPROTOCOL]
+
+Message = Union[str, bytes]
+
+METRICS_PATH = "/metrics"
+
+RPC_DURATION = metrics.Histogram("arcor2_rpc_duration_seconds", "Duration of RPC callbacks.", ["rpc"])
+RPC_REQUESTS = metrics.Counter("arcor2_rpc_requests_total", "Processed RPC requests.", ["rpc"])
+RPC_ERRORS = metrics.Counter("arcor2_rpc_errors_total", "RPC requests resulting in an error response.", ["rpc"])
+RPC_IN_FLIGHT = metrics.Gauge("arcor2_rpc_in_flight", "RPC requests being processed.", ["rpc"])
+INVALID_MESSAGES = metrics.Counter("arcor2_ws_invalid_messages_total", "Messages that could not be processed.")
+EVENTS = metrics.Counter("arcor2_ws_events_total", "Events sent (to one or more clients).", ["event"])
+MESSAGES_SENT = metrics.Counter("arcor2_ws_messages_sent_total", "Messages sent to clients.", ["encoding"])
+PAYLOAD_SIZE = metrics.Histogram(
+    "arcor2_ws_payload_bytes", "Size of serialized messages.", ["encoding"], buckets=metrics.SIZE_BUCKETS
+)
+CLIENTS = metrics.Gauge("arcor2_ws_clients", "Connected clients.")
+
 RPCT = TypeVar("RPCT", bound=RPC)
 ReqT = TypeVar("ReqT", bound=RPC.Request)
 RespT = TypeVar("RespT", bound=RPC.Response)
@@ -22,12 +85,236 @@ RespT = TypeVar("RespT", bound=RPC.Response)
 RPC_CB = Callable[[ReqT, websockets.WebSocketServerProtocol], Coroutine[Any, Any, Optional[RespT]]]
 RPC_DICT_TYPE = Dict[str, Tuple[Type[RPC], RPC_CB]]
 
+ResourceSpec = Union[str, Callable[[Any], str]]
+F = TypeVar("F", bound=Callable[..., Coroutine[Any, Any, Any]])
+
 EventT = TypeVar("EventT", bound=Event)
 EVENT_DICT_TYPE = Dict[
     str, Tuple[Type[EventT], Callable[[EventT, websockets.WebSocketServerProtocol], Coroutine[Any, Any, None]]]
 ]
 
 
+class WsServerException(Arcor2Exception):
+    pass
+
+
+def uses_binary(client: websockets.WebSocketCommonProtocol) -> bool:
+    """Whether the connection uses the binary encoding."""
+
+    return client.subprotocol == MSGPACK_SUBPROTOCOL
+
+
+def decode(message: Message) -> Any:
+    """Decodes a message, binary frames are expected to be MessagePack
+    encoded.
+
+    :param message:
+    :return:
+    """
+
+    if isinstance(message, bytes):
+
+        if not HAS_MSGPACK:
+            raise WsServerException("Binary messages are not supported.")
+
+        try:
+            return msgpack.unpackb(message, raw=False)
+        except ValueError as e:
+            raise WsServerException("Invalid binary message.") from e
+
+    try:
+        return json.loads(message)
+    except json.decoder.JSONDecodeError as e:
+        raise WsServerException("Invalid JSON message.") from e
+
+
+class Payload:
+    """A message to be sent to (possibly many) clients, serialized at most
+    once for each encoding.
+
+    :param data: A dataclass (e.g. event), a dictionary or an already serialized JSON.
+    """
+
+    def __init__(self, data: Union[JsonSchemaMixin, Dict[str, Any], str]) -> None:
+
+        self._data = data
+        self._json: Optional[str] = data if isinstance(data, str) else None
+        self._binary: Optional[bytes] = None
+
+        if isinstance(data, Event):
+            EVENTS.inc(data.event)
+        elif isinstance(data, dict) and "event" in data:
+            EVENTS.inc(data["event"])
+
+    def _dict(self) -> Dict[str, Any]:
+
+        if isinstance(self._data, JsonSchemaMixin):
+            return self._data.to_dict()
+        elif isinstance(self._data, str):
+            return json.loads(self._data)
+        return self._data
+
+    @property
+    def json(self) -> str:
+
+        if self._json is None:
+            if isinstance(self._data, JsonSchemaMixin):
+                self._json = self._data.to_json()
+            else:
+                self._json = json.dumps(self._dict())
+            PAYLOAD_SIZE.observe(len(self._json), "json")
+        return self._json
+
+    @property
+    def binary(self) -> bytes:
+
+        if self._binary is None:
+            try:
+                self._binary = msgpack.packb(self._dict(), use_bin_type=True)
+            except OverflowError as e:  # MessagePack integers are limited to 64 bits
+                raise WsServerException("Message can't be encoded as MessagePack.") from e
+            PAYLOAD_SIZE.observe(len(self._binary), "msgpack")
+        return self._binary
+
+    def encode(self, binary: bool) -> Message:
+        """Returns the binary encoding if asked for (and possible), JSON
+        otherwise.
+
+        Receivers (see decode) handle both frame types.
+        """
+
+        if binary:
+            try:
+                return self.binary
+            except WsServerException:
+                pass
+        return self.json
+
+    def for_client(self, client: websockets.WebSocketCommonProtocol) -> Message:
+
+        message = self.encode(uses_binary(client))
+        MESSAGES_SENT.inc("msgpack" if isinstance(message, bytes) else "json")
+        return message
+
+
+class ResourceLocks:
+    """Locks of named resources (e.g. 'scene' or 'robot/<id>'), created when
+    needed and shared by all clients."""
+
+    def __init__(self) -> None:
+
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    def __contains__(self, resource: str) -> bool:
+        return resource in self._locks
+
+    @asynccontextmanager
+    async def acquire(self, resources: Iterable[str]) -> AsyncIterator[None]:
+        """Acquires locks of all given resources.
+
+        Locks are always taken in the same order, so requests needing
+        more resources can't deadlock.
+        """
+
+        names = sorted(set(resources))
+
+        for name in names:
+            if name not in self._locks:
+                self._locks[name] = asyncio.Lock()
+                self._users[name] = 0
+            self._users[name] += 1
+
+        acquired: List[asyncio.Lock] = []
+
+        try:
+            for name in names:
+                lock = self._locks[name]
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+            for name in names:
+                self._users[name] -= 1
+                if not self._users[name]:
+                    del self._users[name]
+                    del self._locks[name]
+
+
+RESOURCE_LOCKS = ResourceLocks()
+
+_RESOURCES_ATTR = "__rpc_resources__"
+
+
+def rpc_resources(*resources: ResourceSpec) -> Callable[[F], F]:
+    """Declares resources the RPC callback needs exclusively (when RPCs are
+    processed concurrently).
+
+    A resource is given either by its name or by a function returning the name for a request,
+    e.g. lambda req: f"robot/{req.args.robot_id}". Callbacks declared without any resources don't lock anything,
+    for callbacks without the declaration, default resources of the server are used.
+    """
+
+    def decorator(cb: F) -> F:
+        setattr(cb, _RESOURCES_ATTR, resources)
+        return cb
+
+    return decorator
+
+
+def resources_for(rpc_cb: Callable, req: RPC.Request, default: Iterable[str] = ()) -> List[str]:
+
+    try:
+        specs: Tuple[ResourceSpec, ...] = getattr(rpc_cb, _RESOURCES_ATTR)
+    except AttributeError:
+        return list(default)
+
+    return [spec if isinstance(spec, str) else spec(req) for spec in specs]
+
+
+async def _process_request(path: str, request_headers: Headers) -> Optional[Tuple[HTTPStatus, Any, bytes]]:
+    """Plain HTTP requests for metrics are answered instead of the websocket
+    handshake."""
+
+    if path != METRICS_PATH:
+        return None
+
+    return HTTPStatus.OK, [("Content-Type", metrics.CONTENT_TYPE)], metrics.REGISTRY.render().encode()
+
+
+def serve(handler: Callable[[Any, str], Awaitable[None]], host: str, port: int) -> Any:
+    """Starts a websocket server with encodings and compression supported by
+    ARCOR2 services.
+
+    Metrics are served on METRICS_PATH.
+    """
+
+    return websockets.serve(
+        handler,
+        host,
+        port,
+        subprotocols=SUBPROTOCOLS,
+        compression=COMPRESSION,
+        process_request=_process_request,
+    )
+
+
+def connect(uri: str, use_binary: bool = True) -> Any:
+    """Connects to an ARCOR2 websocket server. The binary encoding is used
+    when available on both sides.
+
+    :param uri:
+    :param use_binary: Offer the binary encoding.
+    :return:
+    """
+
+    subprotocols = SUBPROTOCOLS if use_binary else [JSON_SUBPROTOCOL]
+    return websockets.connect(uri, subprotocols=subprotocols, compression=COMPRESSION)
+
+
 async def send_json_to_client(client: websockets.WebSocketServerProtocol, data: str) -> None:
 
     try:
@@ -36,6 +323,15 @@ async def send_json_to_client(client: websockets.WebSocketServerProtocol, data:
         pass
 
 
+async def send_to_client(client: websockets.WebSocketServerProtocol, payload: Payload) -> None:
+    """Sends the payload using the encoding of the client."""
+
+    try:
+        await client.send(payload.for_client(client))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
 async def server(
     client: Any,
     path: str,
@@ -45,14 +341,121 @@ async def server(
     rpc_dict: RPC_DICT_TYPE,
     event_dict: Optional[EVENT_DICT_TYPE] = None,
     verbose: bool = False,
+    concurrency: int = 1,
+    default_resources: Iterable[str] = (),
+    locks: Optional[ResourceLocks] = None,
+    send: Optional[Callable[[Any, Payload], Awaitable[None]]] = None,
 ) -> None:
+    """Handles one client.
+
+    :param concurrency: Max. number of RPCs of the client being processed at the same time.
+    :param default_resources: Resources locked by RPCs without declared resources (see rpc_resources).
+    :param locks: Locks shared by clients, module-wide ones by default.
+    :param send: Sends RPC responses (e.g. through the queue the events for the client go through, so a response
+        can't overtake them), directly by default.
+    :return:
+    """
+
+    send_response = send_to_client if send is None else send
 
     if event_dict is None:
         event_dict = {}
 
+    resource_locks = RESOURCE_LOCKS if locks is None else locks
+    default_resources = tuple(default_resources)
+
     req_last_ts: Dict[str, deque] = {}
     ignored_reqs: Set[str] = set()
 
+    slots = asyncio.Semaphore(concurrency)
+    tasks: Set[asyncio.Task] = set()
+
+    def log_rpc(req: RPC.Request, resp: RPC.Response) -> None:
+
+        # Silencing of repetitive log messages
+        # ...maybe this could be done better and in a more general way using logging.Filter?
+
+        now = time.monotonic()
+        if req.request not in req_last_ts:
+            req_last_ts[req.request] = deque()
+
+        while req_last_ts[req.request]:
+            if req_last_ts[req.request][0] < now - 5.0:
+                req_last_ts[req.request].popleft()
+            else:
+                break
+
+        req_last_ts[req.request].append(now)
+        req_per_sec = len(req_last_ts[req.request]) / 5.0
+
+        if req_per_sec > 2:
+            if req.request not in ignored_reqs:
+                ignored_reqs.add(req.request)
+                logger.debug(f"Request of type {req.request} will be silenced.")
+        elif req_per_sec < 1:
+            if req.request in ignored_reqs:
+                ignored_reqs.remove(req.request)
+
+        if req.request not in ignored_reqs:
+            # TODO do not print out too big messages (ideally omit its data part)
+            asyncio.ensure_future(logger.debug(f"RPC request: {req}, result: {resp}"))
+
+    async def call_rpc(rpc_cls: Type[RPC], rpc_cb: RPC_CB, req: RPC.Request) -> RPC.Response:
+
+        RPC_IN_FLIGHT.inc(req.request)
+        rpc_start = time.monotonic()
+
+        try:
+            resp = await rpc_cb(req, client)
+        except Arcor2Exception as e:
+            logger.debug(e, exc_info=True)
+            resp = rpc_cls.Response(req.id, False, [str(e)])
+        else:
+            if resp is None:  # default response
+                resp = rpc_cls.Response(req.id, True)
+            else:
+                assert isinstance(resp, rpc_cls.Response)
+                resp.id = req.id
+        finally:
+            rpc_dur = time.monotonic() - rpc_start
+            RPC_IN_FLIGHT.dec(req.request)
+            RPC_DURATION.observe(rpc_dur, req.request)
+            RPC_REQUESTS.inc(req.request)
+
+        if rpc_dur > MAX_RPC_DURATION:
+            logger.warn(f"{req.request} callback took {rpc_dur:.3f}s.")
+
+        if not resp.result:
+            RPC_ERRORS.inc(req.request)
+
+        return resp
+
+    async def handle_rpc(rpc_cls: Type[RPC], rpc_cb: RPC_CB, req: RPC.Request) -> None:
+
+        if concurrency > 1:
+            async with resource_locks.acquire(resources_for(rpc_cb, req, default_resources)):
+                resp = await call_rpc(rpc_cls, rpc_cb, req)
+        else:
+            resp = await call_rpc(rpc_cls, rpc_cb, req)
+
+        await send_response(client, Payload(resp))
+
+        if logger.level == LogLevel.DEBUG:
+            log_rpc(req, resp)
+
+    async def rpc_task(rpc_cls: Type[RPC], rpc_cb: RPC_CB, req: RPC.Request) -> None:
+
+        try:
+            await handle_rpc(rpc_cls, rpc_cb, req)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.exception(f"Unhandled exception in {req.request} callback: {e}")
+        finally:
+            slots.release()
+
+    CLIENTS.inc()
+
     try:
 
         await register(client)
@@ -60,13 +463,15 @@ async def server(
         async for message in client:
 
             try:
-                data = json.loads(message)
-            except json.decoder.JSONDecodeError as e:
-                logger.error(f"Invalid data: '{message}'.")
+                data = decode(message)
+            except WsServerException as e:
+                INVALID_MESSAGES.inc()
+                logger.error(f"Invalid data: '{message!r}'.")
                 logger.debug(e)
                 continue
 
             if not isinstance(data, dict):
+                INVALID_MESSAGES.inc()
                 logger.error(f"Invalid data: '{data}'.")
                 continue
 
@@ -77,6 +482,7 @@ async def server(
                 try:
                     rpc_cls, rpc_cb = rpc_dict[req_type]
                 except KeyError:
+                    INVALID_MESSAGES.inc()
                     logger.error(f"Unknown RPC request: {data}.")
                     continue
 
@@ -85,87 +491,51 @@ async def server(
                 try:
                     req = rpc_cls.Request.from_dict(data)
                 except ValidationError as e:
+                    INVALID_MESSAGES.inc()
                     logger.error(f"Invalid RPC: {data}, error: {e}")
                     continue
                 except Arcor2Exception as e:
                     # this might happen if e.g. some dataclass does additional validation of values in its __post_init__
                     try:
-                        await client.send(rpc_cls.Response(data["id"], False, messages=[str(e)]).to_json())
+                        await send_response(client, Payload(rpc_cls.Response(data["id"], False, messages=[str(e)])))
                         logger.debug(e, exc_info=True)
                     except KeyError:
                         pass
                     continue
 
+                if concurrency > 1:
+                    await slots.acquire()  # when the client sends too many requests, stop reading from it
+                    task = asyncio.ensure_future(rpc_task(rpc_cls, rpc_cb, req))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
                 else:
-
-                    try:
-                        rpc_start = time.monotonic()
-                        resp = await rpc_cb(req, client)
-                        rpc_dur = time.monotonic() - rpc_start
-                        if rpc_dur > MAX_RPC_DURATION:
-                            logger.warn(f"{req.request} callback took {rpc_dur:.3f}s.")
-
-                    except Arcor2Exception as e:
-                        logger.debug(e, exc_info=True)
-                        resp = rpc_cls.Response(req.id, False, [str(e)])
-                    else:
-                        if resp is None:  # default response
-                            resp = rpc_cls.Response(req.id, True)
-                        else:
-                            assert isinstance(resp, rpc_cls.Response)
-                            resp.id = req.id
-
-                await client.send(resp.to_json())
-
-                if logger.level == LogLevel.DEBUG:
-
-                    # Silencing of repetitive log messages
-                    # ...maybe this could be done better and in a more general way using logging.Filter?
-
-                    now = time.monotonic()
-                    if req.request not in req_last_ts:
-                        req_last_ts[req.request] = deque()
-
-                    while req_last_ts[req.request]:
-                        if req_last_ts[req.request][0] < now - 5.0:
-                            req_last_ts[req.request].popleft()
-                        else:
-                            break
-
-                    req_last_ts[req.request].append(now)
-                    req_per_sec = len(req_last_ts[req.request]) / 5.0
-
-                    if req_per_sec > 2:
-                        if req.request not in ignored_reqs:
-                            ignored_reqs.add(req.request)
-                            logger.debug(f"Request of type {req.request} will be silenced.")
-                    elif req_per_sec < 1:
-                        if req.request in ignored_reqs:
-                            ignored_reqs.remove(req.request)
-
-                    if req.request not in ignored_reqs:
-                        # TODO do not print out too big messages (ideally omit its data part)
-                        asyncio.ensure_future(logger.debug(f"RPC request: {req}, result: {resp}"))
+                    await handle_rpc(rpc_cls, rpc_cb, req)
 
             elif "event" in data:  # ...event from UI
 
                 try:
                     event_cls, event_cb = event_dict[data["event"]]
                 except KeyError as e:
+                    INVALID_MESSAGES.inc()
                     logger.error(f"Unknown event type: {e}.")
                     continue
 
                 try:
                     event = event_cls.from_dict(data)
                 except ValidationError as e:
+                    INVALID_MESSAGES.inc()
                     logger.error(f"Invalid event: {data}, error: {e}")
                     continue
 
                 await event_cb(event, client)
 
             else:
+                INVALID_MESSAGES.inc()
                 logger.error(f"unsupported format of message: {data}")
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
+        if tasks:  # requests already being processed are finished (e.g. a robot might be moving)
+            await asyncio.wait(tasks)
+        CLIENTS.dec()
         await unregister(client)
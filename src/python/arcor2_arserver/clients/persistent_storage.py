@@ -1,9 +1,15 @@
-from copy import deepcopy
+import asyncio
+import os
+import time
+from copy import copy, deepcopy
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
 
 from lru import LRU
 
+from arcor2 import rest
+from arcor2.cached import UpdateableCachedProject, UpdateableCachedScene
 from arcor2.clients import aio_persistent_storage as ps
 from arcor2.clients.aio_persistent_storage import (
     delete_model,
@@ -13,6 +19,7 @@ from arcor2.clients.aio_persistent_storage import (
     get_model,
     get_object_type,
     get_object_type_ids,
+    get_object_type_if_modified,
     get_project_sources,
     put_model,
     update_object_type,
@@ -20,11 +27,46 @@ from arcor2.clients.aio_persistent_storage import (
 )
 from arcor2.clients.persistent_storage import ProjectServiceException
 from arcor2.data.common import IdDesc, IdDescList, Project, Scene
+from arcor2.data.storage import Change, Changes
+from arcor2.logging import get_logger
 
 """
 This module adds some caching capabilities to the aio version of persistent_storage. It should be only used by ARServer.
+
+Changes made by other clients of the Project service are obtained using its change feed (see watch_changes) and
+affected cached items are revalidated using conditional requests, which costs just 304 response if the item was not
+modified meanwhile. If the feed is not available, cached items older than REVALIDATE_AFTER seconds are revalidated.
 """
 
+REVALIDATE_AFTER = float(os.getenv("ARCOR2_STORAGE_REVALIDATE_AFTER", 1.0))
+POLL_TIMEOUT = 10.0
+
+logger = get_logger(__name__)
+
+# last revision obtained from the change feed, None if the feed is not available
+_revision: Optional[int] = None
+
+# object types changed since the last call of changed_object_types, None if unknown
+_changed_object_types: Optional[Set[str]] = None
+
+T = TypeVar("T", Project, Scene)
+
+
+@dataclass
+class _Entry(Generic[T]):
+
+    item: T
+    validators: rest.Validators
+    checked: float = field(default_factory=time.monotonic)
+    stale: bool = False
+
+    def needs_revalidation(self) -> bool:
+
+        if self.stale:
+            return True
+
+        return _revision is None and time.monotonic() - self.checked > REVALIDATE_AFTER
+
 
 # here we need to know all the items
 _scenes_list: Dict[str, IdDesc] = {}
@@ -32,8 +74,8 @@ _projects_list: Dict[str, IdDesc] = {}
 
 # here we can forget least used items
 if TYPE_CHECKING:
-    _scenes: Dict[str, Scene] = {}
-    _projects: Dict[str, Project] = {}
+    _scenes: Dict[str, _Entry[Scene]] = {}
+    _projects: Dict[str, _Entry[Project]] = {}
 else:
     _scenes = LRU(16)
     _projects = LRU(32)
@@ -41,14 +83,137 @@ else:
 
 async def initialize_module() -> None:
 
+    global _revision
+    global _changed_object_types
+
     _scenes.clear()
     _projects.clear()
 
-    for it in (await ps.get_projects()).items:
-        _projects_list[it.id] = it
+    # has to be done first, so no change is missed
+    try:
+        _revision = (await ps.get_changes()).revision
+    except ProjectServiceException:
+        logger.warning("Change feed not available.")
+        _revision = None
+
+    _changed_object_types = None
+
+    await _update_projects_list()
+    await _update_scenes_list()
+
+
+async def _update_projects_list() -> None:
+
+    projects = {it.id: it for it in (await ps.get_projects()).items}
+    _projects_list.clear()
+    _projects_list.update(projects)
+
+
+async def _update_scenes_list() -> None:
+
+    scenes = {it.id: it for it in (await ps.get_scenes()).items}
+    _scenes_list.clear()
+    _scenes_list.update(scenes)
+
+
+def _invalidate(cache: Dict[str, _Entry[T]], item_id: str) -> None:
+
+    entry = cache.get(item_id)
+
+    if entry is not None:
+        entry.stale = True
+
+
+def _apply_changes(changes: Changes) -> Set[Change.Kind]:
+    """Invalidates affected items.
+
+    :return: Kinds of items, whose list has to be updated.
+    """
+
+    global _changed_object_types
+
+    if changes.reset:
+        logger.info("Changes are not available, dropping all cached items.")
+        _scenes.clear()
+        _projects.clear()
+        _changed_object_types = None
+        return {Change.Kind.PROJECT, Change.Kind.SCENE}
+
+    update_lists: Set[Change.Kind] = set()
+
+    for change in changes.changes:
+
+        if change.kind == Change.Kind.OBJECT_TYPE:
+            if _changed_object_types is not None:
+                _changed_object_types.add(change.id)
+            continue
+
+        cache = _projects if change.kind == Change.Kind.PROJECT else _scenes
+
+        if change.type == Change.Type.REMOVE:
+            cache.pop(change.id, None)
+        else:
+            _invalidate(cache, change.id)
+
+        update_lists.add(change.kind)
+
+    return update_lists
+
+
+async def watch_changes() -> None:
+    """Keeps cached items up to date using the change feed of the Project
+    service.
+
+    To be run as a task, does nothing if the feed is not available.
+    """
+
+    global _revision
+
+    while _revision is not None:
+
+        try:
+            changes = await ps.get_changes(_revision, POLL_TIMEOUT)
+            update_lists = _apply_changes(changes)
+
+            if Change.Kind.PROJECT in update_lists:
+                await _update_projects_list()
+            if Change.Kind.SCENE in update_lists:
+                await _update_scenes_list()
+
+            _revision = changes.revision
+
+        except ProjectServiceException as e:
+            logger.warning(f"Failed to get changes. {str(e)}")
+            await asyncio.sleep(1.0)
 
-    for it in (await ps.get_scenes()).items:
-        _scenes_list[it.id] = it
+
+def changed_object_types() -> Optional[Set[str]]:
+    """Returns IDs of object types changed (added, updated or removed) since
+    the last call.
+
+    :return: None if the changes are not known, so all object types have to be checked.
+    """
+
+    global _changed_object_types
+
+    ret = _changed_object_types
+    _changed_object_types = set() if _revision is not None else None
+    return ret
+
+
+def restore_changed_object_types(ids: Optional[Set[str]]) -> None:
+    """Puts back IDs obtained by changed_object_types, when processing them
+    failed, so they are returned by the next call again.
+
+    :param ids: Return value of changed_object_types.
+    """
+
+    global _changed_object_types
+
+    if ids is None:
+        _changed_object_types = None
+    elif _changed_object_types is not None:
+        _changed_object_types.update(ids)
 
 
 async def get_projects() -> IdDescList:
@@ -59,20 +224,74 @@ async def get_scenes() -> IdDescList:
     return IdDescList(items=list(_scenes_list.values()))
 
 
-async def get_project(project_id: str) -> Project:
+def _validators(validators: Optional[rest.Validators] = None) -> rest.Validators:
+    """Only ETag is kept.
+
+    Last-Modified has one-second resolution, so a change made within the same second as the cached version would
+    be reported as not modified. Items written by this server (or obtained in bulk) don't have any validators, so
+    their first revalidation transfers them again, together with the ETag.
+    """
+
+    return rest.Validators(etag=validators.etag) if validators else rest.Validators()
+
+
+async def _get(
+    cache: Dict[str, _Entry[T]],
+    item_id: str,
+    getter: Callable[[str, Optional[rest.Validators]], Awaitable[Tuple[Optional[T], rest.Validators]]],
+) -> T:
+
+    entry = cache.get(item_id)
+
+    if entry is not None and not entry.needs_revalidation():
+        return entry.item
+
+    item, validators = await getter(item_id, entry.validators if entry else None)
+
+    if item is None:  # not modified
+        assert entry
+        item = entry.item
+
+    cache[item_id] = _Entry(item, _validators(validators))
+    return item
+
+
+async def _get_bulk(
+    cache: Dict[str, _Entry[T]],
+    item_ids: Iterable[str],
+    getter: Callable[[str, Optional[rest.Validators]], Awaitable[Tuple[Optional[T], rest.Validators]]],
+    bulk_getter: Callable[[Iterable[str]], Awaitable[List[T]]],
+) -> List[T]:
+    """Cached items are (concurrently) revalidated, the rest is fetched in one
+    request."""
+
+    ids = list(item_ids)
+    cached_ids = [item_id for item_id in ids if item_id in cache]
+    cached = dict(zip(cached_ids, await asyncio.gather(*[_get(cache, item_id, getter) for item_id in cached_ids])))
 
-    if project_id not in _projects:
-        _projects[project_id] = await ps.get_project(project_id)
+    # cache might be smaller than the number of items
+    fetched = {item.id: item for item in await bulk_getter(item_id for item_id in ids if item_id not in cached)}
 
-    return _projects[project_id]
+    for item in fetched.values():
+        cache[item.id] = _Entry(item, _validators())
+
+    return [cached[item_id] if item_id in cached else fetched[item_id] for item_id in ids]
+
+
+async def get_project(project_id: str) -> Project:
+    return await _get(_projects, project_id, ps.get_project_if_modified)
 
 
 async def get_scene(scene_id: str) -> Scene:
+    return await _get(_scenes, scene_id, ps.get_scene_if_modified)
+
+
+async def get_projects_bulk(project_ids: Iterable[str]) -> List[Project]:
+    return await _get_bulk(_projects, project_ids, ps.get_project_if_modified, ps.get_projects_bulk)
 
-    if scene_id not in _scenes:
-        _scenes[scene_id] = await ps.get_scene(scene_id)
 
-    return _scenes[scene_id]
+async def get_scenes_bulk(scene_ids: Iterable[str]) -> List[Scene]:
+    return await _get_bulk(_scenes, scene_ids, ps.get_scene_if_modified, ps.get_scenes_bulk)
 
 
 async def update_project(project: Project) -> datetime:
@@ -80,9 +299,10 @@ async def update_project(project: Project) -> datetime:
     assert project.id
     ret = await ps.update_project(project)
     _projects_list[project.id] = IdDesc(project.id, project.name, project.desc)
-    _projects[project.id] = deepcopy(project)
-    _projects[project.id].modified = ret
-    _projects[project.id].int_modified = None
+    cached = deepcopy(project)
+    cached.modified = ret
+    cached.int_modified = None
+    _projects[project.id] = _Entry(cached, _validators())
     return ret
 
 
@@ -91,29 +311,101 @@ async def update_scene(scene: Scene) -> datetime:
     assert scene.id
     ret = await ps.update_scene(scene)
     _scenes_list[scene.id] = IdDesc(scene.id, scene.name, scene.desc)
-    _scenes[scene.id] = deepcopy(scene)
-    _scenes[scene.id].modified = ret
-    _scenes[scene.id].int_modified = None
+    cached = deepcopy(scene)
+    cached.modified = ret
+    cached.int_modified = None
+    _scenes[scene.id] = _Entry(cached, _validators())
+
+    return ret
+
+
+def _patch_cached(
+    cache: Dict[str, _Entry[T]], item_id: str, base: Optional[datetime], apply: Callable[[T], None], modified: datetime
+) -> None:
+    """Applies changes to the cached item or drops it, if it is not the version
+    the changes were made to."""
+
+    entry = cache.get(item_id)
+
+    if entry is None or entry.item.modified != base:
+        cache.pop(item_id, None)
+        return
+
+    item = copy(entry.item)  # the original might be still used by someone
+    apply(item)
+    item.modified = modified
+    cache[item_id] = _Entry(item, _validators())
+
+
+async def save_project(project: UpdateableCachedProject) -> datetime:
+    """Saves the project - only its changes are sent when possible (see
+    UpdateableCachedProject.patch)."""
+
+    version = project.version
+    patch = project.patch()
+
+    if patch is None:
+        ret = await update_project(project.project)
+    else:
+        patch = deepcopy(patch)  # the project might be modified while waiting for the response
+        try:
+            ret = await ps.patch_project(patch)
+        except ProjectServiceException as e:
+            logger.warning(f"Failed to patch project {project.id}, saving the whole project. {str(e)}")
+            ret = await update_project(project.project)
+        else:
+            _projects_list[project.id] = IdDesc(project.id, patch.project.name, patch.project.desc)
+            _patch_cached(_projects, project.id, patch.project.modified, patch.apply, ret)
+
+    project.saved(ret, version)
+    return ret
+
+
+async def save_scene(scene: UpdateableCachedScene) -> datetime:
+    """Saves the scene - only its changes are sent when possible (see
+    UpdateableCachedScene.patch)."""
+
+    version = scene.version
+    patch = scene.patch()
+
+    if patch is None:
+        ret = await update_scene(scene.scene)
+    else:
+        patch = deepcopy(patch)
+        try:
+            ret = await ps.patch_scene(patch)
+        except ProjectServiceException as e:
+            logger.warning(f"Failed to patch scene {scene.id}, saving the whole scene. {str(e)}")
+            ret = await update_scene(scene.scene)
+        else:
+            _scenes_list[scene.id] = IdDesc(scene.id, patch.scene.name, patch.scene.desc)
+            _patch_cached(_scenes, scene.id, patch.scene.modified, patch.apply, ret)
 
+    scene.saved(ret, version)
     return ret
 
 
 async def delete_scene(scene_id: str) -> None:
 
     await ps.delete_scene(scene_id)
-    del _scenes_list[scene_id]
-    del _scenes[scene_id]
+    # the change feed might be faster
+    _scenes_list.pop(scene_id, None)
+    _scenes.pop(scene_id, None)
 
 
 async def delete_project(project_id: str) -> None:
 
     await ps.delete_project(project_id)
-    del _projects_list[project_id]
-    del _projects[project_id]
+    # the change feed might be faster
+    _projects_list.pop(project_id, None)
+    _projects.pop(project_id, None)
 
 
 __all__ = [
     initialize_module.__name__,
+    watch_changes.__name__,
+    changed_object_types.__name__,
+    restore_changed_object_types.__name__,
     get_mesh.__name__,
     get_meshes.__name__,
     get_model.__name__,
@@ -122,12 +414,17 @@ __all__ = [
     get_projects.__name__,
     get_scenes.__name__,
     get_project.__name__,
+    get_projects_bulk.__name__,
     get_project_sources.__name__,
     get_scene.__name__,
+    get_scenes_bulk.__name__,
     get_object_type.__name__,
+    get_object_type_if_modified.__name__,
     get_object_type_ids.__name__,
     update_project.__name__,
     update_scene.__name__,
+    save_project.__name__,
+    save_scene.__name__,
     update_project_sources.__name__,
     update_object_type.__name__,
     delete_object_type.__name__,
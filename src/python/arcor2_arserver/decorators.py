@@ -6,6 +6,21 @@ from arcor2_arserver import globals as glob
 
 F = TypeVar("F", bound=Callable[..., Coroutine[Any, Any, Any]])
 
+# resources locked by RPCs processed concurrently (see ws_server.rpc_resources)
+SCENE = "scene"
+PROJECT = "project"
+
+# RPCs without declared resources (most of them) might modify the scene as well as the project
+DEFAULT_RESOURCES = (SCENE, PROJECT)
+
+
+def robot_resource(req: Any) -> str:
+    return f"robot/{req.args.robot_id}"
+
+
+def camera_resource(req: Any) -> str:
+    return f"camera/{req.args.id}"
+
 
 def no_scene(coro: F) -> F:
     @functools.wraps(coro)
@@ -8,8 +8,7 @@ from typing import TYPE_CHECKING, Dict, Optional
 import websockets
 from websockets.server import WebSocketServerProtocol as WsClient
 
-from arcor2 import helpers as hlp
-from arcor2 import rest
+from arcor2 import aio_rest, ws_server
 from arcor2.data import common, rpc
 from arcor2.exceptions import Arcor2Exception
 from arcor2_arserver import events as server_events
@@ -79,12 +78,7 @@ async def build_and_upload_package(project_id: str, package_name: str) -> str:
     with tempfile.TemporaryDirectory() as tmpdirname:
         path = os.path.join(tmpdirname, "publish.zip")
 
-        await hlp.run_in_executor(
-            rest.download,
-            f"{BUILD_URL}/project/{project_id}/publish",
-            path,
-            {"packageName": package_name},
-        )
+        await aio_rest.download(f"{BUILD_URL}/project/{project_id}/publish", path, {"packageName": package_name})
 
         with open(path, "rb") as zip_file:
             b64_bytes = base64.b64encode(zip_file.read())
@@ -121,7 +115,7 @@ async def project_manager_client(handle_manager_incoming_messages) -> None:
 
         try:
 
-            async with websockets.connect(EXE_URL) as manager_client:
+            async with ws_server.connect(EXE_URL) as manager_client:
 
                 glob.logger.info("Connected to manager.")
 
@@ -138,7 +132,7 @@ async def project_manager_client(handle_manager_incoming_messages) -> None:
                         continue
 
                     try:
-                        await manager_client.send(msg.to_json())
+                        await manager_client.send(ws_server.Payload(msg).for_client(manager_client))
                     except websockets.exceptions.ConnectionClosed:
                         await MANAGER_RPC_REQUEST_QUEUE.put(msg)
                         break
@@ -1,6 +1,5 @@
 import os
-from collections import defaultdict
-from typing import Any, DefaultDict, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set
 
 from websockets.server import WebSocketServerProtocol as WsClient
 
@@ -15,6 +14,7 @@ logger = get_aiologger("ARServer")
 VERBOSE: bool = False
 
 PORT: int = int(os.getenv("ARCOR2_SERVER_PORT", 6789))
+RPC_CONCURRENCY: int = int(os.getenv("ARCOR2_RPC_CONCURRENCY", 8))  # RPCs of one UI processed at the same time
 
 SCENE: Optional[UpdateableCachedScene] = None
 PROJECT: Optional[UpdateableCachedProject] = None
@@ -38,9 +38,4 @@ ACTION_STATE_BEFORE: Optional[events.ActionStateBefore.Data] = None
 
 TEMPORARY_PACKAGE: bool = False
 
-RegisteredUiDict = DefaultDict[str, Set[WsClient]]
-
-ROBOT_JOINTS_REGISTERED_UIS: RegisteredUiDict = defaultdict(lambda: set())  # robot, UIs
-ROBOT_EEF_REGISTERED_UIS: RegisteredUiDict = defaultdict(lambda: set())  # robot, UIs
-
 OBJECTS_WITH_UPDATED_POSE: Set[str] = set()
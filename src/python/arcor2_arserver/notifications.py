@@ -1,21 +1,242 @@
 import asyncio
-from typing import Optional
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
 
 from websockets.server import WebSocketServerProtocol
 
-from arcor2 import ws_server
+from arcor2 import metrics, ws_server
 from arcor2.data import events
 from arcor2_arserver import globals as glob
+from arcor2_arserver import snapshot
+
+"""
+Events are not sent to UIs directly but through per-client bounded queues (each drained by its own task), so
+a slow client can't delay the others and the order of events is kept for each client. RPC responses go through the
+same queue, so a response can't overtake events queued before it (events being coalesced are not queued yet).
+
+Updates of the same entity (e.g. SceneObjectChanged during aiming) are coalesced: within a window, only the last
+one is sent. Coalescing can be disabled by setting the window to zero.
+"""
+
+COALESCE_WINDOW = float(os.getenv("ARCOR2_EVENT_COALESCE_WINDOW", 0.05))  # seconds
+QUEUE_SIZE = int(os.getenv("ARCOR2_EVENT_QUEUE_SIZE", 1024))  # messages per client
+
+CoalesceKey = Tuple[str, str, str]
+
+
+@dataclass
+class Metrics:
+    """Counters of the broadcast pipeline.
+
+    :param sent: Messages sent to clients.
+    :param merged: Events replaced by a newer update of the same entity.
+    :param dropped: Messages that were not sent because the client was too slow.
+    :param slow_clients: Clients disconnected because they were too slow.
+    """
+
+    sent: int = 0
+    merged: int = 0
+    dropped: int = 0
+    slow_clients: int = 0
+
+
+METRICS = Metrics()
+
+metrics.CallbackMetric(
+    "arcor2_arserver_events_merged_total", "Coalesced events.", lambda: METRICS.merged, metric_type="counter"
+)
+metrics.CallbackMetric(
+    "arcor2_arserver_events_dropped_total",
+    "Events not sent to slow clients.",
+    lambda: METRICS.dropped,
+    metric_type="counter",
+)
+metrics.CallbackMetric(
+    "arcor2_arserver_slow_clients_total",
+    "Disconnected slow clients.",
+    lambda: METRICS.slow_clients,
+    metric_type="counter",
+)
+metrics.CallbackMetric(
+    "arcor2_arserver_queued_messages", "Messages waiting in queues of clients.", lambda: _queued_messages()
+)
+
+
+class _ClientQueue:
+    def __init__(self, client: WebSocketServerProtocol) -> None:
+
+        self.client = client
+        self.messages: Deque[ws_server.Payload] = deque()
+        self.closing = False
+        self._ready = asyncio.Event()
+        self._task = asyncio.ensure_future(self._sender())
+
+    def put(self, message: ws_server.Payload) -> None:
+
+        if self.closing:
+            METRICS.dropped += 1
+            return
+
+        if len(self.messages) >= QUEUE_SIZE:
+            # the client can't keep up - it's better to let it reconnect (and get the current state) than to
+            # silently skip some events
+            self.closing = True
+            METRICS.dropped += len(self.messages) + 1
+            METRICS.slow_clients += 1
+            self.messages.clear()
+            glob.logger.warning(f"Client {self.client.remote_address} is too slow, closing the connection.")
+            asyncio.ensure_future(self.client.close(1008, "Too slow."))
+            return
+
+        self.messages.append(message)
+        self._ready.set()
+
+    async def _sender(self) -> None:
+
+        while True:
+
+            await self._ready.wait()
+
+            while self.messages:
+                await ws_server.send_to_client(self.client, self.messages.popleft())
+                METRICS.sent += 1
+
+            self._ready.clear()
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+_queues: Dict[WebSocketServerProtocol, _ClientQueue] = {}
+_pending: Dict[CoalesceKey, Tuple[events.Event, Optional[WebSocketServerProtocol]]] = {}
+_flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+def _queued_messages() -> int:
+    return sum(len(queue.messages) for queue in _queues.values())
+
+
+def _queue(interface: WebSocketServerProtocol) -> _ClientQueue:
+
+    try:
+        return _queues[interface]
+    except KeyError:
+        queue = _queues[interface] = _ClientQueue(interface)
+        return queue
+
+
+def _coalesce_key(event: events.Event) -> Optional[CoalesceKey]:
+    """Only updates of entities with ID can be coalesced (each event carries
+    the whole entity)."""
+
+    if event.change_type not in (events.Event.Type.UPDATE, events.Event.Type.UPDATE_BASE):
+        return None
+
+    entity_id = getattr(event.data, "id", None)  # type: ignore
+    if not isinstance(entity_id, str):
+        return None
+
+    return event.event, event.change_type, entity_id
+
+
+def _enqueue(message: ws_server.Payload, exclude_ui: Optional[WebSocketServerProtocol] = None) -> None:
+
+    for intf in glob.INTERFACES:
+        if intf != exclude_ui:
+            _queue(intf).put(message)
+
+
+def _flush() -> None:
+    """Sends pending (coalesced) events, in order of their first
+    occurrence."""
+
+    global _flush_handle
+
+    if _flush_handle:
+        _flush_handle.cancel()
+        _flush_handle = None
+
+    if glob.INTERFACES:
+        for event, exclude_ui in _pending.values():
+            _enqueue(ws_server.Payload(event), exclude_ui)
+
+    _pending.clear()
+
+
+def remove_client(interface: WebSocketServerProtocol) -> None:
+    """To be called when the client disconnects."""
+
+    try:
+        _queues.pop(interface).cancel()
+    except KeyError:
+        pass
+
+
+async def broadcast_message(message: Dict[str, Any]) -> None:
+    """Sends already decoded event (e.g. from the Execution service) to all
+    clients."""
+
+    _flush()
+    _enqueue(ws_server.Payload(message))
 
 
 async def broadcast_event(event: events.Event, exclude_ui: Optional[WebSocketServerProtocol] = None) -> None:
 
-    if (exclude_ui is None and glob.INTERFACES) or (exclude_ui and len(glob.INTERFACES) > 1):
-        message = event.to_json()
-        await asyncio.gather(
-            *[ws_server.send_json_to_client(intf, message) for intf in glob.INTERFACES if intf != exclude_ui]
-        )
+    global _flush_handle
+
+    if event.change_type is not None:
+        snapshot.invalidate()
+
+    key = _coalesce_key(event) if COALESCE_WINDOW > 0 else None
+
+    if key is None:
+        # any other event might depend on the pending ones
+        _flush()
+        if (exclude_ui is None and glob.INTERFACES) or (exclude_ui and len(glob.INTERFACES) > 1):
+            _enqueue(ws_server.Payload(event), exclude_ui)
+        return
+
+    if key in _pending:
+        METRICS.merged += 1
+
+    _pending[key] = event, exclude_ui
+
+    if _flush_handle is None:
+        _flush_handle = asyncio.get_event_loop().call_later(COALESCE_WINDOW, _flush)
 
 
 async def event(interface: WebSocketServerProtocol, event: events.Event) -> None:
-    await ws_server.send_json_to_client(interface, event.to_json())
+
+    if interface in glob.INTERFACES:  # otherwise, the client is already gone
+        _queue(interface).put(ws_server.Payload(event))
+
+
+async def messages(interface: WebSocketServerProtocol, messages: Iterable[ws_server.Payload]) -> None:
+    """Sends already prepared messages (e.g. shared by many clients) to the
+    client."""
+
+    if interface in glob.INTERFACES:
+        queue = _queue(interface)
+        for message in messages:
+            queue.put(message)
+
+
+async def rpc_response(interface: WebSocketServerProtocol, response: ws_server.Payload) -> None:
+    """Sends the RPC response after all events already queued for the
+    client."""
+
+    if interface in glob.INTERFACES:
+        _queue(interface).put(response)
+
+
+async def multicast_event(interfaces: Iterable[WebSocketServerProtocol], event: events.Event) -> None:
+    """Sends the event to the given clients (it is serialized at most once
+    for each encoding)."""
+
+    message = ws_server.Payload(event)
+
+    for intf in interfaces:
+        if intf in glob.INTERFACES:
+            _queue(intf).put(message)
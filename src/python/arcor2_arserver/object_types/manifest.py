@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import humps
+from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
+
+from arcor2 import rest
+from arcor2.data.object_type import MetaModel3d, ObjectType
+from arcor2.object_types.utils import prepare_object_types_dir
+
+"""
+Manifest of object types saved in the object types directory. It allows to find out which object types were
+changed (and have to be fetched and imported again) without reading their sources. When the directory is persistent
+(ARCOR2_OBJECT_TYPE_PATH), this also works across restarts.
+"""
+
+MANIFEST_FILE = "manifest.json"
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+@dataclass
+class ManifestItem(JsonSchemaMixin):
+    """What is known about a saved object type.
+
+    :param hash: Hash of the source (see source_hash).
+    :param base: Name of the base class.
+    :param desc: Description of the object type (as stored in the Project service).
+    :param model: Collision model of the object type.
+    :param etag: Validators of the object type, used for conditional requests.
+    :param last_modified:
+    """
+
+    hash: str
+    base: Optional[str] = None
+    desc: Optional[str] = None
+    model: Optional[MetaModel3d] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def validators(self) -> rest.Validators:
+        return rest.Validators(self.etag, self.last_modified)
+
+    def object_type(self, obj_id: str, source: str) -> ObjectType:
+        return ObjectType(obj_id, source, self.desc, self.model)
+
+
+@dataclass
+class Manifest(JsonSchemaMixin):
+
+    items: Dict[str, ManifestItem] = field(default_factory=dict)
+
+
+def source_path(path: str, module: str, obj_id: str) -> str:
+    return os.path.join(path, module, f"{humps.depascalize(obj_id)}.py")
+
+
+def read_source(path: str, module: str, obj_id: str) -> str:
+
+    with open(source_path(path, module, obj_id)) as file:
+        return file.read()
+
+
+def load(path: str, module: str) -> Manifest:
+    """Loads manifest of the object types directory. Items without the source
+    file are ignored.
+
+    If there is no (valid) manifest, a fresh directory is prepared.
+    """
+
+    if not os.path.exists(os.path.join(path, module, "__init__.py")):
+        prepare_object_types_dir(path, module)
+        return Manifest()
+
+    try:
+        with open(os.path.join(path, MANIFEST_FILE)) as file:
+            manifest = Manifest.from_dict(json.load(file))
+    except (OSError, ValueError, ValidationError):
+        prepare_object_types_dir(path, module)
+        return Manifest()
+
+    manifest.items = {
+        obj_id: item for obj_id, item in manifest.items.items() if os.path.exists(source_path(path, module, obj_id))
+    }
+
+    return manifest
+
+
+def save(manifest: Manifest, path: str) -> None:
+    """Writes the manifest (atomically)."""
+
+    tmp_path = os.path.join(path, f"{MANIFEST_FILE}.tmp")
+
+    with open(tmp_path, "w") as file:
+        json.dump(manifest.to_dict(), file)
+
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
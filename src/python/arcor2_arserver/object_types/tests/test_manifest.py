@@ -0,0 +1,41 @@
+import os
+
+from arcor2.data.object_type import MetaModel3d, Model3dType
+from arcor2_arserver.object_types import manifest as otm
+
+MODULE = "object_types"
+
+
+def test_manifest(tmp_path) -> None:
+
+    path = str(tmp_path)
+
+    manifest = otm.load(path, MODULE)
+    assert not manifest.items
+    assert os.path.exists(os.path.join(path, MODULE, "__init__.py"))
+
+    source = "class MyType(Generic):\n    pass\n"
+
+    with open(otm.source_path(path, MODULE, "MyType"), "w") as file:
+        file.write(source)
+
+    manifest.items["MyType"] = otm.ManifestItem(
+        otm.source_hash(source), "Generic", "desc", MetaModel3d("MyType", Model3dType.BOX), '"etag"'
+    )
+    manifest.items["Removed"] = otm.ManifestItem(otm.source_hash(""))
+    otm.save(manifest, path)
+
+    loaded = otm.load(path, MODULE)
+    assert loaded.items.keys() == {"MyType"}  # there is no file for 'Removed'
+
+    item = loaded.items["MyType"]
+    assert item == manifest.items["MyType"]
+    assert item.validators().etag == '"etag"'
+    assert item.object_type("MyType", otm.read_source(path, MODULE, "MyType")).source == source
+
+    # invalid manifest means a fresh start
+    with open(os.path.join(path, otm.MANIFEST_FILE), "w") as file:
+        file.write("{")
+
+    assert not otm.load(path, MODULE).items
+    assert not os.path.exists(otm.source_path(path, MODULE, "MyType"))
@@ -1,21 +1,24 @@
 import asyncio
 import os
-from typing import Optional, Type
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type
 
 from arcor2 import helpers as hlp
+from arcor2 import rest
 from arcor2.clients import aio_persistent_storage as ps
 from arcor2.data.events import Event
-from arcor2.data.object_type import ObjectModel
+from arcor2.data.object_type import ObjectModel, ObjectType
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types import utils as otu
 from arcor2.object_types.abstract import Generic, Robot
-from arcor2.object_types.utils import built_in_types_names, get_containing_module_sources, prepare_object_types_dir
+from arcor2.object_types.utils import built_in_types_names
 from arcor2.parameter_plugins.base import TypesDict
 from arcor2.source.utils import parse
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
-from arcor2_arserver import settings
+from arcor2_arserver import robot, settings
 from arcor2_arserver.clients import persistent_storage as storage
+from arcor2_arserver.object_types import manifest as otm
 from arcor2_arserver.object_types.utils import (
     ObjectTypeData,
     ObjectTypeDict,
@@ -26,10 +29,13 @@ from arcor2_arserver.object_types.utils import (
     object_actions,
     remove_object_type,
 )
-from arcor2_arserver.robot import get_robot_meta
 from arcor2_arserver_data.events.objects import ChangedObjectTypes
 from arcor2_arserver_data.objects import ObjectTypeMeta
 
+FetchedObjectType = Optional[Tuple[ObjectType, rest.Validators]]
+
+_manifest = otm.Manifest()
+
 
 def get_types_dict() -> TypesDict:
 
@@ -76,7 +82,141 @@ async def handle_robot_urdf(robot: Type[Robot]) -> None:
         glob.logger.exception(f"Failed to download URDF for {robot.__name__}.")
 
 
-async def get_object_data(object_types: ObjectTypeDict, obj_id: str) -> None:
+def _imported(obj_id: str) -> bool:
+    return obj_id in glob.OBJECT_TYPES and glob.OBJECT_TYPES[obj_id].type_def is not None
+
+
+async def _fetch_object_type(obj_id: str) -> FetchedObjectType:
+    """Gets the object type. Known (see manifest) unchanged object types are
+    not transferred again.
+
+    :return: None if the object type is not changed and already imported.
+    """
+
+    item = _manifest.items.get(obj_id)
+    obj, validators = await storage.get_object_type_if_modified(obj_id, item.validators() if item else None)
+
+    if obj is not None:
+        return obj, validators
+
+    assert item
+
+    if _imported(obj_id):
+        return None
+
+    # not imported yet (e.g. after restart) - the source is already in the object types directory
+    source = await hlp.run_in_executor(otm.read_source, settings.OBJECT_TYPE_PATH, settings.OBJECT_TYPE_MODULE, obj_id)
+    return item.object_type(obj_id, source), validators
+
+
+def add_to_manifest(obj: ObjectType, base: Optional[str], validators: Optional[rest.Validators] = None) -> None:
+    """Should be called when the object type is imported."""
+
+    if validators is None:
+        validators = rest.Validators()
+
+    _manifest.items[obj.id] = otm.ManifestItem(otm.source_hash(obj.source), base, obj.desc, obj.model, *validators)
+
+
+def _cyclic(bases: Dict[str, Optional[str]]) -> Set[str]:
+    """Returns object types which are (indirectly) their own base."""
+
+    ret: Set[str] = set()
+
+    for obj_id in bases:
+
+        chain: List[str] = []
+        node: Optional[str] = obj_id
+
+        while node in bases and node not in chain:
+            chain.append(node)
+            node = bases[node]
+
+        if node in chain:
+            ret.update(chain[chain.index(node) :])
+
+    return ret
+
+
+class ImportScheduler:
+    """Processes object types concurrently - each one as soon as its base is
+    processed.
+
+    Bases of all the prefetched object types (the base-class DAG) are determined up front, bases of other
+    object types (fetched on demand) are checked for cycles before waiting for them.
+
+    Independent branches are imported concurrently (in the default executor). This is safe as each module is
+    written and reloaded by exactly one task and a type is imported only after its base was reloaded, so no
+    module is reloaded while another one imports it. Importlib itself serializes imports of the same module
+    (e.g. the package of object types) by per-module locks.
+    """
+
+    def __init__(self, object_types: ObjectTypeDict, prefetched: Dict[str, FetchedObjectType]) -> None:
+
+        self.object_types = object_types
+        self.prefetched = prefetched
+        self.bases: Dict[str, Optional[str]] = {}
+        self.timings: Dict[str, float] = {}  # how long it took to import each object type
+        self._tasks: Dict[str, "asyncio.Future[None]"] = {}
+
+        for obj_id, fetched in prefetched.items():
+            if fetched is not None:
+                try:
+                    self.bases[obj_id] = otu.base_from_source(fetched[0].source, obj_id)
+                except Arcor2Exception:
+                    pass  # will be disabled
+
+        self.cyclic = _cyclic(self.bases)
+
+    def process(self, obj_id: str) -> "asyncio.Future[None]":
+
+        if obj_id not in self._tasks:
+            self._tasks[obj_id] = asyncio.ensure_future(get_object_data(self.object_types, obj_id, self))
+
+        return self._tasks[obj_id]
+
+    async def process_base(self, obj_id: str, base: str) -> None:
+        """Waits until the base of the object type is processed.
+
+        :raises Arcor2Exception: When the object type is (indirectly) its own base, it would wait forever.
+        """
+
+        self.bases[obj_id] = base
+
+        chain = [obj_id]
+        node: Optional[str] = base
+
+        while node in self.bases and node not in chain:
+            chain.append(node)
+            node = self.bases[node]
+
+        if node == obj_id:
+            self.cyclic.update(chain)
+
+        if obj_id not in self.cyclic:
+            await self.process(base)
+
+        # the cycle might be also detected by the base (if it was not prefetched)
+        if obj_id in self.cyclic:
+            raise Arcor2Exception("Cyclic inheritance.")
+
+    async def run(self) -> None:
+
+        start = time.monotonic()
+
+        await asyncio.gather(*[self.process(obj_id) for obj_id in self.prefetched])
+
+        if self.timings:
+            slowest = sorted(self.timings.items(), key=lambda it: it[1], reverse=True)[:5]
+            glob.logger.info(
+                f"{len(self.timings)} object type(s) imported in {time.monotonic() - start:.3f}s, slowest: "
+                + ", ".join(f"{obj_id} ({duration:.3f}s)" for obj_id, duration in slowest)
+            )
+
+
+async def get_object_data(
+    object_types: ObjectTypeDict, obj_id: str, scheduler: Optional[ImportScheduler] = None
+) -> None:
 
     glob.logger.debug(f"Processing {obj_id}.")
 
@@ -84,38 +224,86 @@ async def get_object_data(object_types: ObjectTypeDict, obj_id: str) -> None:
         glob.logger.debug(f"{obj_id} already processed, skipping...")
         return
 
-    obj = await storage.get_object_type(obj_id)
+    if scheduler is not None and obj_id in scheduler.prefetched:
+        fetched = scheduler.prefetched[obj_id]
+    else:
+        fetched = await _fetch_object_type(obj_id)
 
-    if obj_id in glob.OBJECT_TYPES and glob.OBJECT_TYPES[obj_id].type_def is not None:
+    if fetched is None:
+        glob.logger.debug(f"No need to update {obj_id}.")
+        return
 
-        stored_type_def = glob.OBJECT_TYPES[obj_id].type_def
-        assert stored_type_def
-        if hash(get_containing_module_sources(stored_type_def)) == hash(obj.source):
-            glob.logger.debug(f"No need to update {obj_id}.")
-            return
+    obj, validators = fetched
+    item = _manifest.items.get(obj_id)
+
+    if item and item.hash == otm.source_hash(obj.source) and _imported(obj_id):
+        glob.logger.debug(f"No need to update {obj_id}.")
+        item.etag, item.last_modified = validators
+        return
+
+    # will be added again once successfully imported
+    _manifest.items.pop(obj_id, None)
+
+    if scheduler is not None and obj_id in scheduler.cyclic:
+        object_types[obj_id] = ObjectTypeData(
+            ObjectTypeMeta(obj_id, "Object type disabled.", disabled=True, problem="Cyclic inheritance.")
+        )
+        return
 
     try:
-        base = otu.base_from_source(obj.source, obj_id)
+        if scheduler is not None and obj_id in scheduler.bases:
+            base = scheduler.bases[obj_id]
+        else:
+            base = otu.base_from_source(obj.source, obj_id)
+
         if base and base not in object_types.keys() | built_in_types_names():
             glob.logger.debug(f"Getting base class {base} for {obj_id}.")
-            await get_object_data(object_types, base)
+            if scheduler is not None:
+                await scheduler.process_base(obj_id, base)
+            else:
+                await get_object_data(object_types, base)
     except Arcor2Exception:
+        cyclic = scheduler is not None and obj_id in scheduler.cyclic
         object_types[obj_id] = ObjectTypeData(
-            ObjectTypeMeta(obj_id, "Object type disabled.", disabled=True, problem="Can't get base.")
+            ObjectTypeMeta(
+                obj_id,
+                "Object type disabled.",
+                disabled=True,
+                problem="Cyclic inheritance." if cyclic else "Can't get base.",
+            )
         )
         return
 
+    start = time.monotonic()
+    await _import_object_type(object_types, obj, base, validators)
+    duration = time.monotonic() - start
+    glob.logger.debug(f"{obj_id} processed in {duration:.3f}s.")
+
+    if scheduler is not None:
+        scheduler.timings[obj_id] = duration
+
+
+async def _save_and_import_type_def(obj: ObjectType) -> Type[Generic]:
+
+    return await hlp.run_in_executor(
+        hlp.save_and_import_type_def,
+        obj.source,
+        obj.id,
+        Generic,
+        settings.OBJECT_TYPE_PATH,
+        settings.OBJECT_TYPE_MODULE,
+    )
+
+
+async def _import_object_type(
+    object_types: ObjectTypeDict, obj: ObjectType, base: Optional[str], validators: rest.Validators
+) -> None:
+
+    obj_id = obj.id
     glob.logger.debug(f"Updating {obj_id}.")
 
     try:
-        type_def = await hlp.run_in_executor(
-            hlp.save_and_import_type_def,
-            obj.source,
-            obj.id,
-            Generic,
-            settings.OBJECT_TYPE_PATH,
-            settings.OBJECT_TYPE_MODULE,
-        )
+        type_def = await _save_and_import_type_def(obj)
         assert issubclass(type_def, Generic)
         meta = meta_from_def(type_def)
         otu.get_settings_def(type_def)  # just to check if settings are ok
@@ -144,6 +332,7 @@ async def get_object_data(object_types: ObjectTypeDict, obj_id: str) -> None:
     otd = ObjectTypeData(meta, type_def, object_actions(type_def, ast), ast)
 
     object_types[obj_id] = otd
+    add_to_manifest(obj, base, validators)
 
 
 async def get_object_types() -> None:
@@ -152,6 +341,8 @@ async def get_object_types() -> None:
     :return:
     """
 
+    global _manifest
+
     assert glob.SCENE is None
 
     initialization = False
@@ -160,15 +351,32 @@ async def get_object_types() -> None:
     if not glob.OBJECT_TYPES:
         glob.logger.debug("Initialization of object types.")
         initialization = True
-        await hlp.run_in_executor(prepare_object_types_dir, settings.OBJECT_TYPE_PATH, settings.OBJECT_TYPE_MODULE)
+        _manifest = await hlp.run_in_executor(otm.load, settings.OBJECT_TYPE_PATH, settings.OBJECT_TYPE_MODULE)
         glob.OBJECT_TYPES.update(built_in_types_data())
 
+    changed_ids = storage.changed_object_types()
+
+    if not initialization and changed_ids is not None and not changed_ids:
+        glob.logger.debug("Object types not changed.")
+        return
+
     updated_object_types: ObjectTypeDict = {}
 
-    object_type_ids = {it.id for it in (await storage.get_object_type_ids()).items}
+    try:
+        object_type_ids = {it.id for it in (await storage.get_object_type_ids()).items}
 
-    for obj_id in object_type_ids:
-        await get_object_data(updated_object_types, obj_id)
+        # when changes are known, only affected object types are checked
+        to_check = list(object_type_ids if initialization or changed_ids is None else object_type_ids & changed_ids)
+        prefetched = dict(zip(to_check, await asyncio.gather(*[_fetch_object_type(obj_id) for obj_id in to_check])))
+    except Arcor2Exception:
+        # otherwise, the changes would be lost (during initialization, everything has to be checked next time)
+        storage.restore_changed_object_types(None if initialization else changed_ids)
+        raise
+
+    await ImportScheduler(updated_object_types, prefetched).run()
+
+    for obj_id in _manifest.items.keys() - object_type_ids:
+        del _manifest.items[obj_id]
 
     removed_object_ids = {
         obj for obj in glob.OBJECT_TYPES.keys() if obj not in object_type_ids
@@ -225,7 +433,7 @@ async def get_object_types() -> None:
     for obj_type in updated_object_types.values():
 
         if obj_type.type_def and issubclass(obj_type.type_def, Robot) and not obj_type.type_def.abstract():
-            await get_robot_meta(obj_type)
+            await robot.get_robot_meta(obj_type)
             asyncio.ensure_future(handle_robot_urdf(obj_type.type_def))
 
     # if object does not change but its base has changed, it has to be reloaded
@@ -245,6 +453,8 @@ async def get_object_types() -> None:
                 settings.OBJECT_TYPE_MODULE,
             )
 
+    await hlp.run_in_executor(otm.save, _manifest, settings.OBJECT_TYPE_PATH)
+
 
 async def get_robot_instance(robot_id: str, end_effector_id: Optional[str] = None) -> Robot:
 
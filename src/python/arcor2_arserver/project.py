@@ -2,6 +2,7 @@ import asyncio
 from typing import Any, AsyncIterator, Callable, Dict, List, Set, Tuple, Union
 
 from arcor2 import helpers as hlp
+from arcor2 import transformations as tr
 from arcor2.action import results_to_json
 from arcor2.cached import CachedProject, CachedScene, UpdateableCachedProject
 from arcor2.data import common
@@ -10,9 +11,10 @@ from arcor2.parameter_plugins import ParameterPluginException
 from arcor2.parameter_plugins.utils import known_parameter_types, plugin_from_type_name
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
+from arcor2_arserver import reachability
 from arcor2_arserver.clients import persistent_storage as storage
 from arcor2_arserver.objects_actions import get_types_dict
-from arcor2_arserver.scene import open_scene
+from arcor2_arserver.scene import open_scene, scene_started
 from arcor2_arserver_data.events.actions import ActionExecution, ActionResult
 from arcor2_arserver_data.events.common import ShowMainScreen
 from arcor2_arserver_data.events.project import ProjectClosed
@@ -43,6 +45,7 @@ async def close_project() -> None:
     assert glob.PROJECT
 
     project_id = glob.PROJECT.project.id
+    reachability.stop()
     glob.SCENE = None
     glob.PROJECT = None
     PREV_RESULTS.clear()
@@ -223,7 +226,7 @@ async def remove_object_references_from_projects(obj_id: str) -> None:
 
         # TODO remove invalid logic items
 
-        await storage.update_project(project.project)
+        await storage.save_project(project)
         updated_project_ids.add(project.id)
 
     glob.logger.info("Updated projects: {}".format(updated_project_ids))
@@ -233,9 +236,7 @@ async def projects(scene_id: str) -> AsyncIterator[UpdateableCachedProject]:
 
     id_list = await storage.get_projects()
 
-    for project_meta in id_list.items:
-
-        project = await storage.get_project(project_meta.id)
+    for project in await storage.get_projects_bulk(project_meta.id for project_meta in id_list.items):
 
         if project.scene_id != scene_id:
             continue
@@ -299,7 +300,7 @@ async def invalidate_joints_using_object_as_parent(obj: common.SceneObject) -> N
             glob.logger.debug(f"Invalidating joints for {project.name}/{ap.name}.")
             project.invalidate_joints(ap.id)
 
-        await storage.update_project(project.project)
+        await storage.save_project(project)
 
 
 async def projects_referencing_object(scene_id: str, obj_id: str) -> AsyncIterator[CachedProject]:
@@ -376,12 +377,14 @@ async def open_project(project_id: str) -> None:
         await open_scene(project.scene_id)
 
     assert glob.SCENE
-    for ap in project.action_points_with_parent:
-
-        assert ap.parent
 
-        if ap.parent not in glob.SCENE.object_ids | project.action_points_ids:
-            glob.SCENE = None
-            raise Arcor2Exception(f"Action point's {ap.name} parent not available.")
+    try:  # all parents have to exist and must not form a loop
+        tr.action_point_roots(glob.SCENE, project, project.action_points_with_parent)
+    except Arcor2Exception:
+        glob.SCENE = None
+        raise
 
     glob.PROJECT = project
+
+    if scene_started():
+        reachability.start()
@@ -0,0 +1,298 @@
+import asyncio
+import os
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from arcor2 import transformations as tr
+from arcor2.cached import CachedProject, CachedScene
+from arcor2.data.common import BareActionPoint, Joint, Pose
+from arcor2.data.lite import LiteJoint, LitePose
+from arcor2.data.robot import InverseKinematicsResult
+from arcor2.exceptions import Arcor2Exception
+from arcor2.object_types.abstract import Robot
+from arcor2_arserver import globals as glob
+from arcor2_arserver import robot
+from arcor2_arserver_data.robot import OrientationReachability
+
+"""
+Reachability of AP orientations, precomputed in the background while the scene is started (and a project is opened).
+
+For each robot supporting IK, each of its end effectors and each AP orientation, IK is computed (using one batch per
+robot and end effector) starting from the current joints of the robot. Results are cached under a key made of the
+(absolute) pose, pose of the robot and the start joints, so the IK RPC can be answered from the cache as well - but
+only while the robot stays in the same configuration, otherwise IK might end up in a different solution. The map
+itself is not recomputed when the robot moves. When an AP (or its orientation) changes, only entries
+of the AP and of its descendants are invalidated, a change of any scene object (e.g. the robot pose, or an obstacle)
+invalidates everything. Invalidated entries are computed again shortly after the change.
+"""
+
+DELAY = float(os.getenv("ARCOR2_REACHABILITY_DELAY", 0.1))  # s, changes made within the delay are processed at once
+
+Key = Tuple[str, str, LitePose, LitePose, Optional[Tuple[LiteJoint, ...]]]
+Entry = Tuple[str, str, str]  # robot ID, end effector ID, orientation ID
+
+
+def make_key(
+    robot_id: str, end_effector_id: str, pose: Pose, robot_pose: Pose, start_joints: Optional[List[Joint]] = None
+) -> Key:
+
+    return (
+        robot_id,
+        end_effector_id,
+        LitePose.from_pose(pose),
+        LitePose.from_pose(robot_pose),
+        None if start_joints is None else tuple(LiteJoint.from_joint(joint) for joint in start_joints),
+    )
+
+
+def _supports_ik(robot_inst: Robot) -> bool:
+
+    obj_type = glob.OBJECT_TYPES.get(robot_inst.__class__.__name__)
+    return bool(obj_type and obj_type.robot_meta and obj_type.robot_meta.features.inverse_kinematics)
+
+
+class ReachabilityMap:
+    def __init__(self, scene: CachedScene, project: CachedProject) -> None:
+
+        self.scene = scene
+        self.project = project
+
+        self._results: Dict[Key, InverseKinematicsResult] = {}
+        self._entries: Dict[Entry, Key] = {}
+        self._depends: Dict[Entry, FrozenSet[str]] = {}  # the AP of the orientation and its AP parents
+        self._pending: Set[Entry] = set()  # IK is being computed
+        self._known_aps: Set[str] = set()
+
+        self._changed = asyncio.Event()
+        self._changed.set()
+        self._task: Optional[asyncio.Task] = None
+
+        scene.subscribe_poses(self.invalidate)
+        project.subscribe_poses(self.invalidate)
+
+    def start(self) -> None:
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._worker())
+
+    def stop(self) -> None:
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self.scene.unsubscribe_poses(self.invalidate)
+        self.project.unsubscribe_poses(self.invalidate)
+
+    def _is_ap(self, item_id: str) -> bool:
+
+        if item_id in self._known_aps:  # might be already removed
+            return True
+
+        try:
+            self.project.bare_action_point(item_id)
+        except Arcor2Exception:
+            return False
+        return True
+
+    def invalidate(self, item_id: Optional[str] = None) -> None:
+        """Drops entries affected by a change of the object/AP.
+
+        :param item_id: None to drop everything.
+        :return:
+        """
+
+        if item_id is None or not self._is_ap(item_id):
+            self._results.clear()
+            self._entries.clear()
+            self._depends.clear()
+            self._pending.clear()
+        else:
+            for entry in [entry for entry, depends in self._depends.items() if item_id in depends]:
+                self._entries.pop(entry, None)
+                self._pending.discard(entry)
+                del self._depends[entry]
+
+        self._changed.set()
+
+    def _ap_chain(self, ap: BareActionPoint) -> FrozenSet[str]:
+
+        chain: Set[str] = set()
+
+        while ap.id not in chain:
+
+            chain.add(ap.id)
+
+            if not ap.parent:
+                break
+
+            try:
+                ap = self.project.bare_action_point(ap.parent)
+            except Arcor2Exception:  # parent is an object
+                break
+
+        return frozenset(chain)
+
+    async def _worker(self) -> None:
+
+        while True:
+
+            await self._changed.wait()
+            await asyncio.sleep(DELAY)
+            self._changed.clear()
+
+            try:
+                await self._update()
+            except Arcor2Exception:
+                glob.logger.exception("Failed to update the reachability map.")
+
+    async def _update(self) -> None:
+
+        self._known_aps = {ap.id for ap in self.project.action_points}
+
+        for obj_id, inst in list(glob.SCENE_OBJECT_INSTANCES.items()):
+
+            if not isinstance(inst, Robot) or not _supports_ik(inst):
+                continue
+
+            robot_pose = self.scene.object(obj_id).pose
+            assert robot_pose
+
+            start_joints = await robot.get_robot_joints(obj_id)
+
+            for end_effector_id in sorted(await robot.get_end_effectors(obj_id)):
+                await self._update_end_effector(obj_id, end_effector_id, robot_pose, start_joints)
+
+        # results of changed poses are not needed anymore
+        used = set(self._entries.values())
+        self._results = {key: res for key, res in self._results.items() if key in used}
+
+    async def _update_end_effector(
+        self, robot_id: str, end_effector_id: str, robot_pose: Pose, start_joints: List[Joint]
+    ) -> None:
+
+        todo: List[Tuple[Entry, Key, Pose]] = []
+
+        for ap in self.project.action_points:
+            for ori in self.project.ap_orientations(ap.id):
+
+                entry = (robot_id, end_effector_id, ori.id)
+
+                if entry in self._entries or entry in self._pending:
+                    continue
+
+                try:
+                    pose = tr.abs_pose_from_ap_orientation(self.scene, self.project, ori.id)
+                except Arcor2Exception:  # e.g. parents of the AP form a loop
+                    continue
+
+                key = make_key(robot_id, end_effector_id, pose, robot_pose, start_joints)
+                self._depends[entry] = self._ap_chain(ap)
+
+                if key in self._results:
+                    self._entries[entry] = key
+                else:
+                    todo.append((entry, key, pose))
+
+        if not todo:
+            return
+
+        self._pending.update(entry for entry, _, _ in todo)
+
+        try:
+            results = await robot.ik_batch(robot_id, end_effector_id, [pose for _, _, pose in todo], start_joints)
+        except Arcor2Exception:
+            glob.logger.exception(f"Failed to compute IK for robot {robot_id} and end effector {end_effector_id}.")
+            self._pending.difference_update(entry for entry, _, _ in todo)
+            return
+
+        for (entry, key, _), res in zip(todo, results):
+
+            if entry not in self._pending:  # invalidated in the meantime
+                continue
+
+            self._pending.discard(entry)
+            self._results[key] = res
+            self._entries[entry] = key
+
+    def query(self, robot_id: str, end_effector_id: str) -> List[OrientationReachability]:
+        """Reachability of all orientations in the project (not yet computed
+        ones are included with reachable set to None)."""
+
+        ret: List[OrientationReachability] = []
+
+        for ap in self.project.action_points:
+            for ori in self.project.ap_orientations(ap.id):
+
+                key = self._entries.get((robot_id, end_effector_id, ori.id))
+                res = self._results.get(key) if key else None
+
+                if res is None:
+                    ret.append(OrientationReachability(ori.id))
+                else:
+                    ret.append(OrientationReachability(ori.id, res.joints is not None, res.joints, res.error))
+
+        return ret
+
+    def cached_ik(
+        self, robot_id: str, end_effector_id: str, pose: Pose, start_joints: Optional[List[Joint]] = None
+    ) -> Optional[InverseKinematicsResult]:
+
+        try:
+            robot_pose = self.scene.object(robot_id).pose
+        except Arcor2Exception:
+            return None
+
+        if robot_pose is None:
+            return None
+
+        return self._results.get(make_key(robot_id, end_effector_id, pose, robot_pose, start_joints))
+
+
+_map: Optional[ReachabilityMap] = None
+
+
+def start() -> None:
+    """To be called when the scene was started or a project was opened (with
+    the scene already started)."""
+
+    global _map
+
+    stop()
+
+    if glob.SCENE and glob.PROJECT:
+        _map = ReachabilityMap(glob.SCENE, glob.PROJECT)
+        _map.start()
+
+
+def stop() -> None:
+    """To be called when the scene is being stopped or the project closed."""
+
+    global _map
+
+    if _map is not None:
+        _map.stop()
+        _map = None
+
+
+def reachability_map() -> ReachabilityMap:
+
+    if _map is None or _map.scene is not glob.SCENE or _map.project is not glob.PROJECT:
+        raise Arcor2Exception("Reachability is computed only for a project with started scene.")
+
+    return _map
+
+
+def cached_ik(
+    robot_id: str, end_effector_id: str, pose: Pose, start_joints: Optional[List[Joint]] = None
+) -> Optional[InverseKinematicsResult]:
+    """Returns IK result from the cache (computed with avoid_collisions), if
+    there is one.
+
+    Results are stored for explicit start joints (joints of the robot at the time of computation), so without
+    them, nothing is found.
+    """
+
+    try:
+        return reachability_map().cached_ik(robot_id, end_effector_id, pose, start_joints)
+    except Arcor2Exception:
+        return None
@@ -5,6 +5,7 @@ from typed_ast.ast3 import AST
 
 import arcor2.helpers as hlp
 from arcor2.data import common
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult, RobotState
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types.abstract import Robot
 from arcor2_arserver import globals as glob
@@ -71,6 +72,17 @@ async def get_robot_joints(robot_id: str) -> List[common.Joint]:
     return await hlp.run_in_executor(robot_inst.robot_joints)
 
 
+async def get_robot_state(robot_id: str, end_effectors: bool = True) -> RobotState:
+    """
+    :param robot_id:
+    :param end_effectors: Whether to get (global) poses of end effectors.
+    :return: Joints and poses of end effectors, obtained at once.
+    """
+
+    robot_inst = await osa.get_robot_instance(robot_id)
+    return await hlp.run_in_executor(robot_inst.robot_state, end_effectors)
+
+
 def feature(tree: AST, robot_type: Type[Robot], func_name: str) -> bool:
 
     if not function_implemented(tree, func_name):
@@ -156,6 +168,29 @@ async def fk(robot_id: str, end_effector_id: str, joints: List[common.Joint]) ->
     return await hlp.run_in_executor(robot_inst.forward_kinematics, end_effector_id, joints)
 
 
+async def ik_batch(
+    robot_id: str,
+    end_effector_id: str,
+    poses: List[common.Pose],
+    start_joints: Optional[List[common.Joint]] = None,
+    avoid_collisions: bool = True,
+) -> List[InverseKinematicsResult]:
+
+    robot_inst = await osa.get_robot_instance(robot_id)
+
+    return await hlp.run_in_executor(
+        robot_inst.inverse_kinematics_batch, end_effector_id, poses, start_joints, avoid_collisions
+    )
+
+
+async def fk_batch(
+    robot_id: str, end_effector_id: str, joints: List[List[common.Joint]]
+) -> List[ForwardKinematicsResult]:
+
+    robot_inst = await osa.get_robot_instance(robot_id)
+    return await hlp.run_in_executor(robot_inst.forward_kinematics_batch, end_effector_id, joints)
+
+
 async def check_robot_before_move(robot_id: str) -> None:
 
     robot_inst = await osa.get_robot_instance(robot_id)
@@ -7,15 +7,17 @@ from arcor2.exceptions import Arcor2Exception
 from arcor2.helpers import run_in_executor
 from arcor2.image import image_to_str
 from arcor2.object_types.abstract import Camera
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
 from arcor2_arserver.camera import get_camera_instance
-from arcor2_arserver.decorators import scene_needed
+from arcor2_arserver.decorators import camera_resource, scene_needed
 from arcor2_arserver.scene import ensure_scene_started, update_scene_object_pose
 from arcor2_arserver_data.events.common import ProcessState
 from arcor2_arserver_data.rpc.camera import CalibrateCamera, CameraColorImage, CameraColorParameters
 
 
+@rpc_resources(camera_resource)
 @scene_needed
 async def camera_color_image_cb(req: CameraColorImage.Request, ui: WsClient) -> CameraColorImage.Response:
 
@@ -28,6 +30,7 @@ async def camera_color_image_cb(req: CameraColorImage.Request, ui: WsClient) ->
     return resp
 
 
+@rpc_resources(camera_resource)
 @scene_needed
 async def camera_color_parameters_cb(
     req: CameraColorParameters.Request, ui: WsClient
@@ -65,6 +68,7 @@ async def calibrate_camera(camera: Camera) -> None:
     await notif.broadcast_event(ProcessState(ProcessState.Data(CAMERA_CALIB, ProcessState.Data.StateEnum.Finished)))
 
 
+@rpc_resources(camera_resource)
 @scene_needed
 async def calibrate_camera_cb(req: CalibrateCamera.Request, ui: WsClient) -> None:
 
@@ -3,12 +3,14 @@ import asyncio
 from websockets.server import WebSocketServerProtocol as WsClient
 
 from arcor2.exceptions import Arcor2Exception
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import decorators
 from arcor2_arserver import globals as glob
 from arcor2_arserver.execution import build_and_upload_package, run_temp_package
 from arcor2_arserver_data import rpc
 
 
+@rpc_resources()
 async def build_project_cb(req: rpc.b.BuildProject.Request, ui: WsClient) -> rpc.b.BuildProject.Response:
     """Builds project and uploads resulting package to the execution unit.
 
@@ -13,6 +13,7 @@ from arcor2.data.scene import MeshFocusAction
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types.abstract import GenericWithPose, Robot
 from arcor2.source.utils import tree_to_str
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
 from arcor2_arserver import objects_actions as osa
@@ -241,6 +242,7 @@ async def new_object_type_cb(req: srpc.o.NewObjectType.Request, ui: WsClient) ->
     actions = object_actions(type_def, ast)
 
     await storage.update_object_type(obj)
+    osa.add_to_manifest(obj, meta.base)
 
     glob.OBJECT_TYPES[meta.type] = ObjectTypeData(meta, type_def, actions, ast)
     add_ancestor_actions(meta.type, glob.OBJECT_TYPES)
@@ -251,6 +253,7 @@ async def new_object_type_cb(req: srpc.o.NewObjectType.Request, ui: WsClient) ->
     return None
 
 
+@rpc_resources()
 async def get_object_actions_cb(req: srpc.o.GetActions.Request, ui: WsClient) -> srpc.o.GetActions.Response:
 
     try:
@@ -259,6 +262,7 @@ async def get_object_actions_cb(req: srpc.o.GetActions.Request, ui: WsClient) ->
         raise Arcor2Exception(f"Unknown object type: '{req.args.type}'.")
 
 
+@rpc_resources()
 async def get_object_types_cb(req: srpc.o.GetObjectTypes.Request, ui: WsClient) -> srpc.o.GetObjectTypes.Response:
     return srpc.o.GetObjectTypes.Response(data=[obj.meta for obj in glob.OBJECT_TYPES.values()])
 
@@ -358,7 +362,7 @@ async def add_override_cb(req: srpc.o.AddOverride.Request, ui: WsClient) -> None
         glob.PROJECT.overrides[obj.id] = []
 
     glob.PROJECT.overrides[obj.id].append(req.args.override)
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_attributes_modified()
 
     evt = sevts.o.OverrideUpdated(req.args.override)
     evt.change_type = events.Event.Type.ADD
@@ -379,7 +383,7 @@ async def update_override_cb(req: srpc.o.UpdateOverride.Request, ui: WsClient) -
     for override in glob.PROJECT.overrides[obj.id]:
         if override.name == override.name:
             override.value = req.args.override.value
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_attributes_modified()
 
     evt = sevts.o.OverrideUpdated(req.args.override)
     evt.change_type = events.Event.Type.UPDATE
@@ -402,7 +406,7 @@ async def delete_override_cb(req: srpc.o.DeleteOverride.Request, ui: WsClient) -
     if not glob.PROJECT.overrides[obj.id]:
         del glob.PROJECT.overrides[obj.id]
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_attributes_modified()
 
     evt = sevts.o.OverrideUpdated(req.args.override)
     evt.change_type = events.Event.Type.REMOVE
@@ -7,17 +7,24 @@ from websockets.server import WebSocketServerProtocol as WsClient
 
 from arcor2 import helpers as hlp
 from arcor2 import transformations as tr
-from arcor2.cached import CachedProjectException, CachedScene, UpdateableCachedProject
+from arcor2.cached import (
+    CachedProject,
+    CachedProjectException,
+    CachedScene,
+    ProjectTransaction,
+    UpdateableCachedProject,
+)
 from arcor2.data import common
 from arcor2.data.events import Event, PackageState
 from arcor2.exceptions import Arcor2Exception
-from arcor2.logic import LogicContainer, check_for_loops
+from arcor2.logic import LogicContainer, check_logic_item_for_loops
 from arcor2.object_types.abstract import Robot
 from arcor2.parameter_plugins.base import ParameterPluginException
 from arcor2.parameter_plugins.utils import plugin_from_type_name
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
-from arcor2_arserver import project
+from arcor2_arserver import project, reachability
 from arcor2_arserver.clients import persistent_storage as storage
 from arcor2_arserver.decorators import no_project, project_needed, scene_needed
 from arcor2_arserver.helpers import unique_name
@@ -32,7 +39,7 @@ from arcor2_arserver.project import (
     project_problems,
 )
 from arcor2_arserver.robot import get_end_effector_pose, get_robot_joints
-from arcor2_arserver.scene import can_modify_scene, ensure_scene_started, get_instance, open_scene
+from arcor2_arserver.scene import can_modify_scene, ensure_scene_started, get_instance, open_scene, scene_started
 from arcor2_arserver_data import events as sevts
 from arcor2_arserver_data import rpc as srpc
 
@@ -44,7 +51,7 @@ async def managed_project(project_id: str, make_copy: bool = False) -> AsyncGene
 
     if glob.PROJECT and glob.PROJECT.id == project_id:
         if make_copy:
-            project = copy.deepcopy(glob.PROJECT)
+            project = glob.PROJECT.transaction()  # never committed, the changes are saved as a new project
             save_back = True
         else:
             project = glob.PROJECT
@@ -54,12 +61,16 @@ async def managed_project(project_id: str, make_copy: bool = False) -> AsyncGene
 
     if make_copy:
         project.id = common.uid()
+        project.modified = None  # it is a new project, which has to be saved as a whole
 
     try:
         yield project
     finally:
         if save_back:
-            asyncio.ensure_future(storage.update_project(project.project))
+            if isinstance(project, ProjectTransaction):
+                # the transaction reads through to the opened project, which might be changed before the copy is saved
+                project = UpdateableCachedProject(project.project)  # copied by the constructor
+            asyncio.ensure_future(storage.save_project(project))
 
 
 @scene_needed
@@ -198,7 +209,7 @@ async def project_info(
     )
 
     try:
-        cached_project = UpdateableCachedProject(project)
+        cached_project = CachedProject(project)  # read-only, no need to copy the project
     except CachedProjectException as e:
         pd.problems.append(str(e))
         return pd
@@ -226,6 +237,7 @@ async def project_info(
     return pd
 
 
+@rpc_resources()
 async def list_projects_cb(req: srpc.p.ListProjects.Request, ui: WsClient) -> srpc.p.ListProjects.Response:
 
     projects = await storage.get_projects()
@@ -280,11 +292,11 @@ async def update_action_point_joints_using_robot_cb(
     assert glob.SCENE
     assert glob.PROJECT
 
-    robot_joints = glob.PROJECT.joints(req.args.joints_id)
+    ap, robot_joints = glob.PROJECT.ap_and_joints(req.args.joints_id)
     robot_joints.joints = await get_robot_joints(robot_joints.robot_id)
     robot_joints.is_valid = True
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.JointsChanged(robot_joints)
     evt.change_type = Event.Type.UPDATE
@@ -299,7 +311,7 @@ async def update_action_point_joints_cb(req: srpc.p.UpdateActionPointJoints.Requ
     assert glob.SCENE
     assert glob.PROJECT
 
-    robot_joints = glob.PROJECT.joints(req.args.joints_id)
+    ap, robot_joints = glob.PROJECT.ap_and_joints(req.args.joints_id)
 
     if {joint.name for joint in req.args.joints} != {joint.name for joint in robot_joints.joints}:
         raise Arcor2Exception("Joint names does not match the robot.")
@@ -307,7 +319,7 @@ async def update_action_point_joints_cb(req: srpc.p.UpdateActionPointJoints.Requ
     # TODO maybe joints values should be normalized? To <0, 2pi> or to <-pi, pi>?
     robot_joints.joints = req.args.joints
     robot_joints.is_valid = True
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.JointsChanged(robot_joints)
     evt.change_type = Event.Type.UPDATE
@@ -336,8 +348,6 @@ async def remove_action_point_joints_cb(req: srpc.p.RemoveActionPointJoints.Requ
 
     joints_to_be_removed = glob.PROJECT.remove_joints(req.args.joints_id)
 
-    glob.PROJECT.update_modified()
-
     evt = sevts.p.JointsChanged(joints_to_be_removed)
     evt.change_type = Event.Type.REMOVE
     asyncio.ensure_future(notif.broadcast_event(evt))
@@ -364,7 +374,7 @@ async def rename_action_point_cb(req: srpc.p.RenameActionPoint.Request, ui: WsCl
 
     ap.name = req.args.new_name
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.ActionPointChanged(ap)
     evt.change_type = Event.Type.UPDATE_BASE
@@ -429,7 +439,7 @@ async def update_action_point_parent_cb(req: srpc.p.UpdateActionPointParent.Requ
         tr.make_global_ap_relative(glob.SCENE, glob.PROJECT, ap, req.args.new_parent_id)
 
     ap.parent = req.args.new_parent_id
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     """
     Can't send orientation changes and then ActionPointChanged/UPDATE_BASE (or vice versa)
@@ -543,10 +553,10 @@ async def update_action_point_orientation_cb(req: srpc.p.UpdateActionPointOrient
     assert glob.SCENE
     assert glob.PROJECT
 
-    orientation = glob.PROJECT.orientation(req.args.orientation_id)
+    ap, orientation = glob.PROJECT.bare_ap_and_orientation(req.args.orientation_id)
     orientation.orientation = req.args.orientation
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.OrientationChanged(orientation)
     evt.change_type = Event.Type.UPDATE
@@ -616,7 +626,7 @@ async def update_action_point_orientation_using_robot_cb(
 
     ori.orientation = new_pose.orientation
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.OrientationChanged(ori)
     evt.change_type = Event.Type.UPDATE
@@ -681,7 +691,7 @@ async def save_project_cb(req: srpc.p.SaveProject.Request, ui: WsClient) -> None
     assert glob.SCENE
     assert glob.PROJECT
 
-    glob.PROJECT.modified = await storage.update_project(glob.PROJECT.project)
+    await storage.save_project(glob.PROJECT)
     asyncio.ensure_future(notif.broadcast_event(sevts.p.ProjectSaved()))
     return None
 
@@ -702,7 +712,7 @@ async def new_project_cb(req: srpc.p.NewProject.Request, ui: WsClient) -> None:
             raise Arcor2Exception("Another scene is opened.")
 
         if glob.SCENE.has_changes():
-            glob.SCENE.modified = await storage.update_scene(glob.SCENE.scene)
+            await storage.save_scene(glob.SCENE)
     else:
 
         if req.args.scene_id not in {scene.id for scene in (await storage.get_scenes()).items}:
@@ -715,6 +725,9 @@ async def new_project_cb(req: srpc.p.NewProject.Request, ui: WsClient) -> None:
         common.Project(common.uid(), req.args.name, req.args.scene_id, desc=req.args.desc, has_logic=req.args.has_logic)
     )
 
+    if scene_started():
+        reachability.start()
+
     assert glob.SCENE
 
     asyncio.ensure_future(
@@ -935,8 +948,8 @@ async def add_action_cb(req: srpc.p.AddAction.Request, ui: WsClient) -> None:
 
     action_meta = find_object_action(glob.SCENE, new_action)
 
-    updated_project = copy.deepcopy(glob.PROJECT)
-    updated_project.upsert_action(req.args.action_point_id, new_action)
+    updated_project = glob.PROJECT.transaction()
+    updated_project.upsert_action(ap.id, new_action)
 
     check_flows(updated_project, new_action, action_meta)
     check_action_params(glob.SCENE, updated_project, new_action, action_meta)
@@ -944,7 +957,7 @@ async def add_action_cb(req: srpc.p.AddAction.Request, ui: WsClient) -> None:
     if req.dry_run:
         return None
 
-    glob.PROJECT.upsert_action(ap.id, new_action)
+    updated_project.commit()
 
     evt = sevts.p.ActionChanged(new_action)
     evt.change_type = Event.Type.ADD
@@ -960,9 +973,8 @@ async def update_action_cb(req: srpc.p.UpdateAction.Request, ui: WsClient) -> No
     assert glob.PROJECT
     assert glob.SCENE
 
-    updated_project = copy.deepcopy(glob.PROJECT)
-
-    updated_action = updated_project.action(req.args.action_id)
+    ap, orig_action = glob.PROJECT.action_point_and_action(req.args.action_id)
+    updated_action = copy.copy(orig_action)
 
     if req.args.parameters is not None:
         updated_action.parameters = req.args.parameters
@@ -971,15 +983,16 @@ async def update_action_cb(req: srpc.p.UpdateAction.Request, ui: WsClient) -> No
 
     updated_action_meta = find_object_action(glob.SCENE, updated_action)
 
+    updated_project = glob.PROJECT.transaction()
+    updated_project.upsert_action(ap.id, updated_action)
+
     check_flows(updated_project, updated_action, updated_action_meta)
     check_action_params(glob.SCENE, updated_project, updated_action, updated_action_meta)
 
     if req.dry_run:
         return None
 
-    orig_action = glob.PROJECT.action(req.args.action_id)
-    orig_action.parameters = updated_action.parameters
-    glob.PROJECT.update_modified()
+    updated_project.commit()
 
     evt = sevts.p.ActionChanged(updated_action)
     evt.change_type = Event.Type.UPDATE
@@ -1131,11 +1144,7 @@ async def add_logic_item_cb(req: srpc.p.AddLogicItem.Request, ui: WsClient) -> N
 
     logic_item = common.LogicItem(common.uid(), req.args.start, req.args.end, req.args.condition)
     check_logic_item(glob.PROJECT, logic_item)
-
-    if logic_item.start != logic_item.START:
-        updated_project = copy.deepcopy(glob.PROJECT)
-        updated_project.upsert_logic_item(logic_item)
-        check_for_loops(updated_project, logic_item.parse_start().start_action_id)
+    check_logic_item_for_loops(glob.PROJECT, logic_item)
 
     if req.dry_run:
         return
@@ -1155,17 +1164,12 @@ async def update_logic_item_cb(req: srpc.p.UpdateLogicItem.Request, ui: WsClient
     assert glob.PROJECT
     assert glob.SCENE
 
-    updated_project = copy.deepcopy(glob.PROJECT)
-    updated_logic_item = updated_project.logic_item(req.args.logic_item_id)
-
-    updated_logic_item.start = req.args.start
-    updated_logic_item.end = req.args.end
-    updated_logic_item.condition = req.args.condition
+    glob.PROJECT.logic_item(req.args.logic_item_id)  # check that it exists
 
-    check_logic_item(updated_project, updated_logic_item)
+    updated_logic_item = common.LogicItem(req.args.logic_item_id, req.args.start, req.args.end, req.args.condition)
 
-    if updated_logic_item.start != updated_logic_item.START:
-        check_for_loops(updated_project, updated_logic_item.parse_start().start_action_id)
+    check_logic_item(glob.PROJECT, updated_logic_item)
+    check_logic_item_for_loops(glob.PROJECT, updated_logic_item)
 
     if req.dry_run:
         return
@@ -1317,7 +1321,7 @@ async def rename_project_cb(req: srpc.p.RenameProject.Request, ui: WsClient) ->
     async with managed_project(req.args.project_id) as project:
 
         project.name = req.args.new_name
-        project.update_modified()
+        project.update_attributes_modified()
 
         evt = sevts.p.ProjectChanged(project.bare)
         evt.change_type = Event.Type.UPDATE_BASE
@@ -1348,7 +1352,7 @@ async def update_project_description_cb(req: srpc.p.UpdateProjectDescription.Req
     async with managed_project(req.args.project_id) as project:
 
         project.desc = req.args.new_description
-        project.update_modified()
+        project.update_attributes_modified()
 
         evt = sevts.p.ProjectChanged(project.bare)
         evt.change_type = Event.Type.UPDATE_BASE
@@ -1370,7 +1374,7 @@ async def update_project_has_logic_cb(req: srpc.p.UpdateProjectHasLogic.Request,
             """
 
         project.has_logic = req.args.new_has_logic
-        project.update_modified()
+        project.update_attributes_modified()
 
         evt = sevts.p.ProjectChanged(project.bare)
         evt.change_type = Event.Type.UPDATE_BASE
@@ -1390,7 +1394,7 @@ async def rename_action_point_joints_cb(req: srpc.p.RenameActionPointJoints.Requ
         return None
 
     joints.name = req.args.new_name
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.JointsChanged(joints)
     evt.change_type = Event.Type.UPDATE_BASE
@@ -1411,7 +1415,7 @@ async def rename_action_point_orientation_cb(req: srpc.p.RenameActionPointOrient
         return None
 
     ori.name = req.args.new_name
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.OrientationChanged(ori)
     evt.change_type = Event.Type.UPDATE_BASE
@@ -1430,10 +1434,10 @@ async def rename_action_cb(req: srpc.p.RenameAction.Request, ui: WsClient) -> No
     if req.dry_run:
         return None
 
-    act = glob.PROJECT.action(req.args.action_id)
+    ap, act = glob.PROJECT.action_point_and_action(req.args.action_id)
     act.name = req.args.new_name
 
-    glob.PROJECT.update_modified()
+    glob.PROJECT.update_ap_modified(ap.id)
 
     evt = sevts.p.ActionChanged(act)
     evt.change_type = Event.Type.UPDATE_BASE
@@ -1,112 +1,31 @@
 import asyncio
-import time
-from typing import Awaitable, Callable, Dict
 
 from arcor2_calibration_data import client as calib_client
 from arcor2_calibration_data.client import CalibrateRobotArgs
 from websockets.server import WebSocketServerProtocol as WsClient
 
 from arcor2 import transformations as tr
-from arcor2 import ws_server
 from arcor2.clients.persistent_storage import URL as ps_url
 from arcor2.data import common
 from arcor2.exceptions import Arcor2Exception
 from arcor2.helpers import run_in_executor
 from arcor2.object_types.abstract import Camera, Robot
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import camera
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
 from arcor2_arserver import objects_actions as osa
-from arcor2_arserver import robot
-from arcor2_arserver.decorators import project_needed, scene_needed
-from arcor2_arserver.scene import ensure_scene_started, scene_started, update_scene_object_pose
-from arcor2_arserver_data import events as sevts
+from arcor2_arserver import reachability, robot, telemetry
+from arcor2_arserver.decorators import project_needed, robot_resource, scene_needed
+from arcor2_arserver.scene import ensure_scene_started, update_scene_object_pose
 from arcor2_arserver_data import rpc as srpc
 from arcor2_arserver_data.events.common import ProcessState
 from arcor2_arserver_data.events.robot import HandTeachingMode
 
 RBT_CALIB = "RobotCalibration"
 
-TaskDict = Dict[str, asyncio.Task]
-
-ROBOT_JOINTS_TASKS: TaskDict = {}
-EEF_POSE_TASKS: TaskDict = {}
-
-EVENT_PERIOD = 0.1
-
-
-async def robot_joints_event(robot_id: str) -> None:
-
-    global ROBOT_JOINTS_TASKS
-
-    glob.logger.info(f"Sending '{sevts.r.RobotJoints.__name__}' for robot '{robot_id}' started.")
-    while scene_started() and glob.ROBOT_JOINTS_REGISTERED_UIS[robot_id]:
-
-        start = time.monotonic()
-
-        try:
-            evt = sevts.r.RobotJoints(sevts.r.RobotJoints.Data(robot_id, (await robot.get_robot_joints(robot_id))))
-        except Arcor2Exception as e:
-            glob.logger.error(f"Failed to get joints for {robot_id}. {str(e)}")
-            break
-
-        evt_json = evt.to_json()
-        await asyncio.gather(
-            *[ws_server.send_json_to_client(ui, evt_json) for ui in glob.ROBOT_JOINTS_REGISTERED_UIS[robot_id]]
-        )
-
-        end = time.monotonic()
-        await asyncio.sleep(EVENT_PERIOD - (end - start))
-
-    del ROBOT_JOINTS_TASKS[robot_id]
-
-    # TODO notify UIs that registration was cancelled
-    del glob.ROBOT_JOINTS_REGISTERED_UIS[robot_id]
-
-    glob.logger.info(f"Sending '{sevts.r.RobotJoints.__name__}' for robot '{robot_id}' stopped.")
-
-
-async def eef_pose(robot_id: str, eef_id: str) -> sevts.r.RobotEef.Data.EefPose:
-
-    return sevts.r.RobotEef.Data.EefPose(eef_id, (await robot.get_end_effector_pose(robot_id, eef_id)))
-
-
-async def robot_eef_pose_event(robot_id: str) -> None:
-
-    global EEF_POSE_TASKS
-
-    glob.logger.info(f"Sending '{sevts.r.RobotEef.__name__}' for robot '{robot_id}' started.")
-
-    while scene_started() and glob.ROBOT_EEF_REGISTERED_UIS[robot_id]:
-
-        start = time.monotonic()
-
-        evt = sevts.r.RobotEef(sevts.r.RobotEef.Data(robot_id))
-
-        try:
-            evt.data.end_effectors = await asyncio.gather(
-                *[eef_pose(robot_id, eef_id) for eef_id in (await robot.get_end_effectors(robot_id))]
-            )
-        except Arcor2Exception as e:
-            glob.logger.error(f"Failed to get eef pose for {robot_id}. {str(e)}")
-            break
-
-        evt_json = evt.to_json()
-        await asyncio.gather(
-            *[ws_server.send_json_to_client(ui, evt_json) for ui in glob.ROBOT_EEF_REGISTERED_UIS[robot_id]]
-        )
-
-        end = time.monotonic()
-        await asyncio.sleep(EVENT_PERIOD - (end - start))
-
-    del EEF_POSE_TASKS[robot_id]
-
-    # TODO notify UIs that registration was cancelled
-    del glob.ROBOT_EEF_REGISTERED_UIS[robot_id]
-
-    glob.logger.info(f"Sending '{sevts.r.RobotEef.__name__}' for robot '{robot_id}' stopped.")
-
 
+@rpc_resources()
 async def get_robot_meta_cb(req: srpc.r.GetRobotMeta.Request, ui: WsClient) -> srpc.r.GetRobotMeta.Response:
 
     return srpc.r.GetRobotMeta.Response(
@@ -114,13 +33,15 @@ async def get_robot_meta_cb(req: srpc.r.GetRobotMeta.Request, ui: WsClient) -> s
     )
 
 
+@rpc_resources()
 @scene_needed
 async def get_robot_joints_cb(req: srpc.r.GetRobotJoints.Request, ui: WsClient) -> srpc.r.GetRobotJoints.Response:
 
     ensure_scene_started()
-    return srpc.r.GetRobotJoints.Response(data=await robot.get_robot_joints(req.args.robot_id))
+    return srpc.r.GetRobotJoints.Response(data=await telemetry.get_robot_joints(req.args.robot_id))
 
 
+@rpc_resources()
 @scene_needed
 async def get_end_effector_pose_cb(
     req: srpc.r.GetEndEffectorPose.Request, ui: WsClient
@@ -128,10 +49,11 @@ async def get_end_effector_pose_cb(
 
     ensure_scene_started()
     return srpc.r.GetEndEffectorPose.Response(
-        data=await robot.get_end_effector_pose(req.args.robot_id, req.args.end_effector_id)
+        data=await telemetry.get_end_effector_pose(req.args.robot_id, req.args.end_effector_id)
     )
 
 
+@rpc_resources()
 @scene_needed
 async def get_end_effectors_cb(req: srpc.r.GetEndEffectors.Request, ui: WsClient) -> srpc.r.GetEndEffectors.Response:
 
@@ -139,6 +61,7 @@ async def get_end_effectors_cb(req: srpc.r.GetEndEffectors.Request, ui: WsClient
     return srpc.r.GetEndEffectors.Response(data=await robot.get_end_effectors(req.args.robot_id))
 
 
+@rpc_resources()
 @scene_needed
 async def get_grippers_cb(req: srpc.r.GetGrippers.Request, ui: WsClient) -> srpc.r.GetGrippers.Response:
 
@@ -146,6 +69,7 @@ async def get_grippers_cb(req: srpc.r.GetGrippers.Request, ui: WsClient) -> srpc
     return srpc.r.GetGrippers.Response(data=await robot.get_grippers(req.args.robot_id))
 
 
+@rpc_resources()
 @scene_needed
 async def get_suctions_cb(req: srpc.r.GetSuctions.Request, ui: WsClient) -> srpc.r.GetSuctions.Response:
 
@@ -153,38 +77,7 @@ async def get_suctions_cb(req: srpc.r.GetSuctions.Request, ui: WsClient) -> srpc
     return srpc.r.GetSuctions.Response(data=await robot.get_suctions(req.args.robot_id))
 
 
-async def register(
-    req: srpc.r.RegisterForRobotEvent.Request,
-    ui: WsClient,
-    tasks: TaskDict,
-    reg_uis: glob.RegisteredUiDict,
-    coro: Callable[[str], Awaitable[None]],
-) -> None:
-
-    if req.args.send:
-
-        reg_uis[req.args.robot_id].add(ui)
-
-        if req.args.robot_id not in tasks:
-            # start task
-            tasks[req.args.robot_id] = asyncio.create_task(coro(req.args.robot_id))
-
-    else:
-        try:
-            reg_uis[req.args.robot_id].remove(ui)
-        except KeyError as e:
-            raise Arcor2Exception("Failed to unregister.") from e
-
-        # cancel task if not needed anymore
-        if not reg_uis[req.args.robot_id]:
-            task = tasks[req.args.robot_id]
-
-            if not task.cancelled():
-                task.cancel()
-
-            del tasks[req.args.robot_id]
-
-
+@rpc_resources()
 @scene_needed
 async def register_for_robot_event_cb(req: srpc.r.RegisterForRobotEvent.Request, ui: WsClient) -> None:
 
@@ -194,16 +87,21 @@ async def register_for_robot_event_cb(req: srpc.r.RegisterForRobotEvent.Request,
     await osa.get_robot_instance(req.args.robot_id)
 
     if req.args.what == req.args.RegisterEnum.JOINTS:
-        await register(req, ui, ROBOT_JOINTS_TASKS, glob.ROBOT_JOINTS_REGISTERED_UIS, robot_joints_event)
+        end_effectors = False
     elif req.args.what == req.args.RegisterEnum.EEF_POSE:
 
-        if not (await robot.get_end_effectors(req.args.robot_id)):
+        if req.args.send and not (await robot.get_end_effectors(req.args.robot_id)):
             raise Arcor2Exception("Robot does not have any end effector.")
 
-        await register(req, ui, EEF_POSE_TASKS, glob.ROBOT_EEF_REGISTERED_UIS, robot_eef_pose_event)
+        end_effectors = True
     else:
         raise Arcor2Exception(f"Option '{req.args.what.value}' not implemented.")
 
+    if req.args.send:
+        telemetry.subscribe(req.args.robot_id, ui, end_effectors, req.args.rate, req.args.delta)
+    else:
+        telemetry.unsubscribe(req.args.robot_id, ui, end_effectors)
+
     return None
 
 
@@ -218,6 +116,7 @@ async def check_feature(robot_id: str, feature_name: str) -> None:
         raise Arcor2Exception(f"Robot does not support '{feature_name}' feature.")
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def move_to_pose_cb(req: srpc.r.MoveToPose.Request, ui: WsClient) -> None:
 
@@ -245,6 +144,7 @@ async def move_to_pose_cb(req: srpc.r.MoveToPose.Request, ui: WsClient) -> None:
     )
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def move_to_joints_cb(req: srpc.r.MoveToJoints.Request, ui: WsClient) -> None:
 
@@ -254,6 +154,7 @@ async def move_to_joints_cb(req: srpc.r.MoveToJoints.Request, ui: WsClient) -> N
     asyncio.ensure_future(robot.move_to_joints(req.args.robot_id, req.args.joints, req.args.speed, req.args.safe))
 
 
+@rpc_resources()
 @scene_needed
 async def stop_robot_cb(req: srpc.r.StopRobot.Request, ui: WsClient) -> None:
 
@@ -262,6 +163,7 @@ async def stop_robot_cb(req: srpc.r.StopRobot.Request, ui: WsClient) -> None:
     await robot.stop(req.args.robot_id)
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 @project_needed
 async def move_to_action_point_cb(req: srpc.r.MoveToActionPoint.Request, ui: WsClient) -> None:
@@ -308,20 +210,37 @@ async def move_to_action_point_cb(req: srpc.r.MoveToActionPoint.Request, ui: WsC
         )
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def ik_cb(req: srpc.r.InverseKinematics.Request, ui: WsClient) -> srpc.r.InverseKinematics.Response:
 
     ensure_scene_started()
     await check_feature(req.args.robot_id, Robot.inverse_kinematics.__name__)
 
+    start_joints = req.args.start_joints
+
+    if req.args.avoid_collisions:
+
+        # the robot would start from its current joints, the cached result is valid only for the same ones
+        if start_joints is None:
+            start_joints = await robot.get_robot_joints(req.args.robot_id)
+
+        cached = reachability.cached_ik(req.args.robot_id, req.args.end_effector_id, req.args.pose, start_joints)
+
+        if cached is not None:
+            if cached.joints is None:
+                raise Arcor2Exception(cached.error or "Failed to compute IK.")
+            return srpc.r.InverseKinematics.Response(data=cached.joints)
+
     joints = await robot.ik(
-        req.args.robot_id, req.args.end_effector_id, req.args.pose, req.args.start_joints, req.args.avoid_collisions
+        req.args.robot_id, req.args.end_effector_id, req.args.pose, start_joints, req.args.avoid_collisions
     )
     resp = srpc.r.InverseKinematics.Response()
     resp.data = joints
     return resp
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def fk_cb(req: srpc.r.ForwardKinematics.Request, ui: WsClient) -> srpc.r.ForwardKinematics.Response:
 
@@ -334,6 +253,53 @@ async def fk_cb(req: srpc.r.ForwardKinematics.Request, ui: WsClient) -> srpc.r.F
     return resp
 
 
+@rpc_resources(robot_resource)
+@scene_needed
+async def ik_batch_cb(
+    req: srpc.r.InverseKinematicsBatch.Request, ui: WsClient
+) -> srpc.r.InverseKinematicsBatch.Response:
+
+    ensure_scene_started()
+    await check_feature(req.args.robot_id, Robot.inverse_kinematics.__name__)
+
+    return srpc.r.InverseKinematicsBatch.Response(
+        data=await robot.ik_batch(
+            req.args.robot_id,
+            req.args.end_effector_id,
+            req.args.poses,
+            req.args.start_joints,
+            req.args.avoid_collisions,
+        )
+    )
+
+
+@rpc_resources(robot_resource)
+@scene_needed
+async def fk_batch_cb(
+    req: srpc.r.ForwardKinematicsBatch.Request, ui: WsClient
+) -> srpc.r.ForwardKinematicsBatch.Response:
+
+    ensure_scene_started()
+    await check_feature(req.args.robot_id, Robot.forward_kinematics.__name__)
+
+    return srpc.r.ForwardKinematicsBatch.Response(
+        data=await robot.fk_batch(req.args.robot_id, req.args.end_effector_id, req.args.joints)
+    )
+
+
+@rpc_resources()
+@scene_needed
+@project_needed
+async def get_reachability_cb(req: srpc.r.GetReachability.Request, ui: WsClient) -> srpc.r.GetReachability.Response:
+
+    ensure_scene_started()
+    await osa.get_robot_instance(req.args.robot_id, req.args.end_effector_id)
+
+    return srpc.r.GetReachability.Response(
+        data=reachability.reachability_map().query(req.args.robot_id, req.args.end_effector_id)
+    )
+
+
 async def calibrate_robot(robot_inst: Robot, camera_inst: Camera, move_to_calibration_pose: bool) -> None:
 
     assert glob.SCENE
@@ -371,6 +337,7 @@ async def calibrate_robot(robot_inst: Robot, camera_inst: Camera, move_to_calibr
     await notif.broadcast_event(ProcessState(ProcessState.Data(RBT_CALIB, ProcessState.Data.StateEnum.Finished)))
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def calibrate_robot_cb(req: srpc.r.CalibrateRobot.Request, ui: WsClient) -> None:
 
@@ -399,6 +366,7 @@ async def calibrate_robot_cb(req: srpc.r.CalibrateRobot.Request, ui: WsClient) -
     return None
 
 
+@rpc_resources(robot_resource)
 @scene_needed
 async def hand_teaching_mode_cb(req: srpc.r.HandTeachingMode.Request, ui: WsClient) -> None:
 
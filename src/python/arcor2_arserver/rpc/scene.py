@@ -15,6 +15,7 @@ from arcor2.data import common, object_type
 from arcor2.data.events import Event, PackageState
 from arcor2.exceptions import Arcor2Exception
 from arcor2.image import image_from_str
+from arcor2.ws_server import rpc_resources
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
 from arcor2_arserver.clients import persistent_storage as storage
@@ -64,12 +65,13 @@ async def managed_scene(scene_id: str, make_copy: bool = False) -> AsyncGenerato
 
     if make_copy:
         scene.id = common.uid()
+        scene.modified = None  # it is a new scene, which has to be saved as a whole
 
     try:
         yield scene
     finally:
         if save_back:
-            asyncio.ensure_future(storage.update_scene(scene.scene))
+            asyncio.ensure_future(storage.save_scene(scene))
 
 
 @no_scene
@@ -130,7 +132,7 @@ async def close_scene_cb(req: srpc.s.CloseScene.Request, ui: WsClient) -> None:
 async def save_scene_cb(req: srpc.s.SaveScene.Request, ui: WsClient) -> None:
 
     assert glob.SCENE
-    glob.SCENE.modified = await storage.update_scene(glob.SCENE.scene)
+    await storage.save_scene(glob.SCENE)
     asyncio.ensure_future(notif.broadcast_event(sevts.s.SceneSaved()))
     for obj_id in glob.OBJECTS_WITH_UPDATED_POSE:
         asyncio.ensure_future(invalidate_joints_using_object_as_parent(glob.SCENE.object(obj_id)))
@@ -152,6 +154,7 @@ async def open_scene_cb(req: srpc.s.OpenScene.Request, ui: WsClient) -> None:
     return None
 
 
+@rpc_resources()
 async def list_scenes_cb(req: srpc.s.ListScenes.Request, ui: WsClient) -> srpc.s.ListScenes.Response:
 
     resp = srpc.s.ListScenes.Response()
@@ -178,7 +181,7 @@ async def add_object_to_scene_cb(req: srpc.s.AddObjectToScene.Request, ui: WsCli
     if req.dry_run:
         return None
 
-    glob.SCENE.update_modified()
+    glob.SCENE.update_object_modified(obj.id)
 
     evt = sevts.s.SceneObjectChanged(obj)
     evt.change_type = Event.Type.ADD
@@ -207,7 +210,7 @@ async def update_object_parameters_cb(req: srpc.s.UpdateObjectParameters.Request
         return None
 
     obj.parameters = req.args.parameters
-    glob.SCENE.update_modified()
+    glob.SCENE.update_object_modified(obj.id)
 
     evt = sevts.s.SceneObjectChanged(obj)
     evt.change_type = Event.Type.UPDATE
@@ -424,7 +427,7 @@ async def rename_object_cb(req: srpc.s.RenameObject.Request, ui: WsClient) -> No
 
     target_obj.name = req.args.new_name
 
-    glob.SCENE.update_modified()
+    glob.SCENE.update_object_modified(target_obj.id)
 
     evt = sevts.s.SceneObjectChanged(target_obj)
     evt.change_type = Event.Type.UPDATE
@@ -441,6 +444,7 @@ async def rename_scene_cb(req: srpc.s.RenameScene.Request, ui: WsClient) -> None
 
     async with managed_scene(req.args.id) as scene:
         scene.name = req.args.new_name
+        scene.update_attributes_modified()
 
         evt = sevts.s.SceneChanged(scene.bare)
         evt.change_type = Event.Type.UPDATE_BASE
@@ -483,7 +487,7 @@ async def update_scene_description_cb(req: srpc.s.UpdateSceneDescription.Request
 
     async with managed_scene(req.args.scene_id) as scene:
         scene.desc = req.args.new_description
-        scene.update_modified()
+        scene.update_attributes_modified()
 
         evt = sevts.s.SceneChanged(scene.bare)
         evt.change_type = Event.Type.UPDATE_BASE
@@ -12,6 +12,7 @@ from arcor2.object_types.abstract import Generic, GenericWithPose, Robot
 from arcor2.object_types.utils import settings_from_params
 from arcor2_arserver import globals as glob
 from arcor2_arserver import notifications as notif
+from arcor2_arserver import reachability
 from arcor2_arserver.clients import persistent_storage as storage
 from arcor2_arserver.object_types.data import ObjectTypeData
 from arcor2_arserver.objects_actions import get_object_types
@@ -42,7 +43,7 @@ async def update_scene_object_pose(
         # SceneObject pose was already updated
         pose = obj.pose
 
-    glob.SCENE.update_modified()
+    glob.SCENE.update_object_modified(obj.id)
 
     evt = SceneObjectChanged(obj)
     evt.change_type = Event.Type.UPDATE
@@ -62,6 +63,9 @@ async def update_scene_object_pose(
         # Object pose is property that might call scene service - that's why it has to be called using executor.
         await hlp.run_in_executor(setattr, obj_inst, "pose", pose)
 
+        # data computed using the instance (e.g. IK) in the meantime might be outdated
+        glob.SCENE.poses_changed(obj.id)
+
 
 async def set_scene_state(state: SceneState.Data.StateEnum, message: Optional[str] = None) -> None:
 
@@ -94,8 +98,8 @@ def ensure_scene_started() -> None:
 
 async def scenes() -> AsyncIterator[CachedScene]:
 
-    for scene_id in (await storage.get_scenes()).items:
-        yield CachedScene(await storage.get_scene(scene_id.id))
+    for scene in await storage.get_scenes_bulk(scene_meta.id for scene_meta in (await storage.get_scenes()).items):
+        yield CachedScene(scene)
 
 
 async def scene_names() -> Set[str]:
@@ -268,6 +272,7 @@ async def stop_scene(message: Optional[str] = None) -> None:
     glob.logger.info("Stopping the scene.")
 
     await set_scene_state(SceneState.Data.StateEnum.Stopping, message)
+    reachability.stop()
 
     if await scene_srv.started():
         try:
@@ -335,3 +340,5 @@ async def start_scene() -> None:
     await set_scene_state(SceneState.Data.StateEnum.Started)
     assert scene_started()
     assert await scene_srv.started()
+
+    reachability.start()
@@ -5,7 +5,6 @@ import argparse
 import asyncio
 import functools
 import inspect
-import json
 import os
 import shutil
 import sys
@@ -34,8 +33,9 @@ from arcor2_arserver import models
 from arcor2_arserver import notifications as notif
 from arcor2_arserver import objects_actions as osa
 from arcor2_arserver import rpc as srpc_callbacks
-from arcor2_arserver import settings
+from arcor2_arserver import settings, snapshot, telemetry
 from arcor2_arserver.clients import persistent_storage as storage
+from arcor2_arserver.decorators import DEFAULT_RESOURCES
 from arcor2_arserver_data import events as evts
 from arcor2_arserver_data import rpc as srpc
 from arcor2_arserver_data.rpc import objects as obj_rpc
@@ -56,12 +56,15 @@ async def handle_manager_incoming_messages(manager_client) -> None:
 
         async for message in manager_client:
 
-            msg = json.loads(message)
+            try:
+                msg = ws_server.decode(message)
+            except Arcor2Exception as e:
+                glob.logger.error(str(e))
+                continue
 
             if "event" in msg:
 
-                if glob.INTERFACES:
-                    await asyncio.gather(*[ws_server.send_json_to_client(intf, message) for intf in glob.INTERFACES])
+                await notif.broadcast_message(msg)
 
                 try:
                     evt = event_mapping[msg["event"]].from_dict(msg)
@@ -140,6 +143,7 @@ async def _initialize_server() -> None:
             print(str(e))
             await asyncio.sleep(1)
 
+    asyncio.ensure_future(storage.watch_changes())
     await osa.get_object_types()
 
     bound_handler = functools.partial(
@@ -150,10 +154,13 @@ async def _initialize_server() -> None:
         rpc_dict=RPC_DICT,
         event_dict=EVENT_DICT,
         verbose=glob.VERBOSE,
+        concurrency=glob.RPC_CONCURRENCY,
+        default_resources=DEFAULT_RESOURCES,
+        send=notif.rpc_response,
     )
 
     glob.logger.info("Server initialized.")
-    await asyncio.wait([websockets.serve(bound_handler, "0.0.0.0", glob.PORT)])
+    await asyncio.wait([ws_server.serve(bound_handler, "0.0.0.0", glob.PORT)])
 
 
 async def list_meshes_cb(req: obj_rpc.ListMeshes.Request, ui: WsClient) -> obj_rpc.ListMeshes.Response:
@@ -164,39 +171,17 @@ async def register(websocket: WsClient) -> None:
 
     glob.logger.info("Registering new ui")
     glob.INTERFACES.add(websocket)
-
-    if glob.PROJECT:
-        assert glob.SCENE
-        await notif.event(
-            websocket, evts.p.OpenProject(evts.p.OpenProject.Data(glob.SCENE.scene, glob.PROJECT.project))
-        )
-    elif glob.SCENE:
-        await notif.event(websocket, evts.s.OpenScene(evts.s.OpenScene.Data(glob.SCENE.scene)))
-    elif glob.PACKAGE_INFO:
-
-        # this can't be done in parallel - ui expects this order of events
-        await websocket.send(events.PackageState(glob.PACKAGE_STATE).to_json())
-        await websocket.send(events.PackageInfo(glob.PACKAGE_INFO).to_json())
-
-        if glob.ACTION_STATE_BEFORE:
-            await websocket.send(events.ActionStateBefore(glob.ACTION_STATE_BEFORE).to_json())
-    else:
-        assert glob.MAIN_SCREEN
-        await notif.event(websocket, evts.c.ShowMainScreen(glob.MAIN_SCREEN))
+    await notif.messages(websocket, snapshot.messages())
 
 
 async def unregister(websocket: WsClient) -> None:
     glob.logger.info("Unregistering ui")  # TODO print out some identifier
     glob.INTERFACES.remove(websocket)
-
-    for registered_uis in glob.ROBOT_JOINTS_REGISTERED_UIS.values():
-        if websocket in registered_uis:
-            registered_uis.remove(websocket)
-    for registered_uis in glob.ROBOT_EEF_REGISTERED_UIS.values():
-        if websocket in registered_uis:
-            registered_uis.remove(websocket)
+    notif.remove_client(websocket)
+    telemetry.remove_client(websocket)
 
 
+@ws_server.rpc_resources()
 async def system_info_cb(req: srpc.c.SystemInfo.Request, ui: WsClient) -> srpc.c.SystemInfo.Response:
 
     resp = srpc.c.SystemInfo.Response()
@@ -307,7 +292,8 @@ def main() -> None:
 
     run(aio_main(), loop=loop, stop_on_unhandled_errors=True)
 
-    shutil.rmtree(settings.OBJECT_TYPE_PATH)
+    if not settings.PERSISTENT_OBJECT_TYPE_PATH:
+        shutil.rmtree(settings.OBJECT_TYPE_PATH)
 
 
 if __name__ == "__main__":
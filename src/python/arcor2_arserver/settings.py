@@ -9,5 +9,7 @@ except KeyError:
 
 URDF_PATH = os.path.join(DATA_PATH, "urdf")
 
-OBJECT_TYPE_PATH = tempfile.mkdtemp()
+# when set, object types (and their manifest) are kept between restarts
+PERSISTENT_OBJECT_TYPE_PATH = "ARCOR2_OBJECT_TYPE_PATH" in os.environ
+OBJECT_TYPE_PATH = os.environ.get("ARCOR2_OBJECT_TYPE_PATH") or tempfile.mkdtemp()
 OBJECT_TYPE_MODULE = "arcor2_object_types"
@@ -0,0 +1,103 @@
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from arcor2 import metrics, ws_server
+from arcor2.data import events
+from arcor2_arserver import globals as glob
+from arcor2_arserver_data import events as evts
+
+"""
+Messages describing the current state (opened scene or project, running package or the main screen), which are
+sent to each newly connected UI.
+
+They are kept as payloads shared by all UIs, so when many of them (re)connect at once, the (possibly large) messages
+are serialized just once for each encoding. The snapshot is rebuilt when the state it was made from changes:
+a different scene/project/package data are set or the cached scene/project gets a new revision. As a safety net for
+in-place modifications not reflected in the revision, it is also dropped whenever a change of an entity is broadcast.
+"""
+
+BUILDS = metrics.Counter("arcor2_arserver_snapshot_builds_total", "Snapshots of the state made for new UIs.")
+HITS = metrics.Counter("arcor2_arserver_snapshot_hits_total", "Snapshots of the state reused for new UIs.")
+
+
+class _Snapshot:
+    def __init__(self, sources: Sequence[Any], revisions: Sequence[Any], payloads: List[ws_server.Payload]) -> None:
+
+        self.sources = sources  # references are kept, so their identity can't be reused
+        self.revisions = revisions
+        self.payloads = payloads
+
+    def valid(self, sources: Sequence[Any], revisions: Sequence[Any]) -> bool:
+
+        return (
+            len(sources) == len(self.sources)
+            and all(new is old for new, old in zip(sources, self.sources))
+            and revisions == self.revisions
+        )
+
+
+_snapshot: Optional[_Snapshot] = None
+
+
+def _state() -> Tuple[Sequence[Any], Sequence[Any], Callable[[], List[events.Event]]]:
+    """Returns objects the state consists of (compared by identity), their
+    revisions and a function making the events."""
+
+    if glob.PROJECT:
+
+        scene, project = glob.SCENE, glob.PROJECT
+        assert scene
+
+        return (
+            ("project", scene, project),
+            (scene.revision, project.revision),
+            lambda: [evts.p.OpenProject(evts.p.OpenProject.Data(scene.scene, project.project))],
+        )
+
+    if glob.SCENE:
+
+        scene = glob.SCENE
+        return ("scene", scene), (scene.revision,), lambda: [evts.s.OpenScene(evts.s.OpenScene.Data(scene.scene))]
+
+    if glob.PACKAGE_INFO:
+
+        package_state, package_info, action_state = glob.PACKAGE_STATE, glob.PACKAGE_INFO, glob.ACTION_STATE_BEFORE
+
+        def package() -> List[events.Event]:
+
+            # ui expects this order of events
+            ret: List[events.Event] = [events.PackageState(package_state), events.PackageInfo(package_info)]
+
+            if action_state:
+                ret.append(events.ActionStateBefore(action_state))
+
+            return ret
+
+        return ("package", package_state, package_info, action_state), (), package
+
+    main_screen = glob.MAIN_SCREEN
+    assert main_screen
+    return ("main screen", main_screen), (), lambda: [evts.c.ShowMainScreen(main_screen)]
+
+
+def invalidate() -> None:
+    """Drops the snapshot, e.g. when an entity was changed without a new
+    revision."""
+
+    global _snapshot
+    _snapshot = None
+
+
+def messages() -> List[ws_server.Payload]:
+    """Messages for a newly connected UI."""
+
+    global _snapshot
+
+    sources, revisions, make_events = _state()
+
+    if _snapshot is not None and _snapshot.valid(sources, revisions):
+        HITS.inc()
+    else:
+        _snapshot = _Snapshot(sources, revisions, [ws_server.Payload(evt) for evt in make_events()])
+        BUILDS.inc()
+
+    return _snapshot.payloads
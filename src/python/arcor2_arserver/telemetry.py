@@ -0,0 +1,332 @@
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from websockets.server import WebSocketServerProtocol as WsClient
+
+from arcor2.data import common
+from arcor2.data.lite import LitePose
+from arcor2.data.robot import RobotState
+from arcor2.exceptions import Arcor2Exception
+from arcor2_arserver import globals as glob
+from arcor2_arserver import notifications as notif
+from arcor2_arserver import robot
+from arcor2_arserver.scene import scene_started
+from arcor2_arserver_data import events as sevts
+
+"""
+Robot telemetry (joints and poses of end effectors) streamed to registered UIs.
+
+There is one hub per robot, sampling the whole state of the robot at once (see Robot.robot_state) with the highest
+rate requested by its clients. Each client gets events with its own rate (samples are decimated). The latest sample
+is also used to answer RPCs asking for the current joints or pose.
+
+Values are sent only when they changed (more than given epsilon) since they were last sent to the client, so idle
+robots don't generate any traffic. In the delta mode, only changed joints/poses are sent (after the first, full event).
+"""
+
+DEFAULT_RATE = 10.0  # Hz
+MAX_RATE = 50.0
+
+JOINTS_EPSILON = float(os.getenv("ARCOR2_TELEMETRY_JOINTS_EPSILON", 0.0005))  # rad (or m for prismatic joints)
+POSITION_EPSILON = float(os.getenv("ARCOR2_TELEMETRY_POSITION_EPSILON", 0.0001))  # m
+ORIENTATION_EPSILON = float(os.getenv("ARCOR2_TELEMETRY_ORIENTATION_EPSILON", 0.001))  # rad
+
+
+@dataclass
+class Sample:
+
+    state: RobotState
+    timestamp: float  # time.monotonic()
+
+
+def pose_changed(old: Optional[LitePose], new: LitePose) -> bool:
+
+    if old is None:
+        return True
+
+    p1, p2 = old.position, new.position
+    if math.dist((p1.x, p1.y, p1.z), (p2.x, p2.y, p2.z)) > POSITION_EPSILON:
+        return True
+
+    o1, o2 = old.orientation, new.orientation
+    dot = abs(o1.x * o2.x + o1.y * o2.y + o1.z * o2.z + o1.w * o2.w)  # q and -q are the same rotation
+    return 2 * math.acos(min(dot, 1.0)) > ORIENTATION_EPSILON
+
+
+class _Subscription:
+    def __init__(self, rate: float, delta: bool = False) -> None:
+
+        self.period = 1.0 / rate
+        self.next_send = 0.0
+        self.delta = delta
+
+        # values known by the client
+        self.joints: Optional[Dict[str, float]] = None
+        self.poses: Optional[Dict[str, LitePose]] = None  # snapshots, samples might be modified later
+
+    def due(self, now: float, tolerance: float) -> bool:
+
+        if now < self.next_send - tolerance:
+            return False
+
+        # keep the rate stable, but don't try to catch up when late
+        self.next_send = max(self.next_send + self.period, now)
+        return True
+
+    def changed_joints(self, joints: List[common.Joint]) -> Tuple[List[common.Joint], bool]:
+        """Returns joints to be sent (empty when nothing changed) and whether
+        it is the full list."""
+
+        if self.joints is not None:
+
+            changed = [
+                joint
+                for joint in joints
+                if joint.name not in self.joints or abs(joint.value - self.joints[joint.name]) > JOINTS_EPSILON
+            ]
+
+            if not changed or self.delta:
+                self.joints.update({joint.name: joint.value for joint in changed})
+                return changed, False
+
+        self.joints = {joint.name: joint.value for joint in joints}
+        return joints, True
+
+    def changed_poses(self, poses: Dict[str, common.Pose]) -> Tuple[Dict[str, common.Pose], bool]:
+        """Returns poses to be sent (empty when nothing changed) and whether
+        they are all of them."""
+
+        if self.poses is not None:
+
+            lite_poses = {eef_id: LitePose.from_pose(pose) for eef_id, pose in poses.items()}
+            changed = [eef_id for eef_id, pose in lite_poses.items() if pose_changed(self.poses.get(eef_id), pose)]
+
+            if not changed or self.delta:
+                self.poses.update((eef_id, lite_poses[eef_id]) for eef_id in changed)
+                return {eef_id: poses[eef_id] for eef_id in changed}, False
+
+        self.poses = {eef_id: LitePose.from_pose(pose) for eef_id, pose in poses.items()}
+        return poses, True
+
+
+def _eef_poses(state: RobotState, eef_ids: Iterable[str]) -> List[sevts.r.RobotEef.Data.EefPose]:
+    return [sevts.r.RobotEef.Data.EefPose(eef_id, state.end_effectors[eef_id]) for eef_id in eef_ids]
+
+
+class RobotTelemetry:
+    def __init__(self, robot_id: str) -> None:
+
+        self.robot_id = robot_id
+        self.joints: Dict[WsClient, _Subscription] = {}
+        self.eef: Dict[WsClient, _Subscription] = {}
+        self.sample: Optional[Sample] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def period(self) -> float:
+        """Sampling period - given by the fastest client."""
+
+        return min(sub.period for subs in (self.joints, self.eef) for sub in subs.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.joints or self.eef)
+
+    def start(self) -> None:
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._sampler())
+
+    def stop(self) -> None:
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def fresh_sample(self, end_effectors: bool = False) -> Optional[RobotState]:
+        """Returns the latest sample, unless the next one is overdue."""
+
+        if (
+            self._task is None
+            or self.sample is None
+            or time.monotonic() - self.sample.timestamp > 2 * self.period
+            or (end_effectors and not self.sample.state.end_effectors)
+        ):
+            return None
+
+        return self.sample.state
+
+    async def _send_joints(self, state: RobotState, now: float, tolerance: float) -> None:
+
+        # clients getting the same joints get the same (once serialized) event
+        full: List[WsClient] = []
+        deltas: Dict[Tuple[str, ...], List[WsClient]] = {}
+
+        for ui, sub in self.joints.items():
+
+            if not sub.due(now, tolerance):
+                continue
+
+            joints, is_full = sub.changed_joints(state.joints)
+
+            if not joints:
+                continue
+
+            if is_full:
+                full.append(ui)
+            else:
+                deltas.setdefault(tuple(joint.name for joint in joints), []).append(ui)
+
+        if full:
+            await notif.multicast_event(
+                full, sevts.r.RobotJoints(sevts.r.RobotJoints.Data(self.robot_id, state.joints))
+            )
+
+        if deltas:
+            values = {joint.name: joint for joint in state.joints}
+            for names, uis in deltas.items():
+                await notif.multicast_event(
+                    uis,
+                    sevts.r.RobotJointsDelta(sevts.r.RobotJoints.Data(self.robot_id, [values[name] for name in names])),
+                )
+
+    async def _send_poses(self, state: RobotState, now: float, tolerance: float) -> None:
+
+        full: List[WsClient] = []
+        deltas: Dict[Tuple[str, ...], List[WsClient]] = {}
+
+        for ui, sub in self.eef.items():
+
+            if not sub.due(now, tolerance):
+                continue
+
+            poses, is_full = sub.changed_poses(state.end_effectors)
+
+            if not poses:
+                continue
+
+            if is_full:
+                full.append(ui)
+            else:
+                deltas.setdefault(tuple(poses), []).append(ui)
+
+        if full:
+            await notif.multicast_event(
+                full, sevts.r.RobotEef(sevts.r.RobotEef.Data(self.robot_id, _eef_poses(state, state.end_effectors)))
+            )
+
+        for eef_ids, uis in deltas.items():
+            await notif.multicast_event(
+                uis, sevts.r.RobotEefDelta(sevts.r.RobotEef.Data(self.robot_id, _eef_poses(state, eef_ids)))
+            )
+
+    async def _sampler(self) -> None:
+
+        glob.logger.info(f"Telemetry for robot '{self.robot_id}' started.")
+
+        try:
+            while scene_started() and self:
+
+                start = time.monotonic()
+                tolerance = self.period / 2
+
+                try:
+                    state = await robot.get_robot_state(self.robot_id, bool(self.eef))
+                except Arcor2Exception as e:
+                    glob.logger.error(f"Failed to get state of {self.robot_id}. {str(e)}")
+                    break
+
+                self.sample = Sample(state, start)
+
+                await self._send_joints(state, start, tolerance)
+                await self._send_poses(state, start, tolerance)
+
+                await asyncio.sleep(self.period - (time.monotonic() - start))
+
+        finally:
+
+            # TODO notify UIs that registration was cancelled
+            if HUBS.get(self.robot_id) is self:
+                del HUBS[self.robot_id]
+
+            glob.logger.info(f"Telemetry for robot '{self.robot_id}' stopped.")
+
+
+HUBS: Dict[str, RobotTelemetry] = {}
+
+
+def _subscriptions(hub: RobotTelemetry, end_effectors: bool) -> Dict[WsClient, _Subscription]:
+    return hub.eef if end_effectors else hub.joints
+
+
+def subscribe(
+    robot_id: str, ui: WsClient, end_effectors: bool, rate: Optional[float] = None, delta: bool = False
+) -> None:
+
+    if rate is None:
+        rate = DEFAULT_RATE
+
+    if not 0 < rate <= MAX_RATE:
+        raise Arcor2Exception(f"Rate has to be in (0, {MAX_RATE}] Hz.")
+
+    try:
+        hub = HUBS[robot_id]
+    except KeyError:
+        hub = HUBS[robot_id] = RobotTelemetry(robot_id)
+
+    _subscriptions(hub, end_effectors)[ui] = _Subscription(rate, delta)
+    hub.start()
+
+
+def unsubscribe(robot_id: str, ui: WsClient, end_effectors: bool) -> None:
+
+    try:
+        del _subscriptions(HUBS[robot_id], end_effectors)[ui]
+    except KeyError as e:
+        raise Arcor2Exception("Failed to unregister.") from e
+
+    hub = HUBS[robot_id]
+
+    if not hub:
+        hub.stop()
+        del HUBS[robot_id]
+
+
+def remove_client(ui: WsClient) -> None:
+    """To be called when the client disconnects."""
+
+    for robot_id, hub in list(HUBS.items()):
+
+        hub.joints.pop(ui, None)
+        hub.eef.pop(ui, None)
+
+        if not hub:
+            hub.stop()
+            del HUBS[robot_id]
+
+
+async def get_robot_joints(robot_id: str) -> List[common.Joint]:
+    """Joints of the robot, from the latest sample when available."""
+
+    hub = HUBS.get(robot_id)
+    state = hub.fresh_sample() if hub else None
+
+    if state is None:
+        return await robot.get_robot_joints(robot_id)
+
+    return state.joints
+
+
+async def get_end_effector_pose(robot_id: str, end_effector: str) -> common.Pose:
+    """Pose of the end effector, from the latest sample when available."""
+
+    hub = HUBS.get(robot_id)
+    state = hub.fresh_sample(end_effectors=True) if hub else None
+
+    if state is None or end_effector not in state.end_effectors:
+        return await robot.get_end_effector_pose(robot_id, end_effector)
+
+    return state.end_effectors[end_effector]
@@ -21,6 +21,8 @@ from arcor2_execution_data import EVENTS as EXE_EVENTS
 
 LOGGER = logging.getLogger(__name__)
 
+os.environ.setdefault("ARCOR2_DATA_PATH", tempfile.mkdtemp())  # for unit tests importing ARServer's modules
+
 
 _arserver_port: int = 0
 
@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, Dict, List, Set, Type
+
+import pytest
+
+from arcor2 import rest
+from arcor2.clients.persistent_storage import ProjectServiceException
+from arcor2.data.common import IdDesc, IdDescList
+from arcor2.data.object_type import ObjectType
+from arcor2.exceptions import Arcor2Exception
+from arcor2.object_types.abstract import Generic
+from arcor2_arserver import globals as glob
+from arcor2_arserver import objects_actions
+from arcor2_arserver.clients import persistent_storage as storage
+from arcor2_arserver.object_types.utils import ObjectTypeDict, built_in_types_data
+
+
+def _obj(obj_id: str, base: str) -> ObjectType:
+    return ObjectType(
+        obj_id, f"from arcor2.object_types.abstract import Generic\n\n\nclass {obj_id}({base}):\n    pass\n"
+    )
+
+
+def test_import_scheduler(monkeypatch) -> None:
+
+    stored: Dict[str, ObjectType] = {
+        "A": _obj("A", "B"),  # B is not prefetched and its base is A
+        "B": _obj("B", "A"),
+        "D": _obj("D", "C"),  # C does not exist
+        "E": _obj("E", "Generic"),
+        "F": _obj("F", "E"),
+        "G": _obj("G", "E"),
+    }
+
+    async def fetch_object_type(obj_id: str) -> objects_actions.FetchedObjectType:
+
+        try:
+            return stored[obj_id], rest.Validators()
+        except KeyError:
+            raise Arcor2Exception("Not found.")
+
+    importing: Set[str] = set()
+    concurrent: List[Set[str]] = []
+    classes: Dict[str, Type[Generic]] = {"Generic": Generic}
+
+    async def save_and_import_type_def(obj: ObjectType) -> Type[Generic]:
+
+        assert obj.id not in classes
+        importing.add(obj.id)
+        concurrent.append(set(importing))
+        await asyncio.sleep(0.01)
+        importing.discard(obj.id)
+
+        namespace = dict(classes)
+        exec(obj.source, namespace)
+        classes[obj.id] = namespace[obj.id]
+        return classes[obj.id]
+
+    monkeypatch.setattr(objects_actions, "_fetch_object_type", fetch_object_type)
+    monkeypatch.setattr(objects_actions, "_save_and_import_type_def", save_and_import_type_def)
+    monkeypatch.setattr(objects_actions, "add_to_manifest", lambda *args: None)
+
+    object_types: ObjectTypeDict = {}
+    prefetched = {obj_id: (stored[obj_id], rest.Validators()) for obj_id in ("A", "D", "E", "F", "G")}
+
+    async def run() -> None:
+        await asyncio.wait_for(objects_actions.ImportScheduler(object_types, prefetched).run(), 5)
+
+    asyncio.run(run())
+
+    for obj_id in ("A", "B"):
+        assert object_types[obj_id].meta.problem == "Cyclic inheritance."
+
+    assert object_types["D"].meta.problem == "Can't get base."
+
+    for obj_id in ("E", "F", "G"):
+        assert not object_types[obj_id].meta.disabled
+
+    # independent branches are imported concurrently, a type only after its base
+    assert {"F", "G"} in concurrent
+    assert all(not ({"E", "F"} <= imp or {"E", "G"} <= imp) for imp in concurrent)
+
+
+def test_changed_object_types_kept_when_fetch_fails(monkeypatch) -> None:
+
+    stored = _obj("E", "Generic")
+    fail = True
+
+    async def get_object_type_ids() -> IdDescList:
+        return IdDescList([IdDesc("E", "E", None)])
+
+    async def fetch_object_type(obj_id: str) -> objects_actions.FetchedObjectType:
+
+        if fail:
+            raise ProjectServiceException("Failed to get the object type.")
+        return stored, rest.Validators()
+
+    async def save_and_import_type_def(obj: ObjectType) -> Type[Generic]:
+
+        namespace: Dict[str, Any] = {}
+        exec(obj.source, namespace)
+        return namespace[obj.id]
+
+    monkeypatch.setattr(glob, "OBJECT_TYPES", built_in_types_data())
+    monkeypatch.setattr(storage, "_revision", 0)
+    monkeypatch.setattr(storage, "_changed_object_types", {"E"})
+    monkeypatch.setattr(storage, "get_object_type_ids", get_object_type_ids)
+    monkeypatch.setattr(objects_actions, "_fetch_object_type", fetch_object_type)
+    monkeypatch.setattr(objects_actions, "_save_and_import_type_def", save_and_import_type_def)
+    monkeypatch.setattr(objects_actions, "add_to_manifest", lambda *args: None)
+
+    with pytest.raises(ProjectServiceException):
+        asyncio.run(objects_actions.get_object_types())
+
+    assert storage._changed_object_types == {"E"}
+    assert "E" not in glob.OBJECT_TYPES
+
+    fail = False
+    asyncio.run(objects_actions.get_object_types())
+
+    assert not glob.OBJECT_TYPES["E"].meta.disabled
+    assert storage._changed_object_types == set()
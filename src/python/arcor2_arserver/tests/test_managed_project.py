@@ -0,0 +1,40 @@
+import asyncio
+from typing import List
+
+from arcor2.cached import UpdateableCachedProject
+from arcor2.data.common import Position, Project
+from arcor2_arserver import globals as glob
+from arcor2_arserver.rpc import project as rpc_project
+
+
+def test_copy_of_opened_project(monkeypatch) -> None:
+
+    opened = UpdateableCachedProject(Project("p1", "opened", "scene"))
+    opened.upsert_action_point("ap1", "ap1", Position(1))
+
+    saved: List[Project] = []
+
+    async def save_project(project: UpdateableCachedProject) -> None:
+        saved.append(project.project)
+
+    monkeypatch.setattr(glob, "PROJECT", opened)
+    monkeypatch.setattr(rpc_project.storage, "save_project", save_project)
+
+    async def run() -> None:
+
+        async with rpc_project.managed_project("p1", make_copy=True) as copy:
+            copy.name = "copy"
+
+        # the opened project is changed before the copy is saved
+        opened.update_ap_position("ap1", Position(2))
+        opened.upsert_action_point("ap2", "ap2", Position())
+
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert len(saved) == 1
+    assert saved[0].id != "p1"
+    assert saved[0].name == "copy"
+    assert [(ap.id, ap.position) for ap in saved[0].action_points] == [("ap1", Position(1))]
+    assert opened.name == "opened"
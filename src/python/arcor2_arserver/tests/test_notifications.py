@@ -0,0 +1,92 @@
+import asyncio
+import json
+from typing import List
+
+from arcor2 import ws_server
+from arcor2.data import common
+from arcor2.data.events import Event
+from arcor2_arserver import globals as glob
+from arcor2_arserver import notifications as notif
+from arcor2_arserver_data import events as evts
+from arcor2_arserver_data.rpc.common import SystemInfo
+
+
+class Client:
+    def __init__(self, block: bool = False) -> None:
+        self.messages: List[str] = []
+        self.closed = False
+        self.remote_address = ("127.0.0.1", 1234)
+        self.subprotocol = None
+        self._block = block
+
+    async def send(self, message: str) -> None:
+        if self._block:
+            await asyncio.sleep(1)
+        self.messages.append(message)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.closed = True
+
+
+def obj_changed(obj_id: str, name: str) -> evts.s.SceneObjectChanged:
+
+    evt = evts.s.SceneObjectChanged(common.SceneObject(obj_id, name, "Type"))
+    evt.change_type = Event.Type.UPDATE
+    return evt
+
+
+def test_coalescing(monkeypatch) -> None:
+
+    fast = Client()
+    slow = Client(block=True)
+    monkeypatch.setattr(glob, "INTERFACES", {fast, slow})
+    monkeypatch.setattr(notif, "METRICS", notif.Metrics())
+    monkeypatch.setattr(notif, "QUEUE_SIZE", 3)
+
+    async def run() -> None:
+
+        for idx in range(3):
+            await notif.broadcast_event(obj_changed("obj1", f"name{idx}"))
+        await notif.broadcast_event(obj_changed("obj2", "name"))
+        await notif.broadcast_event(evts.c.ShowMainScreen(glob.MAIN_SCREEN))  # flushes pending updates
+        await asyncio.sleep(0)  # the first message is being sent to the slow client, two are queued
+
+        await notif.broadcast_event(obj_changed("obj1", "last"))
+        await notif.broadcast_event(evts.c.ShowMainScreen(glob.MAIN_SCREEN))  # overflows the slow client's queue
+
+        await asyncio.sleep(0.1)
+
+        for client in (fast, slow):
+            notif.remove_client(client)
+
+    asyncio.run(run())
+
+    assert [json.loads(msg)["data"].get("name") for msg in fast.messages] == ["name2", "name", None, "last", None]
+    assert not fast.closed
+
+    assert slow.closed
+    assert not slow.messages
+    assert notif.METRICS.slow_clients == 1
+    assert notif.METRICS.merged == 2
+    assert notif.METRICS.dropped == 4
+
+
+def test_rpc_response_after_events(monkeypatch) -> None:
+
+    client = Client(block=True)
+    gone = Client()
+    monkeypatch.setattr(glob, "INTERFACES", {client})
+
+    async def run() -> None:
+
+        await notif.broadcast_event(evts.c.ShowMainScreen(glob.MAIN_SCREEN))
+        await notif.rpc_response(client, ws_server.Payload(SystemInfo.Response(1, True)))
+        await notif.rpc_response(gone, ws_server.Payload(SystemInfo.Response(2, True)))  # already disconnected
+
+        await asyncio.sleep(2.5)
+        notif.remove_client(client)
+
+    asyncio.run(run())
+
+    assert [json.loads(msg).get("event", "response") for msg in client.messages] == ["ShowMainScreen", "response"]
+    assert not gone.messages
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from arcor2 import rest
+from arcor2.data.common import Project
+from arcor2_arserver.clients import persistent_storage as storage
+
+ETAG = '"v1"'
+
+
+def test_get_projects_bulk_larger_than_cache(monkeypatch) -> None:
+
+    fetched: List[str] = []
+
+    async def get_projects_bulk(project_ids: Iterable[str]) -> List[Project]:
+        ids = list(project_ids)
+        fetched.extend(ids)
+        return [Project(pid, pid, "scene") for pid in ids]
+
+    async def get_project_if_modified(
+        project_id: str, validators: Optional[rest.Validators] = None
+    ) -> Tuple[Optional[Project], rest.Validators]:
+        return None, rest.Validators()
+
+    monkeypatch.setattr(storage.ps, "get_projects_bulk", get_projects_bulk)
+    monkeypatch.setattr(storage.ps, "get_project_if_modified", get_project_if_modified)
+    monkeypatch.setattr(storage, "_revision", 0)  # cached items are valid until the change feed says otherwise
+
+    # more projects than the cache can hold - storing fetched ones evicts others
+    ids = [f"project{idx}" for idx in range(3 * storage._projects.get_size())]
+
+    async def run() -> None:
+
+        storage._projects.clear()
+
+        for _ in range(2):
+            assert [project.id for project in await storage.get_projects_bulk(ids)] == ids
+
+        storage._projects.clear()
+
+    asyncio.run(run())
+
+    assert len(fetched) > len(ids)
+
+
+def test_written_project_revalidated_without_last_modified(monkeypatch) -> None:
+
+    sent: List[Optional[rest.Validators]] = []
+    stored = Project("p1", "stored", "scene")
+
+    async def update_project(project: Project) -> datetime:
+        return datetime.now(tz=timezone.utc)
+
+    async def get_project_if_modified(
+        project_id: str, validators: Optional[rest.Validators] = None
+    ) -> Tuple[Optional[Project], rest.Validators]:
+
+        sent.append(validators)
+
+        if validators and validators.etag == ETAG:
+            return None, validators
+        return stored, rest.Validators(ETAG, rest.http_date(datetime.now(tz=timezone.utc)))
+
+    monkeypatch.setattr(storage.ps, "update_project", update_project)
+    monkeypatch.setattr(storage.ps, "get_project_if_modified", get_project_if_modified)
+    monkeypatch.setattr(storage, "_revision", 0)
+    monkeypatch.setattr(storage, "_projects_list", {})
+
+    async def run() -> None:
+
+        storage._projects.clear()
+        await storage.update_project(Project("p1", "written", "scene"))
+
+        # e.g. another client saved the project within the same second
+        storage._invalidate(storage._projects, "p1")
+        assert (await storage.get_project("p1")).name == "stored"
+
+        storage._invalidate(storage._projects, "p1")
+        assert (await storage.get_project("p1")).name == "stored"
+
+        storage._projects.clear()
+
+    asyncio.run(run())
+
+    # the version written by us has no validators, later on, only ETag is used
+    assert sent == [rest.Validators(), rest.Validators(ETAG)]
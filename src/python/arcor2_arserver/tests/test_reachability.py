@@ -0,0 +1,128 @@
+import asyncio
+from typing import List, Optional, Set
+
+from arcor2.cached import UpdateableCachedProject, UpdateableCachedScene
+from arcor2.data.common import Joint, NamedOrientation, Orientation, Pose, Position, Project, Scene, SceneObject
+from arcor2.data.robot import InverseKinematicsResult
+from arcor2.object_types.abstract import Robot
+from arcor2_arserver import globals as glob
+from arcor2_arserver import reachability, robot
+
+
+class MyRobot(Robot):
+    def get_end_effectors_ids(self) -> Set[str]:
+        return {"eef"}
+
+    def get_end_effector_pose(self, end_effector: str) -> Pose:
+        return Pose()
+
+    def robot_joints(self) -> List[Joint]:
+        return [Joint("j1", 1.0)]
+
+    def grippers(self) -> Set[str]:
+        return set()
+
+    def suctions(self) -> Set[str]:
+        return set()
+
+
+def test_reachability(monkeypatch) -> None:
+
+    scene = UpdateableCachedScene(
+        Scene("s", "scene", objects=[SceneObject("robot", "robot", MyRobot.__name__, Pose())])
+    )
+    project = UpdateableCachedProject(Project("p", "project", scene.id))
+
+    project.upsert_action_point("ap1", "ap1", Position(0.1))
+    project.upsert_action_point("ap2", "ap2", Position(0.1), "ap1")  # relative to ap1
+    project.upsert_action_point("ap3", "ap3", Position(0.3))
+
+    for ap_id in ("ap1", "ap2", "ap3"):
+        project.upsert_orientation(ap_id, NamedOrientation(f"{ap_id}_ori", "default", Orientation()))
+
+    monkeypatch.setattr(glob, "SCENE", scene)
+    monkeypatch.setattr(glob, "PROJECT", project)
+    monkeypatch.setattr(glob, "SCENE_OBJECT_INSTANCES", {"robot": MyRobot("robot", "robot", Pose())})
+    monkeypatch.setattr(reachability, "_supports_ik", lambda robot_inst: True)
+    monkeypatch.setattr(reachability, "DELAY", 0.01)
+
+    batches: List[int] = []
+    joints = [Joint("j1", 0.5)]  # current joints of the robot
+
+    async def get_robot_joints(robot_id: str) -> List[Joint]:
+        return list(joints)
+
+    async def get_end_effectors(robot_id: str) -> Set[str]:
+        return {"eef"}
+
+    async def ik_batch(
+        robot_id: str,
+        end_effector_id: str,
+        poses: List[Pose],
+        start_joints: Optional[List[Joint]] = None,
+        avoid_collisions: bool = True,
+    ) -> List[InverseKinematicsResult]:
+
+        assert start_joints == joints
+        batches.append(len(poses))
+        return [
+            InverseKinematicsResult([Joint("j1", pose.position.x)])
+            if pose.position.x < 1
+            else InverseKinematicsResult(error="Out of reach.")
+            for pose in poses
+        ]
+
+    monkeypatch.setattr(robot, "get_robot_joints", get_robot_joints)
+    monkeypatch.setattr(robot, "get_end_effectors", get_end_effectors)
+    monkeypatch.setattr(robot, "ik_batch", ik_batch)
+
+    def reachable() -> List[Optional[bool]]:
+        return [res.reachable for res in reachability.reachability_map().query("robot", "eef")]
+
+    async def run() -> None:
+
+        reachability.start()
+        assert reachable() == [None, None, None]
+
+        await asyncio.sleep(0.1)
+        assert batches == [3]
+        assert reachable() == [True, True, True]
+
+        pose = Pose(Position(0.2), Orientation())
+        res = reachability.cached_ik("robot", "eef", pose, [Joint("j1", 0.5)])
+        assert res and res.joints == [Joint("j1", 0.2)]
+        assert reachability.cached_ik("robot", "eef", pose) is None  # the result depends on the start joints
+        assert reachability.cached_ik("robot", "eef", pose, [Joint("j1", 0)]) is None
+
+        # the AP and its child are invalidated
+        project.update_ap_position("ap1", Position(0.95))
+        assert reachable() == [None, None, True]
+
+        await asyncio.sleep(0.1)
+        assert batches == [3, 2]
+        assert reachable() == [True, False, True]
+        assert reachability.reachability_map().query("robot", "eef")[1].error == "Out of reach."
+
+        project.upsert_orientation("ap3", NamedOrientation("ap3_ori2", "other", Orientation(0, 0, 1, 0)))
+        assert reachable() == [True, False, None, None]
+
+        await asyncio.sleep(0.1)
+        assert batches == [3, 2, 1]  # pose of the first orientation did not change, the cached result is used
+
+        # when the robot moves, the cached results are not used for its new joints
+        joints[0] = Joint("j1", 0.7)
+        assert reachability.cached_ik("robot", "eef", pose, joints) is None
+
+        # e.g. the robot was moved
+        scene.update_object_modified("robot")
+        assert reachable() == [None, None, None, None]
+
+        await asyncio.sleep(0.1)
+        assert batches == [3, 2, 1, 4]
+        assert reachable() == [True, False, True, True]
+        res = reachability.cached_ik("robot", "eef", Pose(Position(0.3), Orientation()), joints)  # ap3
+        assert res and res.joints == [Joint("j1", 0.3)]
+
+        reachability.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timezone
+
+from arcor2.cached import UpdateableCachedProject, UpdateableCachedScene
+from arcor2.data import common, events
+from arcor2_arserver import globals as glob
+from arcor2_arserver import snapshot
+from arcor2_arserver_data import events as evts
+
+
+def event_names(messages) -> list:
+    return [json.loads(msg.json)["event"] for msg in messages]
+
+
+def test_snapshot(monkeypatch) -> None:
+
+    monkeypatch.setattr(snapshot, "_snapshot", None)
+    monkeypatch.setattr(glob, "SCENE", None)
+    monkeypatch.setattr(glob, "PROJECT", None)
+    monkeypatch.setattr(glob, "PACKAGE_INFO", None)
+    monkeypatch.setattr(glob, "MAIN_SCREEN", evts.c.ShowMainScreen.Data(evts.c.ShowMainScreen.Data.WhatEnum.ScenesList))
+
+    main_screen = snapshot.messages()
+    assert event_names(main_screen) == ["ShowMainScreen"]
+    assert snapshot.messages() is main_screen
+
+    # the scene is serialized only once, until it is changed
+    scene = UpdateableCachedScene(common.Scene("s1", "s1", modified=datetime.now(tz=timezone.utc)))
+    monkeypatch.setattr(glob, "SCENE", scene)
+
+    opened = snapshot.messages()
+    assert event_names(opened) == ["OpenScene"]
+    json_msg = opened[0].json
+    assert snapshot.messages()[0].json is json_msg
+
+    scene.upsert_object(common.SceneObject("o1", "o1", "Type"))
+    updated = snapshot.messages()
+    assert updated is not opened
+    assert [obj["id"] for obj in json.loads(updated[0].json)["data"]["scene"]["objects"]] == ["o1"]
+
+    scene.saved(datetime.now(tz=timezone.utc), scene.version)  # new modification time has to be sent
+    assert snapshot.messages() is not updated
+
+    project = UpdateableCachedProject(common.Project("p1", "p1", "s1"))
+    monkeypatch.setattr(glob, "PROJECT", project)
+    assert event_names(snapshot.messages()) == ["OpenProject"]
+
+    project.upsert_action_point("ap1", "ap1", common.Position())
+    ap_added = snapshot.messages()
+    assert json.loads(ap_added[0].json)["data"]["project"]["action_points"][0]["id"] == "ap1"
+    assert snapshot.messages() is ap_added
+
+    scene.name = "renamed"
+    scene.update_attributes_modified()
+    renamed = snapshot.messages()
+    assert json.loads(renamed[0].json)["data"]["scene"]["name"] == "renamed"
+
+    snapshot.invalidate()  # a change was broadcast
+    assert snapshot.messages() is not renamed
+
+    # the package data are replaced by new instances when changed
+    monkeypatch.setattr(glob, "SCENE", None)
+    monkeypatch.setattr(glob, "PROJECT", None)
+    monkeypatch.setattr(glob, "PACKAGE_STATE", events.PackageState.Data(events.PackageState.Data.StateEnum.RUNNING))
+    monkeypatch.setattr(
+        glob, "PACKAGE_INFO", events.PackageInfo.Data("pkg", "pkg", common.Scene("s1", "s1"), project.project)
+    )
+    monkeypatch.setattr(glob, "ACTION_STATE_BEFORE", None)
+
+    package = snapshot.messages()
+    assert event_names(package) == ["PackageState", "PackageInfo"]
+    assert snapshot.messages() is package
+
+    monkeypatch.setattr(glob, "ACTION_STATE_BEFORE", events.ActionStateBefore.Data("ac1", []))
+    assert event_names(snapshot.messages()) == ["PackageState", "PackageInfo", "ActionStateBefore"]
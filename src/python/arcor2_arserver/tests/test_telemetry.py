@@ -0,0 +1,88 @@
+import asyncio
+import json
+from collections import Counter
+
+from arcor2.data.common import Joint, Pose
+from arcor2.data.lite import LiteOrientation, LitePose, LitePosition
+from arcor2.data.robot import RobotState
+from arcor2_arserver import globals as glob
+from arcor2_arserver import notifications as notif
+from arcor2_arserver import robot, telemetry
+from arcor2_arserver.tests.test_notifications import Client
+
+
+def test_telemetry(monkeypatch) -> None:
+
+    fast = Client()
+    delta = Client()
+    slow = Client()
+    monkeypatch.setattr(glob, "INTERFACES", {fast, delta, slow})
+    monkeypatch.setattr(telemetry, "scene_started", lambda: True)
+
+    calls = Counter()
+
+    async def get_robot_state(robot_id: str, end_effectors: bool = True) -> RobotState:
+        calls[end_effectors] += 1
+        # the first joint is moving, the end effector is not
+        return RobotState(
+            [Joint("j1", calls[end_effectors] * 0.01), Joint("j2", 1.0)], {"eef": Pose()} if end_effectors else {}
+        )
+
+    async def get_robot_joints(robot_id: str) -> None:
+        raise AssertionError("Cached joints should be used.")
+
+    monkeypatch.setattr(robot, "get_robot_state", get_robot_state)
+    monkeypatch.setattr(robot, "get_robot_joints", get_robot_joints)
+
+    async def run() -> None:
+
+        telemetry.subscribe("robot", fast, False, 50.0)
+        telemetry.subscribe("robot", delta, False, 50.0, delta=True)
+        telemetry.subscribe("robot", slow, True, 10.0)
+        assert len(telemetry.HUBS) == 1
+
+        await asyncio.sleep(0.5)
+
+        assert len(await telemetry.get_robot_joints("robot")) == 2
+
+        telemetry.unsubscribe("robot", fast, False)
+        telemetry.remove_client(delta)
+        telemetry.remove_client(slow)
+        assert not telemetry.HUBS
+
+        await asyncio.sleep(0.05)
+
+        for client in (fast, delta, slow):
+            notif.remove_client(client)
+
+    asyncio.run(run())
+
+    assert not calls[False]  # poses of end effectors are needed for the slow client
+
+    fast_events = [json.loads(msg) for msg in fast.messages]
+    assert 10 < len(fast_events) <= calls[True]
+    assert {evt["event"] for evt in fast_events} == {"RobotJoints"}
+
+    delta_events = [json.loads(msg) for msg in delta.messages]
+    assert delta_events[0]["event"] == "RobotJoints"
+    assert len(delta_events[0]["data"]["joints"]) == 2
+    assert len(delta_events) > 10
+    for evt in delta_events[1:]:
+        assert evt["event"] == "RobotJointsDelta"
+        assert [joint["name"] for joint in evt["data"]["joints"]] == ["j1"]
+
+    # the end effector does not move
+    assert [json.loads(msg)["event"] for msg in slow.messages] == ["RobotEef"]
+
+
+def test_pose_changed() -> None:
+
+    pose = LitePose()
+    assert telemetry.pose_changed(None, pose)
+    assert not telemetry.pose_changed(pose, LitePose.from_pose(Pose()))
+
+    moved = LitePose(LitePosition(10 * telemetry.POSITION_EPSILON, 0, 0))
+    assert telemetry.pose_changed(pose, moved)
+
+    flipped = LitePose(orientation=LiteOrientation(0, 0, 0, -1))  # the same rotation
+    assert not telemetry.pose_changed(pose, flipped)
@@ -1,12 +1,12 @@
-import json
 import time
 import uuid
 from queue import Empty, Queue
-from typing import Dict, Optional, Type, TypeVar
+from typing import Any, Dict, List, Optional, Type, TypeVar
 
 import websocket
 from dataclasses_jsonschema import ValidationError
 
+from arcor2 import ws_server
 from arcor2.data import events, rpc
 from arcor2.exceptions import Arcor2Exception
 from arcor2.logging import get_logger
@@ -21,7 +21,7 @@ RR = TypeVar("RR", bound=rpc.common.RPC.Response)
 
 
 def uid() -> int:
-    return uuid.uuid4().int
+    return uuid.uuid4().int >> 65  # fits into 64 bits (MessagePack)
 
 
 class ARServer:
@@ -30,6 +30,8 @@ class ARServer:
     Instead of having a separate method for each RPC, it has one method
     (call_rpc) which takes instance of Request and returns instance of
     Response.
+
+    With binary=True, the binary encoding (MessagePack) is requested, if the server does not support it, JSON is used.
     """
 
     def __init__(
@@ -37,8 +39,12 @@ class ARServer:
         ws_connection_str: str = "ws://0.0.0.0:6789",
         timeout: float = 3.0,
         event_mapping: Optional[Dict[str, Type[events.Event]]] = None,
+        binary: bool = False,
     ):
 
+        if binary and not ws_server.HAS_MSGPACK:
+            raise ARServerClientException("Binary encoding requires msgpack.")
+
         self._ws = websocket.WebSocket()
         self._logger = get_logger(__name__)
         self._event_queue: Queue[events.Event] = Queue()
@@ -47,10 +53,12 @@ class ARServer:
 
         self.event_mapping = event_mapping
 
+        subprotocols: Optional[List[str]] = ws_server.SUBPROTOCOLS if binary else None
+
         start_time = time.monotonic()
         while time.monotonic() < start_time + timeout:
             try:
-                self._ws.connect(ws_connection_str)
+                self._ws.connect(ws_connection_str, subprotocols=subprotocols)
                 break
             except ConnectionRefusedError:
                 time.sleep(0.25)
@@ -58,6 +66,8 @@ class ARServer:
         if not self._ws.connected:
             raise ARServerClientException(f"Failed to connect to '{ws_connection_str}'.")
 
+        self.binary = self._ws.getsubprotocol() == ws_server.MSGPACK_SUBPROTOCOL
+
         self._ws.settimeout(timeout)
 
         system_info = self._call_rpc(srpc.c.SystemInfo.Request(uid()), srpc.c.SystemInfo.Response).data
@@ -78,12 +88,17 @@ class ARServer:
 
     def _call_rpc(self, req: rpc.common.RPC.Request, resp_type: Type[RR]) -> RR:
 
-        self._ws.send(req.to_json())
+        msg = ws_server.Payload(req).encode(self.binary)
+
+        if isinstance(msg, bytes):
+            self._ws.send_binary(msg)
+        else:
+            self._ws.send(msg)
 
         # wait for RPC response, put any incoming event into the queue
         while True:
             try:
-                recv_dict = json.loads(self._ws.recv())
+                recv_dict = self._recv()
             except websocket.WebSocketTimeoutException:
                 raise ARServerClientException("RPC timeouted.")
 
@@ -113,7 +128,7 @@ class ARServer:
             evt = self._event_queue.get_nowait()
         except Empty:
             try:
-                recv_dict = json.loads(self._ws.recv())
+                recv_dict = self._recv()
             except websocket.WebSocketTimeoutException:
                 raise ARServerClientException("Timeouted.")
 
@@ -126,6 +141,13 @@ class ARServer:
 
         return evt
 
+    def _recv(self) -> Dict[str, Any]:
+
+        try:
+            return ws_server.decode(self._ws.recv())
+        except ws_server.WsServerException as e:
+            raise ARServerClientException("Invalid message.") from e
+
     def close(self) -> None:
         self._ws.close()
 
@@ -32,6 +32,21 @@ class RobotEef(Event):
     data: Data
 
 
+@dataclass
+class RobotJointsDelta(Event):
+    """Joints that changed since the last event sent to the client."""
+
+    data: RobotJoints.Data
+
+
+@dataclass
+class RobotEefDelta(Event):
+    """Poses of end effectors that changed since the last event sent to the
+    client."""
+
+    data: RobotEef.Data
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -1,8 +1,9 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import List, Optional
 
 from dataclasses_jsonschema import JsonSchemaMixin
 
+from arcor2.data.common import Joint
 from arcor2.data.robot import RobotType
 
 
@@ -26,3 +27,18 @@ class RobotMeta(JsonSchemaMixin):
     robot_type: RobotType
     features: RobotFeatures = field(default_factory=RobotFeatures)
     urdf_package_filename: Optional[str] = None
+
+
+@dataclass
+class OrientationReachability(JsonSchemaMixin):
+    """Whether the AP orientation is reachable by the robot.
+
+    :param reachable: None if not computed yet.
+    :param joints: IK solution.
+    :param error: Why IK failed.
+    """
+
+    orientation_id: str
+    reachable: Optional[bool] = None
+    joints: Optional[List[Joint]] = None
+    error: Optional[str] = None
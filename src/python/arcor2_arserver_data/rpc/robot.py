@@ -4,8 +4,9 @@ from typing import List, Optional, Set
 from dataclasses_jsonschema import JsonSchemaMixin
 
 from arcor2.data.common import Joint, Orientation, Pose, Position, StrEnum
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult
 from arcor2.data.rpc.common import RPC
-from arcor2_arserver_data.robot import RobotMeta
+from arcor2_arserver_data.robot import OrientationReachability, RobotMeta
 
 
 class GetRobotMeta(RPC):
@@ -119,6 +120,8 @@ class RegisterForRobotEvent(RPC):
             robot_id: str
             what: RegisterEnum
             send: bool
+            rate: Optional[float] = None  # Hz, the server's default is used when not set
+            delta: bool = False  # after the first (full) event, only changes are sent (RobotJointsDelta/RobotEefDelta)
 
         args: Args
 
@@ -251,6 +254,64 @@ class ForwardKinematics(RPC):
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+class InverseKinematicsBatch(RPC):
+    @dataclass
+    class Request(RPC.Request):
+        @dataclass
+        class Args(JsonSchemaMixin):
+            robot_id: str
+            end_effector_id: str
+            poses: List[Pose]
+            start_joints: Optional[List[Joint]] = None
+            avoid_collisions: bool = True
+
+        args: Args
+
+    @dataclass
+    class Response(RPC.Response):
+        data: Optional[List[InverseKinematicsResult]] = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class ForwardKinematicsBatch(RPC):
+    @dataclass
+    class Request(RPC.Request):
+        @dataclass
+        class Args(JsonSchemaMixin):
+            robot_id: str
+            end_effector_id: str
+            joints: List[List[Joint]]
+
+        args: Args
+
+    @dataclass
+    class Response(RPC.Response):
+        data: Optional[List[ForwardKinematicsResult]] = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class GetReachability(RPC):
+    @dataclass
+    class Request(RPC.Request):
+        @dataclass
+        class Args(JsonSchemaMixin):
+            robot_id: str
+            end_effector_id: str
+
+        args: Args
+
+    @dataclass
+    class Response(RPC.Response):
+        data: Optional[List[OrientationReachability]] = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 class CalibrateRobot(RPC):
     @dataclass
     class Request(RPC.Request):
@@ -110,18 +110,26 @@ def _publish(project_id: str, package_name: str) -> RespT:
                 obj_types = set(cached_scene.object_types)
                 obj_types_with_models: Set[str] = set()
 
+                # everything used by the scene is fetched upfront, in few requests
+                logger.debug("Getting scene object types and their models.")
+                scene_obj_types = {obj_type.id: obj_type for obj_type in ps.get_object_types_bulk(obj_types)}
+                models = {
+                    (model.type(), model.id): model
+                    for model in ps.get_models_bulk(ot.model for ot in scene_obj_types.values() if ot.model)
+                }
+
                 for scene_obj in scene.objects:
 
                     if scene_obj.type in types_dict:
                         continue
 
-                    logger.debug(f"Getting scene object type {scene_obj.type}.")
-                    obj_type = ps.get_object_type(scene_obj.type)
+                    logger.debug(f"Processing scene object type {scene_obj.type}.")
+                    obj_type = scene_obj_types[scene_obj.type]
 
                     if obj_type.model and obj_type.id not in obj_types_with_models:
                         obj_types_with_models.add(obj_type.id)
 
-                        model = ps.get_model(obj_type.model.id, obj_type.model.type)
+                        model = models[(obj_type.model.type, obj_type.model.id)]
                         obj_model = ObjectModel(
                             obj_type.model.type, **{model.type().value.lower(): model}  # type: ignore
                         )
@@ -3,12 +3,13 @@ import time
 from abc import ABCMeta, abstractmethod
 from typing import List
 
-import quaternion
 from arcor2_dobot.dobot_api import MODE_PTP, DobotApi, DobotApiException
 
 import arcor2.transformations as tr
 from arcor2.data.common import Joint, Pose, StrEnum
-from arcor2.exceptions import Arcor2NotImplemented
+from arcor2.data.lite import LiteOrientation
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult
+from arcor2.exceptions import Arcor2Exception, Arcor2NotImplemented
 from arcor2.helpers import NonBlockingLock
 from arcor2.object_types.abstract import RobotException
 
@@ -92,6 +93,38 @@ class Dobot(metaclass=ABCMeta):
     def forward_kinematics(self, joints: List[Joint]) -> Pose:
         raise Arcor2NotImplemented()
 
+    def inverse_kinematics_batch(self, poses: List[Pose]) -> List[InverseKinematicsResult]:
+        """Computes inverse kinematics for many (absolute) poses.
+
+        Derived classes might provide a faster (vectorized) implementation.
+        """
+
+        results: List[InverseKinematicsResult] = []
+
+        for pose in poses:
+            try:
+                results.append(InverseKinematicsResult(self.inverse_kinematics(pose)))
+            except Arcor2NotImplemented:
+                raise
+            except (Arcor2Exception, DobotApiException) as e:
+                results.append(InverseKinematicsResult(error=str(e)))
+
+        return results
+
+    def forward_kinematics_batch(self, joints: List[List[Joint]]) -> List[ForwardKinematicsResult]:
+
+        results: List[ForwardKinematicsResult] = []
+
+        for jnts in joints:
+            try:
+                results.append(ForwardKinematicsResult(self.forward_kinematics(jnts)))
+            except Arcor2NotImplemented:
+                raise
+            except (Arcor2Exception, DobotApiException) as e:
+                results.append(ForwardKinematicsResult(error=str(e)))
+
+        return results
+
     def _handle_pose_out(self, pose: Pose) -> None:
         """This is called (only for a real robot) from `get_end_effector_pose`
         so derived classes can do custom changes to the pose.
@@ -136,9 +169,9 @@ class Dobot(metaclass=ABCMeta):
         p.position.x = pos.position.x / 1000.0
         p.position.y = pos.position.y / 1000.0
         p.position.z = pos.position.z / 1000.0
-        p.orientation.set_from_quaternion(
-            quaternion.from_euler_angles(0, math.pi, math.radians(pos.joints.j4 + pos.joints.j1))
-        )
+        p.orientation = LiteOrientation.from_euler_angles(
+            0, math.pi, math.radians(pos.joints.j4 + pos.joints.j1)
+        ).to_orientation()
 
         self._handle_pose_out(p)
         return tr.make_pose_abs(self.pose, p)
@@ -197,7 +230,7 @@ class Dobot(metaclass=ABCMeta):
                 self._dobot.clear_alarms()
 
                 # TODO this is probably not working properly (use similar solution as in _check_orientation?)
-                rotation = math.degrees(quaternion.as_euler_angles(rp.orientation.as_quaternion())[2])
+                rotation = math.degrees(LiteOrientation.from_orientation(rp.orientation).yaw())
                 self._dobot.speed(velocity, acceleration)
 
                 self._dobot.wait_for_cmd(
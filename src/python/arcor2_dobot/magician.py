@@ -1,12 +1,14 @@
 import math
 from typing import Dict, List, Tuple
 
-import quaternion
+import numpy as np
 from arcor2_dobot.dobot import Dobot, DobotException
 from arcor2_dobot.dobot_api import DobotApiException
 
 import arcor2.transformations as tr
-from arcor2.data.common import Joint, Orientation, Pose, Position, StrEnum
+from arcor2.data.common import Joint, Pose, Position, StrEnum
+from arcor2.data.lite import LiteOrientation
+from arcor2.data.robot import InverseKinematicsResult
 
 
 class Joints(StrEnum):
@@ -85,7 +87,7 @@ class DobotMagician(Dobot):
         self._check_orientation(pose)
 
         # TODO this is probably not working properly (use similar solution as in _check_orientation?)
-        _, _, yaw = quaternion.as_euler_angles(pose.orientation.as_quaternion())
+        yaw = LiteOrientation.from_orientation(pose.orientation).yaw()
 
         x = pose.position.x
         y = pose.position.y
@@ -97,8 +99,8 @@ class DobotMagician(Dobot):
         rho_sq = pow(r - self.link_4_length, 2) + pow(z, 2)
         rho = math.sqrt(rho_sq)  # distance b/w the ends of the links joined at the elbow
 
-        l2_sq = self.link_2_length ** 2
-        l3_sq = self.link_3_length ** 2
+        l2_sq = self.link_2_length**2
+        l3_sq = self.link_3_length**2
 
         # law of cosines
         try:
@@ -138,6 +140,81 @@ class DobotMagician(Dobot):
 
         return self._inverse_kinematics(tr.make_pose_rel(self.pose, pose))
 
+    def inverse_kinematics_batch(self, poses: List[Pose]) -> List[InverseKinematicsResult]:
+        """Computes inverse kinematics for many (absolute) poses at once.
+
+        Same as inverse_kinematics, but vectorized.
+
+        :param poses: IK target poses
+        :return: Joints or error for each of the poses
+        """
+
+        if not poses:
+            return []
+
+        rel = tr.make_poses_rel(tr.poses_to_array([self.pose])[0], tr.poses_to_array(poses))
+        qx, qy, qz, qw = rel[:, 3], rel[:, 4], rel[:, 5], rel[:, 6]
+
+        # see _check_orientation
+        ox = np.sin(np.arctan2(qx, qw))
+        oy = np.sin(np.arctan2(qy, qw))
+        eps = 1e-6
+        impossible = ((np.abs(ox) > eps) & (1 - np.abs(ox) > eps)) | (1 - np.abs(oy) > eps)
+
+        yaw = np.arctan2(qz, qw) - np.arctan2(-qx, qy)
+
+        x = rel[:, 0]
+        y = rel[:, 1]
+        z = rel[:, 2] + self.end_effector_length
+
+        r = np.hypot(x, y)
+        rho_sq = (r - self.link_4_length) ** 2 + z**2
+        rho = np.sqrt(rho_sq)
+
+        l2_sq = self.link_2_length**2
+        l3_sq = self.link_3_length**2
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cos_alpha = (l2_sq + rho_sq - l3_sq) / (2.0 * self.link_2_length * rho)
+
+        cos_gamma = (l2_sq + l3_sq - rho_sq) / (2.0 * self.link_2_length * self.link_3_length)
+        failed = ~((np.abs(cos_alpha) <= 1) & (np.abs(cos_gamma) <= 1))  # also catches NaN
+
+        alpha = np.arccos(np.clip(cos_alpha, -1, 1))
+        gamma = np.arccos(np.clip(cos_gamma, -1, 1))
+        beta = np.arctan2(z, r - self.link_4_length)
+
+        base_angle = np.arctan2(y, x)
+        rear_angle = math.pi / 2 - beta - alpha
+        front_angle = math.pi / 2 - gamma
+
+        values = np.stack(
+            (base_angle, rear_angle, front_angle, -rear_angle - front_angle, yaw - base_angle), axis=-1
+        ).tolist()
+
+        results: List[InverseKinematicsResult] = []
+
+        for idx, row in enumerate(values):
+
+            if impossible[idx]:
+                results.append(InverseKinematicsResult(error="Impossible orientation."))
+                continue
+
+            if failed[idx]:
+                results.append(InverseKinematicsResult(error="Failed to compute IK."))
+                continue
+
+            joints = [Joint(name, value) for name, value in zip(Joints, row)]
+
+            try:
+                self.validate_joints(joints)
+            except DobotException as e:
+                results.append(InverseKinematicsResult(error=str(e)))
+            else:
+                results.append(InverseKinematicsResult(joints))
+
+        return results
+
     def forward_kinematics(self, joints: List[Joint]) -> Pose:
         """Computes forward kinematics.
 
@@ -170,10 +247,9 @@ class DobotMagician(Dobot):
             - self.end_effector_length
         )
 
-        ori = Orientation()
-        ori.set_from_quaternion(quaternion.from_euler_angles(0, math.pi, joints[-1].value + j1))
-
-        pose = Pose(Position(x, y, z), ori)
+        pose = Pose(
+            Position(x, y, z), LiteOrientation.from_euler_angles(0, math.pi, joints[-1].value + j1).to_orientation()
+        )
 
         if __debug__:
             self._check_orientation(pose)
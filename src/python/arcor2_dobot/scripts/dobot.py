@@ -12,6 +12,7 @@ from arcor2_dobot.magician import DobotMagician
 from flask import jsonify, request
 
 from arcor2.data.common import Joint, Pose
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult, RobotState
 from arcor2.flask import RespT, create_app, run_app
 from arcor2.helpers import port_from_url
 from arcor2.logging import get_logger
@@ -362,6 +363,43 @@ def get_joints() -> RespT:
     return jsonify(_dobot.robot_joints())
 
 
+@app.route("/state", methods=["GET"])
+@requires_started
+def get_state() -> RespT:
+    """Get joints and the EEF pose at once.
+    ---
+    get:
+        description: Get joints and the EEF pose at once.
+        tags:
+           - Robot
+        parameters:
+            - in: query
+              name: endEffectors
+              schema:
+                type: boolean
+                default: true
+              description: Whether to get the EEF pose.
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        $ref: RobotState
+            403:
+              description: Not started
+    """
+
+    assert _dobot is not None
+
+    state = RobotState(_dobot.robot_joints())
+
+    if request.args.get("endEffectors", default="true") == "true":
+        state.end_effectors["default"] = _dobot.get_end_effector_pose()
+
+    return jsonify(state)
+
+
 @app.route("/ik", methods=["PUT"])
 @requires_started
 def put_ik() -> RespT:
@@ -428,6 +466,78 @@ def put_fk() -> RespT:
     return jsonify(_dobot.forward_kinematics(joints))
 
 
+@app.route("/ik/batch", methods=["PUT"])
+@requires_started
+def put_ik_batch() -> RespT:
+    """Computes inverse kinematics for many poses.
+    ---
+    put:
+        description: Computes inverse kinematics for many poses.
+        tags:
+           - Robot
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                        $ref: Pose
+        responses:
+            200:
+              description: Joints or error for each of the poses.
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: InverseKinematicsResult
+            403:
+              description: Not started
+    """
+
+    assert _dobot is not None
+
+    poses = [Pose.from_dict(p) for p in request.json]
+    return jsonify(_dobot.inverse_kinematics_batch(poses))
+
+
+@app.route("/fk/batch", methods=["PUT"])
+@requires_started
+def put_fk_batch() -> RespT:
+    """Computes forward kinematics for many sets of joints.
+    ---
+    put:
+        description: Computes forward kinematics for many sets of joints.
+        tags:
+           - Robot
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                        type: array
+                        items:
+                            $ref: Joint
+        responses:
+            200:
+              description: Pose or error for each set of joints.
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: ForwardKinematicsResult
+            403:
+              description: Not started
+    """
+
+    assert _dobot is not None
+
+    joints = [[Joint.from_dict(j) for j in jnts] for jnts in request.json]
+    return jsonify(_dobot.forward_kinematics_batch(joints))
+
+
 def main() -> None:
 
     parser = argparse.ArgumentParser(description=SERVICE_NAME)
@@ -440,7 +550,15 @@ def main() -> None:
     if _mock:
         logger.info("Starting as a mock!")
 
-    run_app(app, SERVICE_NAME, version(), version(), port_from_url(URL), [Pose, Joint], args.swagger)
+    run_app(
+        app,
+        SERVICE_NAME,
+        version(),
+        version(),
+        port_from_url(URL),
+        [Pose, Joint, RobotState, InverseKinematicsResult, ForwardKinematicsResult],
+        args.swagger,
+    )
 
     if _dobot:
         _dobot.cleanup()
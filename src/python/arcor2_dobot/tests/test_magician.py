@@ -0,0 +1,69 @@
+import math
+import random
+from typing import List
+
+import pytest
+from arcor2_dobot.dobot_api import DobotApiException
+from arcor2_dobot.magician import DobotException, DobotMagician, Joints
+
+from arcor2.data.common import Joint, Orientation, Pose, Position
+
+
+def test_inverse_kinematics_batch() -> None:
+
+    dobot = DobotMagician(Pose(Position(0.1, -0.2, 0.05), Orientation(0, 0, 0.383, 0.924)), simulator=True)
+    rnd = random.Random(42)
+
+    poses: List[Pose] = []
+
+    for _ in range(50):
+        j1, j2, j3, j5 = (rnd.uniform(-1, 1), rnd.uniform(0, 1.4), rnd.uniform(-0.9, 1.1), rnd.uniform(-1, 1))
+        poses.append(
+            dobot.forward_kinematics(
+                [
+                    Joint(Joints.J1, j1),
+                    Joint(Joints.J2, j2),
+                    Joint(Joints.J3, j3),
+                    Joint(Joints.J4, 0),
+                    Joint(Joints.J5, j5),
+                ]
+            )
+        )
+
+    unreachable = Pose(Position(10, 0, 0), poses[0].orientation)
+    impossible = Pose(poses[0].position, Orientation())
+    poses.extend([unreachable, impossible])
+
+    results = dobot.inverse_kinematics_batch(poses)
+    assert len(results) == len(poses)
+
+    for pose, res in zip(poses[:-2], results):
+
+        assert res.error is None
+        assert res.joints is not None
+
+        for expected, joint in zip(dobot.inverse_kinematics(pose), res.joints):
+            assert expected.name == joint.name
+            diff = (expected.value - joint.value) % (2 * math.pi)
+            assert min(diff, 2 * math.pi - diff) == pytest.approx(0, abs=1e-6)
+
+    with pytest.raises(DobotException):
+        dobot.inverse_kinematics(unreachable)
+
+    assert results[-2].joints is None
+    assert results[-2].error == "Failed to compute IK."
+
+    with pytest.raises(DobotApiException):
+        dobot.inverse_kinematics(impossible)
+
+    assert results[-1].error == "Impossible orientation."
+    assert dobot.inverse_kinematics_batch([]) == []
+
+
+def test_forward_kinematics_batch() -> None:
+
+    dobot = DobotMagician(Pose(), simulator=True)
+    joints = dobot.robot_joints()
+
+    results = dobot.forward_kinematics_batch([joints, joints])
+    assert [res.pose for res in results] == [dobot.forward_kinematics(joints)] * 2
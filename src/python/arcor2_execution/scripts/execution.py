@@ -13,7 +13,6 @@ import zipfile
 from datetime import datetime, timezone
 from typing import Awaitable, List, Optional, Set, Union
 
-import websockets
 from aiologger.levels import LogLevel
 from aiorun import run
 from dataclasses_jsonschema import ValidationError
@@ -376,8 +375,8 @@ async def _version_cb(req: arcor2_rpc.common.Version.Request, ui: WsClient) -> a
 async def send_to_clients(event: events.Event) -> None:
 
     if CLIENTS:
-        data = event.to_json()
-        await asyncio.wait([client.send(data) for client in CLIENTS])
+        payload = ws_server.Payload(event)
+        await asyncio.wait([ws_server.send_to_client(client, payload) for client in CLIENTS])
 
 
 async def register(websocket: WsClient) -> None:
@@ -385,10 +384,10 @@ async def register(websocket: WsClient) -> None:
     logger.info("Registering new client")
     CLIENTS.add(websocket)
 
-    tasks: List[Awaitable] = [websocket.send(PACKAGE_STATE_EVENT.to_json())]
+    tasks: List[Awaitable] = [ws_server.send_to_client(websocket, ws_server.Payload(PACKAGE_STATE_EVENT))]
 
     if PACKAGE_INFO_EVENT:
-        tasks.append(websocket.send(PACKAGE_INFO_EVENT.to_json()))
+        tasks.append(ws_server.send_to_client(websocket, ws_server.Payload(PACKAGE_INFO_EVENT)))
 
     await asyncio.gather(*tasks)
 
@@ -413,7 +412,7 @@ RPC_DICT: ws_server.RPC_DICT_TYPE = {
 
 async def aio_main() -> None:
 
-    await websockets.serve(
+    await ws_server.serve(
         functools.partial(ws_server.server, logger=logger, register=register, unregister=unregister, rpc_dict=RPC_DICT),
         "0.0.0.0",
         port_from_url(URL),
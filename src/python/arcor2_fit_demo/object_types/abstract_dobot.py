@@ -4,7 +4,7 @@ from typing import List, Optional, Set, cast
 from arcor2 import DynamicParamTuple as DPT
 from arcor2 import rest
 from arcor2.data.common import ActionMetadata, Joint, Pose, StrEnum
-from arcor2.data.robot import RobotType
+from arcor2.data.robot import ForwardKinematicsResult, InverseKinematicsResult, RobotState, RobotType
 from arcor2.object_types.abstract import Robot, RobotException, Settings
 
 # TODO jogging
@@ -157,6 +157,14 @@ class AbstractDobot(Robot):
     def robot_joints(self) -> List[Joint]:
         return rest.call(rest.Method.GET, f"{self.settings.url}/joints", list_return_type=Joint)
 
+    def robot_state(self, end_effectors: bool = True) -> RobotState:
+        return rest.call(
+            rest.Method.GET,
+            f"{self.settings.url}/state",
+            params={"end_effectors": end_effectors},
+            return_type=RobotState,
+        )
+
     def inverse_kinematics(
         self,
         end_effector_id: str,
@@ -185,6 +193,41 @@ class AbstractDobot(Robot):
 
         return rest.call(rest.Method.PUT, f"{self.settings.url}/fk", body=joints, return_type=Pose)
 
+    def inverse_kinematics_batch(
+        self,
+        end_effector_id: str,
+        poses: List[Pose],
+        start_joints: Optional[List[Joint]] = None,
+        avoid_collisions: bool = True,
+    ) -> List[InverseKinematicsResult]:
+        """Computes inverse kinematics for many poses using one request.
+
+        :param end_effector_id: IK target pose end-effector
+        :param poses: IK target poses
+        :param start_joints: IK start joints (not supported)
+        :param avoid_collisions: Return non-collision IK result if true (not supported)
+        :return: Result for each of the poses (joints or error)
+        """
+
+        return rest.call(
+            rest.Method.PUT, f"{self.settings.url}/ik/batch", body=poses, list_return_type=InverseKinematicsResult
+        )
+
+    def forward_kinematics_batch(
+        self, end_effector_id: str, joints: List[List[Joint]]
+    ) -> List[ForwardKinematicsResult]:
+        """Computes forward kinematics for many sets of joints using one
+        request.
+
+        :param end_effector_id: Target end effector name
+        :param joints: Input joint values
+        :return: Result for each set of joints (pose or error)
+        """
+
+        return rest.call(
+            rest.Method.PUT, f"{self.settings.url}/fk/batch", body=joints, list_return_type=ForwardKinematicsResult
+        )
+
     home.__action__ = ActionMetadata(blocking=True)  # type: ignore
     move.__action__ = ActionMetadata(blocking=True)  # type: ignore
     suck.__action__ = ActionMetadata(blocking=True)  # type: ignore
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
+import threading
+from collections import deque
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Dict, Tuple
+from typing import Deque, Dict, Optional, Tuple
 
 import humps
+from dataclasses_jsonschema import JsonSchemaMixin
 from flask import jsonify, request, send_file
 
-from arcor2.data import common, object_type
+from arcor2.data import common, object_type, storage
 from arcor2.flask import RespT, create_app, run_app
 from arcor2_mocks import PROJECT_PORT, PROJECT_SERVICE_NAME, version
 
@@ -24,6 +27,35 @@ SPHERES: Dict[str, object_type.Sphere] = {}
 
 MESHES: Dict[str, Tuple[BytesIO, str]] = {}
 
+CHANGES: Deque[storage.Change] = deque(maxlen=1000)
+REVISION = 0
+CHANGES_CV = threading.Condition()
+
+
+def record_change(kind: storage.Change.Kind, change_type: storage.Change.Type, id: str) -> None:
+
+    global REVISION
+
+    with CHANGES_CV:
+        REVISION += 1
+        CHANGES.append(storage.Change(REVISION, kind, change_type, id))
+        CHANGES_CV.notify_all()
+
+
+def add_or_update(store: Dict, id: str) -> storage.Change.Type:
+    return storage.Change.Type.UPDATE if id in store else storage.Change.Type.ADD
+
+
+def conditional(obj: JsonSchemaMixin, modified: Optional[datetime] = None) -> RespT:
+    """Response with ETag (and Last-Modified) - 304 is sent if the client
+    already has the current version."""
+
+    resp = jsonify(obj.to_dict())
+    resp.add_etag()
+    if modified:
+        resp.last_modified = modified
+    return resp.make_conditional(request)
+
 
 @app.route("/models/<string:mesh_id>/mesh/file", methods=["PUT"])
 def put_mesh_file(mesh_id: str) -> RespT:
@@ -114,7 +146,47 @@ def put_project() -> RespT:
     project = common.Project.from_dict(humps.decamelize(request.json))
     project.modified = datetime.now(tz=timezone.utc)
     project.int_modified = None
+    ct = add_or_update(PROJECTS, project.id)
     PROJECTS[project.id] = project
+    record_change(storage.Change.Kind.PROJECT, ct, project.id)
+    return jsonify(project.modified.isoformat())
+
+
+@app.route("/project", methods=["PATCH"])
+def patch_project() -> RespT:
+    """Apply changes to the project.
+    ---
+    patch:
+        tags:
+            - Project
+        description: Adds, updates or removes action points and logic items of the project, updates its attributes.
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    $ref: ProjectPatch
+        responses:
+            200:
+              description: Ok
+            404:
+              description: Project not found.
+            412:
+              description: The project was modified meanwhile (modified does not match).
+    """
+
+    patch = storage.ProjectPatch.from_dict(humps.decamelize(request.json))
+
+    try:
+        project = PROJECTS[patch.project.id]
+    except KeyError:
+        return "Not found", 404
+
+    if project.modified != patch.project.modified:
+        return "Project was modified meanwhile.", 412
+
+    patch.apply(project)
+    project.modified = datetime.now(tz=timezone.utc)
+    record_change(storage.Change.Kind.PROJECT, storage.Change.Type.UPDATE, project.id)
     return jsonify(project.modified.isoformat())
 
 
@@ -140,14 +212,50 @@ def get_project(id: str) -> RespT:
                 application/json:
                     schema:
                         $ref: Project
+            304:
+              description: Not modified (If-None-Match or If-Modified-Since matched).
     """
 
     try:
-        return jsonify(PROJECTS[id].to_dict())
+        return conditional(PROJECTS[id], PROJECTS[id].modified)
     except KeyError:
         return "Not found", 404
 
 
+@app.route("/projects/bulk", methods=["POST"])
+def get_projects_bulk() -> RespT:
+    """Gets projects by ids.
+    ---
+    post:
+        tags:
+            - Project
+        summary: Gets projects by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: Project
+            404:
+              description: Some of the projects do not exist.
+    """
+
+    try:
+        return jsonify([PROJECTS[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/project/<string:id>", methods=["DELETE"])
 def delete_project(id: str) -> RespT:
     """Deletes project.
@@ -173,6 +281,8 @@ def delete_project(id: str) -> RespT:
     except KeyError:
         return "Not found", 404
 
+    record_change(storage.Change.Kind.PROJECT, storage.Change.Type.REMOVE, id)
+
     return "ok", 200
 
 
@@ -222,7 +332,47 @@ def put_scene() -> RespT:
     scene = common.Scene.from_dict(humps.decamelize(request.json))
     scene.modified = datetime.now(tz=timezone.utc)
     scene.int_modified = None
+    ct = add_or_update(SCENES, scene.id)
     SCENES[scene.id] = scene
+    record_change(storage.Change.Kind.SCENE, ct, scene.id)
+    return jsonify(scene.modified.isoformat())
+
+
+@app.route("/scene", methods=["PATCH"])
+def patch_scene() -> RespT:
+    """Apply changes to the scene.
+    ---
+    patch:
+        tags:
+            - Scene
+        description: Adds, updates or removes objects of the scene, updates its attributes.
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    $ref: ScenePatch
+        responses:
+            200:
+              description: Ok
+            404:
+              description: Scene not found.
+            412:
+              description: The scene was modified meanwhile (modified does not match).
+    """
+
+    patch = storage.ScenePatch.from_dict(humps.decamelize(request.json))
+
+    try:
+        scene = SCENES[patch.scene.id]
+    except KeyError:
+        return "Not found", 404
+
+    if scene.modified != patch.scene.modified:
+        return "Scene was modified meanwhile.", 412
+
+    patch.apply(scene)
+    scene.modified = datetime.now(tz=timezone.utc)
+    record_change(storage.Change.Kind.SCENE, storage.Change.Type.UPDATE, scene.id)
     return jsonify(scene.modified.isoformat())
 
 
@@ -248,14 +398,50 @@ def get_scene(id: str) -> RespT:
                 application/json:
                     schema:
                         $ref: Scene
+            304:
+              description: Not modified (If-None-Match or If-Modified-Since matched).
     """
 
     try:
-        return jsonify(SCENES[id].to_dict())
+        return conditional(SCENES[id], SCENES[id].modified)
     except KeyError:
         return "Not found", 404
 
 
+@app.route("/scenes/bulk", methods=["POST"])
+def get_scenes_bulk() -> RespT:
+    """Gets scenes by ids.
+    ---
+    post:
+        tags:
+            - Scene
+        summary: Gets scenes by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: Scene
+            404:
+              description: Some of the scenes do not exist.
+    """
+
+    try:
+        return jsonify([SCENES[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/scene/<string:id>", methods=["DELETE"])
 def delete_scene(id: str) -> RespT:
     """Deletes scene.
@@ -281,6 +467,8 @@ def delete_scene(id: str) -> RespT:
     except KeyError:
         return "Not found", 404
 
+    record_change(storage.Change.Kind.SCENE, storage.Change.Type.REMOVE, id)
+
     return "ok", 200
 
 
@@ -328,7 +516,9 @@ def put_object_type() -> RespT:
     """
 
     obj_type = object_type.ObjectType.from_dict(humps.decamelize(request.json))
+    ct = add_or_update(OBJECT_TYPES, obj_type.id)
     OBJECT_TYPES[obj_type.id] = obj_type
+    record_change(storage.Change.Kind.OBJECT_TYPE, ct, obj_type.id)
     return "ok", 200
 
 
@@ -354,14 +544,50 @@ def get_object_type(id: str) -> RespT:
                 application/json:
                     schema:
                         $ref: ObjectType
+            304:
+              description: Not modified (If-None-Match or If-Modified-Since matched).
     """
 
     try:
-        return jsonify(OBJECT_TYPES[id].to_dict())
+        return conditional(OBJECT_TYPES[id])
     except KeyError:
         return "Not found", 404
 
 
+@app.route("/object_types/bulk", methods=["POST"])
+def get_object_types_bulk() -> RespT:
+    """Gets object types by ids.
+    ---
+    post:
+        tags:
+            - ObjectType
+        summary: Gets object types by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: ObjectType
+            404:
+              description: Some of the object types do not exist.
+    """
+
+    try:
+        return jsonify([OBJECT_TYPES[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/object_type/<string:id>", methods=["DELETE"])
 def delete_object_type(id: str) -> RespT:
     """Deletes object type.
@@ -387,6 +613,8 @@ def delete_object_type(id: str) -> RespT:
     except KeyError:
         return "Not found", 404
 
+    record_change(storage.Change.Kind.OBJECT_TYPE, storage.Change.Type.REMOVE, id)
+
     return "ok", 200
 
 
@@ -469,6 +697,40 @@ def get_box(id: str) -> RespT:
         return "Not found", 404
 
 
+@app.route("/models/box/bulk", methods=["POST"])
+def get_boxes_bulk() -> RespT:
+    """Gets boxes by ids.
+    ---
+    post:
+        tags:
+            - Models
+        summary: Gets boxes by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: Box
+            404:
+              description: Some of the boxes do not exist.
+    """
+
+    try:
+        return jsonify([BOXES[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/models/cylinder", methods=["PUT"])
 def put_cylinder() -> RespT:
     """Add or update cylinder.
@@ -522,6 +784,40 @@ def get_cylinder(id: str) -> RespT:
         return "Not found", 404
 
 
+@app.route("/models/cylinder/bulk", methods=["POST"])
+def get_cylinders_bulk() -> RespT:
+    """Gets cylinders by ids.
+    ---
+    post:
+        tags:
+            - Models
+        summary: Gets cylinders by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: Cylinder
+            404:
+              description: Some of the cylinders do not exist.
+    """
+
+    try:
+        return jsonify([CYLINDERS[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/models/sphere", methods=["PUT"])
 def put_sphere() -> RespT:
     """Add or update sphere.
@@ -575,6 +871,40 @@ def get_sphere(id: str) -> RespT:
         return "Not found", 404
 
 
+@app.route("/models/sphere/bulk", methods=["POST"])
+def get_spheres_bulk() -> RespT:
+    """Gets spheres by ids.
+    ---
+    post:
+        tags:
+            - Models
+        summary: Gets spheres by ids (in the same order).
+        requestBody:
+              content:
+                application/json:
+                  schema:
+                    type: array
+                    items:
+                      type: string
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        type: array
+                        items:
+                            $ref: Sphere
+            404:
+              description: Some of the spheres do not exist.
+    """
+
+    try:
+        return jsonify([SPHERES[id].to_dict() for id in request.json])
+    except KeyError as e:
+        return f"{e.args[0]} not found", 404
+
+
 @app.route("/models/<string:id>", methods=["DELETE"])
 def delete_model(id: str) -> RespT:
     """Deletes model.
@@ -609,6 +939,60 @@ def delete_model(id: str) -> RespT:
     return "ok", 200
 
 
+@app.route("/changes", methods=["GET"])
+def get_changes() -> RespT:
+    """Gets changes of projects, scenes and object types (long-poll).
+    ---
+    get:
+        tags:
+            - Changes
+        summary: Waits (at most timeout seconds) for changes newer than the given revision.
+        parameters:
+            - name: since
+              in: query
+              description: Last revision known to the client. If not given, just the current revision is returned.
+              required: false
+              schema:
+                type: integer
+            - name: timeout
+              in: query
+              description: How long to wait for a change (seconds).
+              required: false
+              schema:
+                type: number
+                default: 10.0
+        responses:
+            200:
+              description: Ok
+              content:
+                application/json:
+                    schema:
+                        $ref: Changes
+    """
+
+    since: Optional[int] = request.args.get("since", type=int)
+    timeout = request.args.get("timeout", default=10.0, type=float)
+
+    with CHANGES_CV:
+
+        if since is None:
+            return jsonify(storage.Changes(REVISION).to_dict())
+
+        last_known = since
+
+        # the client knows revision that never existed (e.g. the service was restarted)
+        if last_known > REVISION:
+            return jsonify(storage.Changes(REVISION, reset=True).to_dict())
+
+        CHANGES_CV.wait_for(lambda: REVISION > last_known, timeout)
+
+        # changes older than the oldest one in the history are lost
+        if last_known < REVISION and CHANGES[0].revision > last_known + 1:
+            return jsonify(storage.Changes(REVISION, reset=True).to_dict())
+
+        return jsonify(storage.Changes(REVISION, [ch for ch in CHANGES if ch.revision > last_known]).to_dict())
+
+
 def main() -> None:
 
     parser = argparse.ArgumentParser(description=PROJECT_SERVICE_NAME)
@@ -629,6 +1013,9 @@ def main() -> None:
             object_type.Box,
             object_type.Cylinder,
             object_type.Sphere,
+            storage.Changes,
+            storage.ProjectPatch,
+            storage.ScenePatch,
         ],
         args.swagger,
     )
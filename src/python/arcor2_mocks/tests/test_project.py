@@ -3,6 +3,72 @@ from subprocess import check_output
 import yaml
 from openapi_spec_validator import validate_spec
 
+from arcor2.data import storage
+from arcor2.data.common import Action, ActionPoint, LogicItem, Position, Project
+from arcor2_mocks.scripts.mock_project import app
+
 
 def test_project_mock_openapi() -> None:
     validate_spec(yaml.full_load(check_output(["./src.python.arcor2_mocks.scripts/mock_project.pex", "--swagger"])))
+
+
+def test_changes() -> None:
+
+    client = app.test_client()
+
+    revision = storage.Changes.from_dict(client.get("/changes").json).revision
+
+    client.put("/project", json=Project("p1", "name", "s1").to_dict())
+    client.put("/project", json=Project("p1", "name", "s1").to_dict())
+    client.delete("/project/p1")
+
+    changes = storage.Changes.from_dict(client.get("/changes", query_string={"since": revision}).json)
+    assert changes.revision == revision + 3
+    assert not changes.reset
+    assert [(ch.kind, ch.type, ch.id) for ch in changes.changes] == [
+        (storage.Change.Kind.PROJECT, storage.Change.Type.ADD, "p1"),
+        (storage.Change.Kind.PROJECT, storage.Change.Type.UPDATE, "p1"),
+        (storage.Change.Kind.PROJECT, storage.Change.Type.REMOVE, "p1"),
+    ]
+
+    # nothing new - waits for the timeout
+    changes = storage.Changes.from_dict(
+        client.get("/changes", query_string={"since": changes.revision, "timeout": 0.1}).json
+    )
+    assert not changes.changes
+
+    # unknown revision
+    assert storage.Changes.from_dict(client.get("/changes", query_string={"since": revision + 100}).json).reset
+
+
+def test_patch() -> None:
+
+    client = app.test_client()
+
+    project = Project("p2", "name", "s1")
+    project.action_points.append(ActionPoint("ap1", "ap1", Position()))
+    project.action_points.append(ActionPoint("ap2", "ap2", Position()))
+    project.logic.append(LogicItem("l1", LogicItem.START, LogicItem.END))
+    client.put("/project", json=project.to_dict())
+
+    stored = Project.from_dict(client.get("/project/p2").json)
+    assert stored.modified
+
+    changes = Project("p2", "new name", "s1", modified=stored.modified)
+    ap3 = ActionPoint("ap3", "ap3", Position(1, 0, 0))
+    ap3.actions.append(Action("ac1", "ac1", "Test/test"))
+
+    patch = storage.ProjectPatch(changes, [ap3], ["ap1"], [], ["l1"])
+    assert client.patch("/project", json=patch.to_dict()).status_code == 200
+
+    patched = Project.from_dict(client.get("/project/p2").json)
+    assert patched.name == "new name"
+    assert [ap.id for ap in patched.action_points] == ["ap2", "ap3"]
+    assert patched.action_points[1].actions[0].id == "ac1"
+    assert not patched.logic
+
+    # the patch is based on an outdated version
+    assert client.patch("/project", json=patch.to_dict()).status_code == 412
+
+    patch.project.id = "unknown"
+    assert client.patch("/project", json=patch.to_dict()).status_code == 404